@@ -1,28 +1,36 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, status
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-from app.services.model_manager import ModelManager
-from app.services.prediction_service import PredictionService
 from app.utils.logger import setup_logger
 from app.config.settings import get_settings
-from pydantic import BaseModel
+from app.utils.exceptions import ModelNotLoadedException
+from pydantic import BaseModel, Field
 
 settings = get_settings()
 logger = setup_logger("api.management", settings.LOG_LEVEL)
 
 router = APIRouter(prefix="/management", tags=["Management"])
 
-# Глобальные инстансы
-model_manager = ModelManager()
-
 # Импорт prediction_service из модуля prediction
 from app.api.v1.prediction import prediction_service
 
+# Реестр моделей общий с сервисом предсказаний
+model_manager = prediction_service.model_manager
+
 class LoadModelRequest(BaseModel):
     model_name: str
     version: Optional[str] = None
 
+class RoutingVariant(BaseModel):
+    model_name: str
+    version: Optional[str] = None
+    weight: float = Field(..., gt=0)
+
+class RoutingRequest(BaseModel):
+    variants: List[RoutingVariant] = Field(..., min_items=1)
+
 class ModelInfo(BaseModel):
     model_name: str
     version: str
@@ -37,22 +45,23 @@ async def load_model(request: LoadModelRequest):
     
     - model_name: имя модели
     - version: версия (если не указана, загружается latest)
+    
+    Загрузка идёт в фоновом потоке, предсказания в это время обслуживает
+    текущая модель; подмена - атомарная.
     """
     try:
         logger.info(f"📥 Загрузка модели: {request.model_name}/{request.version or 'latest'}")
         
-        prediction_service.load_model(
+        bundle = await prediction_service.load_model_async(
             model_name=request.model_name,
             version=request.version
         )
         
-        model_info = model_manager.get_current_model_info()
-        
         return {
             "message": "Модель успешно загружена",
-            "model_name": request.model_name,
-            "version": model_info['version'] if model_info else 'unknown',
-            "vocab_size": model_info['vocab_size'] if model_info else 0,
+            "model_name": bundle.model_name,
+            "version": bundle.version,
+            "vocab_size": bundle.vocab.vocab_size,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -86,6 +95,30 @@ async def list_models():
             detail=f"Ошибка получения списка: {str(e)}"
         )
 
+@router.get("/models/{model_name}/{version}/history")
+async def get_training_history(model_name: str, version: str):
+    """
+    История обучения версии по эпохам (loss, пропускная способность)
+    
+    Хранится отдельно от метаданных, чтобы не раздувать список моделей.
+    version=latest - последняя версия.
+    """
+    history = model_manager.get_training_history(
+        model_name, None if version == "latest" else version
+    )
+    
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Модель {model_name}/{version} не найдена"
+        )
+    
+    return {
+        "model_name": model_name,
+        "version": version,
+        "training_history": history
+    }
+
 @router.delete("/models/{model_name}/{version}")
 async def delete_model(model_name: str, version: str):
     """
@@ -121,7 +154,7 @@ async def delete_model(model_name: str, version: str):
 @router.get("/current-model")
 async def get_current_model():
     """Информация о текущей загруженной модели"""
-    model_info = model_manager.get_current_model_info()
+    model_info = prediction_service.get_model_info()
     
     if not model_info:
         raise HTTPException(
@@ -133,3 +166,48 @@ async def get_current_model():
         "model_info": model_info,
         "timestamp": datetime.utcnow().isoformat()
     }
+
+@router.get("/pool")
+async def get_model_pool():
+    """Версии в пуле моделей (LRU порядок, объём весов, попадания и вытеснения)"""
+    return {
+        "default_model": prediction_service.get_model_info(),
+        "pool": prediction_service.pool.get_info(),
+        "routing": prediction_service.get_routing(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.put("/routing")
+async def set_routing(request: RoutingRequest):
+    """
+    Взвешенное A/B распределение запросов без явной модели
+    
+    Версии вариантов загружаются в пул заранее; latest фиксируется на
+    момент вызова. Один и тот же текст всегда попадает в один вариант.
+    """
+    try:
+        routing = await asyncio.to_thread(
+            prediction_service.set_routing,
+            [variant.model_dump() for variant in request.variants]
+        )
+    except ModelNotLoadedException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e.message)
+        )
+    
+    return {
+        "message": "A/B распределение установлено",
+        "routing": routing,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.delete("/routing")
+async def clear_routing():
+    """Отключение A/B распределения (запросы обслуживает основная модель)"""
+    prediction_service.clear_routing()
+    
+    return {
+        "message": "A/B распределение отключено",
+        "timestamp": datetime.utcnow().isoformat()
+    }
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, status
+import asyncio
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Literal, Optional
 
 from app.services.prediction_service import PredictionService
 from app.services.model_manager import ModelManager
 from app.utils.logger import setup_logger
 from app.config.settings import get_settings
-from pydantic import BaseModel
+from app.utils.exceptions import ModelNotLoadedException
+from app.utils.profiler import SamplingProfiler, acquire_profiler, release_profiler
+from pydantic import BaseModel, Field
 
 settings = get_settings()
 logger = setup_logger("api.monitoring", settings.LOG_LEVEL)
@@ -22,6 +27,24 @@ class HealthResponse(BaseModel):
     timestamp: str
     metrics: Dict[str, Any]
 
+class ShadowRequest(BaseModel):
+    model_name: str
+    version: Optional[str] = None
+    sample_rate: Optional[float] = Field(default=None, gt=0, le=1)
+
+def require_api_key(x_api_key: Optional[str] = Header(default=None)):
+    """Доступ к административным эндпоинтам по заголовку X-API-Key"""
+    if not settings.API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Эндпоинт отключён: API_KEY не задан"
+        )
+    if x_api_key is None or not secrets.compare_digest(x_api_key, settings.API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный API ключ"
+        )
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -86,6 +109,116 @@ async def clear_cache():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@router.post("/shadow")
+async def start_shadow(request: ShadowRequest):
+    """
+    Теневой прогон модели-кандидата на живом трафике
+    
+    Доля sample_rate запросов копируется кандидату в фоне; ответы клиентам
+    даёт основная модель, задержка запросов не растёт.
+    """
+    try:
+        stats = await asyncio.to_thread(
+            prediction_service.start_shadow,
+            request.model_name,
+            request.version,
+            request.sample_rate
+        )
+    except ModelNotLoadedException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e.message)
+        )
+    
+    return {
+        "message": "Теневой прогон запущен",
+        "shadow": stats,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/shadow")
+async def get_shadow_stats():
+    """
+    Статистика теневого прогона
+    
+    - agreement_rate: доля совпадений статуса с основной моделью
+    - confidence: средняя уверенность и гистограмма (по 0.1) обеих моделей
+    - latency_ms: перцентили задержки кандидата и основной модели
+    - dropped: запросы, отброшенные при заполненной очереди
+    """
+    shadow = prediction_service.shadow
+    if shadow is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Теневой прогон не запущен"
+        )
+    
+    return {
+        "shadow": shadow.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.delete("/shadow")
+async def stop_shadow():
+    """Остановка теневого прогона (возвращает итоговую статистику)"""
+    stats = await asyncio.to_thread(prediction_service.stop_shadow)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Теневой прогон не запущен"
+        )
+    
+    return {
+        "message": "Теневой прогон остановлен",
+        "shadow": stats,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/profile", dependencies=[Depends(require_api_key)])
+async def profile(
+    seconds: float = Query(default=10, gt=0, le=120),
+    interval_ms: float = Query(default=5, ge=1, le=100),
+    format: Literal["collapsed", "top"] = "collapsed",
+    include_idle: bool = False
+):
+    """
+    Сэмплирующий профилировщик CPU внутри процесса
+    
+    Снимает стеки всех потоков (event loop, executor, теневой прогон)
+    в течение seconds секунд. collapsed - для flamegraph.pl/speedscope,
+    top - функции по числу сэмплов. Требует заголовок X-API-Key.
+    """
+    if not acquire_profiler():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Профилирование уже выполняется"
+        )
+    
+    profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+    try:
+        profiler.start()
+        # Event loop свободен: сэмплируются и запросы, пришедшие во время замера
+        await asyncio.sleep(seconds)
+        await asyncio.to_thread(profiler.stop)
+    finally:
+        # Клиент отключился - запрос отменён, поток сэмплирования тоже останавливается
+        profiler.stop()
+        release_profiler()
+    
+    logger.info(f"🔬 Профилирование: {profiler.samples} сэмплов за {profiler.duration:.1f} с")
+    
+    if format == "top":
+        return {
+            **profiler.summary(),
+            "functions": profiler.top(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"X-Profile-Samples": str(profiler.samples)}
+    )
+
 @router.get("/ping")
 async def ping():
     """Простая проверка доступности API"""
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+import msgpack
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, Response
+from typing import Any, List, Optional, Tuple
 
 from app.schemas.task import (
     TaskRequest,
@@ -15,11 +17,17 @@ from app.utils.exceptions import ModelNotLoadedException, PredictionException
 settings = get_settings()
 logger = setup_logger("api.prediction", settings.LOG_LEVEL)
 
-router = APIRouter(prefix="/predict", tags=["Prediction"])
+router = APIRouter(
+    prefix="/predict",
+    tags=["Prediction"],
+    default_response_class=ORJSONResponse
+)
 
 # Глобальный инстанс сервиса предсказаний
 prediction_service = PredictionService()
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
 @router.post("/", response_model=TaskResponse)
 async def predict_task(request: TaskRequest):
     """
@@ -28,12 +36,23 @@ async def predict_task(request: TaskRequest):
     - Использует комбинацию правил и нейросети
     - Возвращает название, приоритет, дедлайн, категорию и другие поля
     - Результаты кешируются для ускорения повторных запросов
+    - model_name/version выбирают версию из пула моделей
+    
+    Тело ответа берётся из кеша готовым (response_model - для документации).
     """
     try:
         logger.info(f"📝 Запрос предсказания: {request.text[:50]}...")
-        result = prediction_service.predict(request.text)
-        logger.info(f"✅ Предсказание выполнено: {result.name}")
-        return result
+        if request.model_name is not None:
+            # Версии нет в пуле - загрузка с диска не блокирует event loop
+            bundle = await prediction_service.select_bundle_async(
+                request.text, request.model_name, request.version
+            )
+        else:
+            # Основная модель или закреплённый в пуле вариант A/B
+            bundle = prediction_service.select_bundle(request.text)
+        body = prediction_service.predict_json(request.text, bundle=bundle)
+        logger.info("✅ Предсказание выполнено")
+        return Response(content=body, media_type="application/json")
         
     except ModelNotLoadedException as e:
         logger.error(f"❌ Модель не загружена: {e}")
@@ -65,19 +84,16 @@ async def predict_batch(request: BatchTaskRequest):
     """
     try:
         logger.info(f"📦 Пакетный запрос: {len(request.texts)} задач")
-        results = prediction_service.predict_batch(request.texts)
+        bundle = None
+        if request.model_name is not None and request.texts:
+            bundle = await prediction_service.select_bundle_async(
+                request.texts[0], request.model_name, request.version
+            )
+        body = prediction_service.predict_batch_json(request.texts, bundle=bundle)
         
-        successful = len(results)
-        failed = len(request.texts) - successful
+        logger.info(f"✅ Пакет обработан: {len(request.texts)} задач")
         
-        logger.info(f"✅ Обработано: {successful} успешно, {failed} неудачно")
-        
-        return BatchTaskResponse(
-            results=results,
-            total=len(request.texts),
-            successful=successful,
-            failed=failed
-        )
+        return Response(content=body, media_type="application/json")
         
     except ModelNotLoadedException as e:
         logger.error(f"❌ Модель не загружена: {e}")
@@ -91,3 +107,62 @@ async def predict_batch(request: BatchTaskRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка пакетной обработки: {str(e)}"
         )
+
+def _parse_binary_request(payload: Any) -> Tuple[List[str], Optional[str], Optional[str]]:
+    """Проверка тела бинарного запроса (те же ограничения, что у JSON API)"""
+    if not isinstance(payload, dict):
+        raise ValueError("ожидается map с ключом texts")
+    
+    texts = payload.get("texts")
+    if not isinstance(texts, list) or not 1 <= len(texts) <= settings.MAX_BATCH_SIZE:
+        raise ValueError(f"texts - список из 1..{settings.MAX_BATCH_SIZE} строк")
+    if not all(isinstance(text, str) for text in texts):
+        raise ValueError("texts должен содержать строки")
+    texts = [text.strip() for text in texts]
+    if not all(3 <= len(text) <= settings.MAX_TEXT_LENGTH for text in texts):
+        raise ValueError(f"длина текста - от 3 до {settings.MAX_TEXT_LENGTH} символов")
+    
+    model_name, version = payload.get("model_name"), payload.get("version")
+    if not all(value is None or isinstance(value, str) for value in (model_name, version)):
+        raise ValueError("model_name и version - строки")
+    return texts, model_name, version
+
+@router.post(
+    "/msgpack",
+    response_class=Response,
+    responses={200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+)
+async def predict_msgpack(request: Request):
+    """
+    Бинарный протокол для внутренних сервисов (MessagePack)
+    
+    Запрос: map {texts: [...], model_name?, version?}. Ответ - колоночный:
+    {index, name, description, ..., confidence, model_name, model_version,
+    total, successful, failed, processed_at}, где каждое поле - список по
+    успешно обработанным текстам, index - их позиции в texts.
+    Без JSON парсинга и pydantic валидации (scripts/benchmark_protocol.py).
+    """
+    try:
+        payload = msgpack.unpackb(await request.body(), raw=False)
+        texts, model_name, version = _parse_binary_request(payload)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Некорректный MessagePack запрос: {e}"
+        )
+    
+    try:
+        bundle = None
+        if model_name is not None:
+            bundle = await prediction_service.select_bundle_async(texts[0], model_name, version)
+        elif prediction_service.bundle is None and not prediction_service.get_routing():
+            raise ModelNotLoadedException("Модель не загружена")
+        columns = prediction_service.predict_columns(texts, bundle=bundle)
+    except ModelNotLoadedException as e:
+        logger.error(f"❌ Модель не загружена: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Модель не загружена"
+        )
+    
+    return Response(content=msgpack.packb(columns), media_type=MSGPACK_MEDIA_TYPE)
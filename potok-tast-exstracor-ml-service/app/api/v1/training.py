@@ -1,14 +1,23 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, status
-from typing import Dict, Any
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, status
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 
 from app.schemas.training import (
+    TrainingOptions,
     TrainingRequest,
+    TrainingFilesRequest,
+    SweepRequest,
+    DistillRequest,
     TrainingResponse,
     FineTuneRequest,
     TrainingProgress,
-    TrainingStatus
+    TrainingStatus,
+    TrainingJobInfo
 )
-from app.services.training_service import TrainingService
+from app.services.training_jobs import TrainingJobManager
+from app.core.streaming import resolve_shards
+from app.services.sweep_service import build_trials
 from app.utils.logger import setup_logger
 from app.config.settings import get_settings
 
@@ -17,18 +26,82 @@ logger = setup_logger("api.training", settings.LOG_LEVEL)
 
 router = APIRouter(prefix="/training", tags=["Training"])
 
-# Глобальный инстанс сервиса
-training_service = TrainingService()
+# Импорт prediction_service из модуля prediction
+from app.api.v1.prediction import prediction_service
+
+def _load_trained_model(result: Dict[str, Any]):
+    """Подхват обученной модели сервисом предсказаний без рестарта"""
+    if not settings.AUTO_LOAD_TRAINED_MODELS:
+        return
+    try:
+        prediction_service.load_model(
+            model_name=result['model_name'],
+            version=result['model_version']
+        )
+    except Exception as e:
+        logger.error(f"❌ Не удалось загрузить обученную модель: {e}")
+
+# Глобальный менеджер процессов обучения
+training_jobs = TrainingJobManager(on_completed=_load_trained_model)
+
+def _training_params(request: TrainingOptions) -> Dict[str, Any]:
+    """Общие параметры обучения для TrainingService.train_new_model"""
+    return {
+        "epochs": request.epochs,
+        "batch_size": request.batch_size,
+        "learning_rate": request.learning_rate,
+        "model_name": request.model_name,
+        "save_checkpoint": request.save_checkpoint,
+        "early_stopping_patience": request.early_stopping_patience,
+        "fast_mode": request.fast_mode,
+        "world_size": request.world_size,
+        "architecture": request.architecture,
+        "model_config": {
+            key: value
+            for key, value in (
+                ("embedding_dim", request.embedding_dim),
+                ("hidden_dim", request.hidden_dim),
+                ("pooling", request.pooling)
+            )
+            if value is not None
+        },
+        "tokenizer": request.tokenizer,
+        "vocab_min_freq": request.vocab_min_freq,
+        "vocab_max_size": request.vocab_max_size
+    }
+
+def _resolve_training_files(files: List[str]) -> List[str]:
+    """Шарды внутри TRAINING_DATA_DIR (пути за её пределами запрещены)"""
+    data_dir = Path(settings.TRAINING_DATA_DIR).resolve()
+    patterns = []
+    for name in files:
+        path = (data_dir / name).resolve()
+        if not path.is_relative_to(data_dir):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Путь {name} вне директории тренировочных данных"
+            )
+        patterns.append(str(path))
+    
+    try:
+        shards = resolve_shards(patterns)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
+    escaped = [shard for shard in shards if not Path(shard).resolve().is_relative_to(data_dir)]
+    if escaped:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Шарды вне директории тренировочных данных: {escaped}"
+        )
+    return shards
 
 @router.post("/train", response_model=TrainingResponse, status_code=status.HTTP_202_ACCEPTED)
-async def train_new_model(
-    request: TrainingRequest,
-    background_tasks: BackgroundTasks
-):
+async def train_new_model(request: TrainingRequest):
     """
     Обучение новой модели с нуля
     
-    - Запускается в фоновом режиме
+    - Ставится в очередь и запускается в отдельном процессе, не блокируя предсказания
     - Возвращает training_id для отслеживания прогресса
     - Минимум 10 примеров для обучения
     """
@@ -42,30 +115,68 @@ async def train_new_model(
             for ex in request.training_examples
         ]
         
-        # Запуск обучения в фоне
-        training_id = f"train_{len(examples)}_{request.epochs}"
-        
-        background_tasks.add_task(
-            training_service.train_new_model,
-            training_examples=examples,
-            epochs=request.epochs,
-            batch_size=request.batch_size,
-            learning_rate=request.learning_rate,
-            model_name=request.model_name,
-            save_checkpoint=request.save_checkpoint
+        # Запуск обучения в отдельном процессе
+        progress = training_jobs.submit(
+            "train",
+            {"training_examples": examples, **_training_params(request)},
+            total_epochs=request.epochs,
+            model_name=request.model_name
         )
+        training_id = progress.training_id
         
         logger.info(f"📚 Запущено обучение: {training_id}")
         
         return TrainingResponse(
             training_id=training_id,
-            status=TrainingStatus.PENDING,
-            message="Обучение запущено в фоновом режиме",
+            status=progress.status,
+            message="Обучение поставлено в очередь",
             model_name=request.model_name or settings.MODEL_NAME,
             total_examples=len(examples),
             epochs=request.epochs,
             estimated_duration_seconds=len(examples) * request.epochs // 10
         )
+    
+    except Exception as e:
+        logger.error(f"❌ Ошибка при запуске обучения: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка запуска обучения: {str(e)}"
+        )
+
+@router.post("/train-files", response_model=TrainingResponse, status_code=status.HTTP_202_ACCEPTED)
+async def train_from_files(request: TrainingFilesRequest):
+    """
+    Обучение новой модели по JSONL шардам из TRAINING_DATA_DIR
+    
+    - Примеры читаются потоком, объём данных не ограничен памятью и телом запроса
+    - Одна строка шарда - один пример {"text": ..., "labels": {...}}
+    - Число примеров становится известно после первого прохода (см. /status)
+    """
+    shards = _resolve_training_files(request.files)
+    
+    try:
+        progress = training_jobs.submit(
+            "train",
+            {
+                "data_files": shards,
+                "shuffle_buffer": request.shuffle_buffer,
+                **_training_params(request)
+            },
+            total_epochs=request.epochs,
+            model_name=request.model_name
+        )
+        training_id = progress.training_id
+        
+        logger.info(f"📚 Запущено обучение по {len(shards)} шардам: {training_id}")
+        
+        return TrainingResponse(
+            training_id=training_id,
+            status=progress.status,
+            message=f"Обучение по {len(shards)} шардам поставлено в очередь",
+            model_name=request.model_name or settings.MODEL_NAME,
+            total_examples=0,
+            epochs=request.epochs
+        )
         
     except Exception as e:
         logger.error(f"❌ Ошибка при запуске обучения: {e}")
@@ -74,17 +185,129 @@ async def train_new_model(
             detail=f"Ошибка запуска обучения: {str(e)}"
         )
 
+@router.post("/sweep", response_model=TrainingResponse, status_code=status.HTTP_202_ACCEPTED)
+async def run_sweep(request: SweepRequest):
+    """
+    Подбор гиперпараметров (learning_rate, batch_size, EMBEDDING_DIM, HIDDEN_DIM)
+    
+    - Данные токенизируются один раз, испытания идут параллельно в пределах бюджета CPU
+    - Отстающие испытания отсекаются по медианному правилу
+    - Лучшая модель регистрируется как новая версия; прогресс - по испытаниям
+    """
+    trials = build_trials(
+        {
+            "learning_rate": request.learning_rates,
+            "batch_size": request.batch_sizes,
+            "embedding_dim": request.embedding_dims,
+            "hidden_dim": request.hidden_dims
+        },
+        max_trials=request.max_trials
+    )
+    examples = [
+        {"text": ex.text, "labels": ex.labels.model_dump()}
+        for ex in request.training_examples
+    ]
+    
+    try:
+        progress = training_jobs.submit(
+            "sweep",
+            {
+                "training_examples": examples,
+                "trials": trials,
+                "epochs": request.epochs,
+                "model_name": request.model_name,
+                "max_parallel": request.max_parallel,
+                "cpu_budget": request.cpu_budget,
+                "prune_warmup_epochs": request.prune_warmup_epochs,
+                "tokenizer": request.tokenizer
+            },
+            total_epochs=len(trials),
+            model_name=request.model_name
+        )
+        
+        logger.info(f"🔬 Запущен подбор гиперпараметров ({len(trials)} испытаний): {progress.training_id}")
+        
+        return TrainingResponse(
+            training_id=progress.training_id,
+            status=progress.status,
+            message=f"Подбор гиперпараметров ({len(trials)} испытаний) поставлен в очередь",
+            model_name=request.model_name or settings.MODEL_NAME,
+            total_examples=len(examples),
+            epochs=request.epochs
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Ошибка при запуске подбора: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка запуска подбора: {str(e)}"
+        )
+
+@router.post("/distill", response_model=TrainingResponse, status_code=status.HTTP_202_ACCEPTED)
+async def distill_model(request: DistillRequest):
+    """
+    Дистилляция сохранённой модели в компактного ученика
+    
+    - Ученик (GRU или усреднённые эмбеддинги + MLP) учится на мягких метках учителя
+    - Сохраняется как отдельная модель с отчётом точность/латентность/память
+    """
+    teacher_name = request.teacher_model_name or settings.MODEL_NAME
+    model_name = request.model_name or f"{teacher_name}_{request.student_architecture}_student"
+    examples = [
+        {"text": ex.text, "labels": ex.labels.model_dump()}
+        for ex in request.training_examples
+    ]
+    
+    try:
+        progress = training_jobs.submit(
+            "distill",
+            {
+                "training_examples": examples,
+                "teacher_name": teacher_name,
+                "teacher_version": request.teacher_version,
+                "student_architecture": request.student_architecture,
+                "student_config": {
+                    "embedding_dim": request.embedding_dim,
+                    "hidden_dim": request.hidden_dim
+                },
+                "epochs": request.epochs,
+                "batch_size": request.batch_size,
+                "learning_rate": request.learning_rate,
+                "temperature": request.temperature,
+                "alpha": request.alpha,
+                "model_name": model_name
+            },
+            total_epochs=request.epochs,
+            model_name=model_name
+        )
+        
+        logger.info(f"🎓 Запущена дистилляция {teacher_name}: {progress.training_id}")
+        
+        return TrainingResponse(
+            training_id=progress.training_id,
+            status=progress.status,
+            message="Дистилляция поставлена в очередь",
+            model_name=model_name,
+            total_examples=len(examples),
+            epochs=request.epochs
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Ошибка при запуске дистилляции: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка запуска дистилляции: {str(e)}"
+        )
+
 @router.post("/fine-tune", response_model=TrainingResponse, status_code=status.HTTP_202_ACCEPTED)
-async def fine_tune_model(
-    request: FineTuneRequest,
-    background_tasks: BackgroundTasks
-):
+async def fine_tune_model(request: FineTuneRequest):
     """
     Дообучение существующей модели на новых данных
     
     - Использует уже обученную модель как базу
     - Требует минимум 5 новых примеров
     - Может заморозить эмбеддинги для ускорения
+    - Новые слова расширяют словарь и матрицу эмбеддингов без полного переобучения
     """
     try:
         examples = [
@@ -95,25 +318,30 @@ async def fine_tune_model(
             for ex in request.training_examples
         ]
         
-        training_id = f"finetune_{len(examples)}_{request.epochs}"
-        
-        background_tasks.add_task(
-            training_service.fine_tune_model,
-            model_name=settings.MODEL_NAME,
-            model_version=request.model_version,
-            training_examples=examples,
-            epochs=request.epochs,
-            batch_size=request.batch_size,
-            learning_rate=request.learning_rate,
-            freeze_embedding=request.freeze_embedding
+        progress = training_jobs.submit(
+            "fine_tune",
+            {
+                "model_name": settings.MODEL_NAME,
+                "model_version": request.model_version,
+                "training_examples": examples,
+                "epochs": request.epochs,
+                "batch_size": request.batch_size,
+                "learning_rate": request.learning_rate,
+                "freeze_embedding": request.freeze_embedding,
+                "train_new_embeddings": request.train_new_embeddings,
+                "pooling": request.pooling
+            },
+            total_epochs=request.epochs,
+            model_name=f"{settings.MODEL_NAME}_finetuned"
         )
+        training_id = progress.training_id
         
         logger.info(f"🔄 Запущено дообучение: {training_id}")
         
         return TrainingResponse(
             training_id=training_id,
-            status=TrainingStatus.PENDING,
-            message="Дообучение запущено в фоновом режиме",
+            status=progress.status,
+            message="Дообучение поставлено в очередь",
             model_name=f"{settings.MODEL_NAME}_finetuned",
             total_examples=len(examples),
             epochs=request.epochs,
@@ -129,13 +357,65 @@ async def fine_tune_model(
 
 @router.get("/status/{training_id}", response_model=TrainingProgress)
 async def get_training_status(training_id: str):
-    """Получение статуса текущего обучения"""
-    progress = training_service.get_training_progress(training_id)
+    """Получение статуса обучения"""
+    progress = training_jobs.get_progress(training_id)
     
     if not progress:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Обучение {training_id} не найдено или завершено"
+            detail=f"Обучение {training_id} не найдено"
         )
     
     return progress
+
+@router.get("/jobs", response_model=List[TrainingJobInfo])
+async def list_training_jobs(
+    limit: int = Query(default=50, ge=1, le=500),
+    job_status: Optional[TrainingStatus] = Query(default=None, alias="status")
+):
+    """История и очередь обучений (новые первыми)"""
+    return training_jobs.list_jobs(
+        limit=limit,
+        status=job_status.value if job_status else None
+    )
+
+@router.get("/jobs/{training_id}", response_model=TrainingJobInfo)
+async def get_training_job(training_id: str):
+    """Информация о задании обучения, включая позицию в очереди"""
+    job = training_jobs.get_job(training_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Обучение {training_id} не найдено"
+        )
+    
+    return job
+
+@router.post("/jobs/{training_id}/cancel")
+async def cancel_training_job(training_id: str):
+    """
+    Отмена обучения
+    
+    - Задание из очереди удаляется до запуска
+    - Выполняющееся обучение прерывается (процесс завершается)
+    """
+    final_status = await asyncio.to_thread(training_jobs.cancel, training_id)
+    
+    if final_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Обучение {training_id} не найдено"
+        )
+    
+    if final_status != TrainingStatus.CANCELLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Обучение {training_id} уже завершено со статусом {final_status.value}"
+        )
+    
+    return {
+        "message": "Обучение отменено",
+        "training_id": training_id,
+        "status": final_status
+    }
@@ -19,22 +19,57 @@ class Settings(BaseSettings):
     MODEL_DIR: str = "./data/models"
     TRAINING_DATA_DIR: str = "./data/training"
     LOG_DIR: str = "./data/logs"
+    DATASET_CACHE_DIR: Optional[str] = None  # .npy кеш закодированных текстов
+    TRAINING_JOBS_DIR: str = "./data/training_jobs"  # очередь и история обучений
+    CHECKPOINT_DIR: str = "./data/checkpoints"
     
     # Модель
     DEVICE: str = "cpu"
     MODEL_NAME: str = "task_extraction_model"
+    MODEL_ARCHITECTURE: str = "status_net"  # status_net, gru, pooled, fasttext, textcnn
     EMBEDDING_DIM: int = 100
     HIDDEN_DIM: int = 128
+    STATUSNET_POOLING: str = "mean"  # last (исходный режим), mean, attention
     DROPOUT: float = 0.3
+    WEIGHTS_FORMAT: str = "pth"       # pth (torch.save) или mmap (model.weights, загрузка через mmap)
+    WEIGHTS_FP16: bool = False        # хранить веса mmap в float16
     NUM_HEADS: int = 4
     NUM_LAYERS: int = 2
     
+    # Токенизация
+    TOKENIZER: str = "vocab"          # vocab или hashing
+    HASH_BUCKETS: int = 20000
+    HASH_NGRAM_MIN: int = 3           # 0 - без символьных n-грамм
+    HASH_NGRAM_MAX: int = 3
+    VOCAB_MIN_FREQ: int = 1           # слова реже порога кодируются как <UNK>
+    VOCAB_MAX_SIZE: Optional[int] = None
+    VOCAB_NORMALIZE: bool = False     # удалять пунктуацию при токенизации
+    
     # Обучение
     DEFAULT_LEARNING_RATE: float = 0.001
     DEFAULT_EPOCHS: int = 30
     DEFAULT_BATCH_SIZE: int = 32
     MAX_TITLE_LEN: int = 55
     MAX_TEXT_LEN: int = 200
+    EARLY_STOPPING_PATIENCE: int = 5  # эпох без улучшения val loss (0 - отключено)
+    EARLY_STOPPING_MIN_DELTA: float = 0.001
+    CHECKPOINT_EVERY_EPOCHS: int = 1
+    MAX_CONCURRENT_TRAININGS: int = 1
+    TRAINING_NUM_THREADS: int = 0     # потоки torch в процессе обучения (0 - половина ядер)
+    AUTO_LOAD_TRAINED_MODELS: bool = True  # загружать модель для предсказаний после обучения
+    MODEL_SWAP_DRAIN_TIMEOUT: float = 30.0  # секунд ожидания запросов старой версии при подмене
+    MODEL_POOL_SIZE: int = 4          # дополнительных версий в памяти (выбор в запросе, A/B)
+    MODEL_POOL_MEMORY_MB: float = 2048  # бюджет весов пула (0 - без ограничения)
+    SHADOW_SAMPLE_RATE: float = 0.1   # доля запросов для теневого прогона кандидата
+    SHADOW_QUEUE_SIZE: int = 256      # очередь теневого прогона (при заполнении запросы отбрасываются)
+    FAST_TRAINING: bool = False       # bfloat16 autocast и torch.compile при обучении
+    DATALOADER_NUM_WORKERS: int = 0   # процессы подготовки батчей (0 - в процессе обучения)
+    DATALOADER_PREFETCH_FACTOR: int = 2
+    DATALOADER_PERSISTENT_WORKERS: bool = True
+    STREAM_SHUFFLE_BUFFER: int = 10000  # примеров в буфере перемешивания JSONL шардов
+    TRAINING_WORLD_SIZE: int = 1      # локальных процессов DDP (gloo) на одно обучение
+    SWEEP_MAX_PARALLEL: int = 2       # испытаний подбора гиперпараметров одновременно
+    SWEEP_PRUNE_WARMUP_EPOCHS: int = 2  # эпох до медианного отсечения испытаний
     
     # Лимиты API
     MAX_BATCH_SIZE: int = 100
@@ -57,6 +92,7 @@ class Settings(BaseSettings):
     
     # Мониторинг
     ENABLE_METRICS: bool = True
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None  # общая директория метрик воркеров
     ENABLE_TRACING: bool = False
     
     # Логирование
@@ -1,11 +1,25 @@
+import hashlib
+import os
+import numpy as np
 import torch
-from torch.utils.data import Dataset
-from typing import List, Dict
+from torch.utils.data import (
+    BatchSampler,
+    DataLoader,
+    Dataset,
+    DistributedSampler,
+    RandomSampler,
+    SequentialSampler
+)
+from typing import List, Dict, Union
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
 
+from app.config.settings import get_settings
 from app.core.vocabulary import Vocabulary
 
+settings = get_settings()
+
 @dataclass
 class TaskInfo:
     """Информация о задаче"""
@@ -26,38 +40,194 @@ class TrainingData:
     labels: TaskInfo
 
 class TaskDataset(Dataset):
-    """Dataset для обучения модели"""
+    """
+    Dataset для обучения модели
+    
+    Тексты кодируются один раз при создании в непрерывные тензоры,
+    батчи отдаются срезами по списку индексов (см. create_batch_loader).
+    """
+    
+    # Логиты модели-учителя для дистилляции (см. with_soft_targets)
+    soft_targets: Optional[torch.Tensor] = None
     
     def __init__(
         self,
         texts: List[str],
         labels: List[TaskInfo],
         vocab: Vocabulary,
-        encoders: Dict
+        encoders: Dict,
+        max_len: int = 200,
+        cache_dir: Optional[str] = None
     ):
+        """
+        Args:
+            texts: Тексты задач
+            labels: Разметка
+            vocab: Словарь
+            encoders: Энкодеры меток
+            max_len: Длина закодированной последовательности
+            cache_dir: Директория для .npy кеша закодированных текстов
+        """
         self.texts = texts
         self.labels = labels
         self.vocab = vocab
         self.encoders = encoders
+        self.max_len = max_len
+        
+        self.text_ids = self._encode_texts(texts, cache_dir)
+        self.statuses = torch.tensor(
+            [encoders['status'].encode(label.status) for label in labels],
+            dtype=torch.long
+        )
+    
+    @classmethod
+    def from_tensors(cls, text_ids: torch.Tensor, statuses: torch.Tensor) -> "TaskDataset":
+        """Датасет поверх уже закодированных тензоров (например, разделяемых между процессами)"""
+        dataset = cls.__new__(cls)
+        dataset.texts = []
+        dataset.labels = []
+        dataset.vocab = None
+        dataset.encoders = None
+        dataset.max_len = text_ids.shape[1]
+        dataset.text_ids = text_ids
+        dataset.statuses = statuses
+        return dataset
     
     def __len__(self):
-        return len(self.texts)
+        return len(self.statuses)
+    
+    def __getitem__(self, idx: Union[int, List[int], torch.Tensor]):
+        # idx - индекс примера или список индексов целого батча
+        if isinstance(idx, list):
+            idx = torch.as_tensor(idx, dtype=torch.long)
+        
+        batch = {
+            'text': self.text_ids[idx],
+            'status': self.statuses[idx]
+        }
+        if self.soft_targets is not None:
+            batch['soft_target'] = self.soft_targets[idx]
+        return batch
+    
+    def with_soft_targets(self, soft_targets: torch.Tensor) -> "TaskDataset":
+        """Добавление к примерам логитов учителя (num_examples, num_classes)"""
+        if len(soft_targets) != len(self):
+            raise ValueError("Число логитов учителя не совпадает с числом примеров")
+        self.soft_targets = soft_targets
+        return self
     
-    def __getitem__(self, idx):
-        text = self.texts[idx]
-        label = self.labels[idx]
+    def share_memory(self) -> "TaskDataset":
+        """
+        Перенос тензоров в разделяемую память
         
-        # Кодирование текста
-        encoded_text = torch.tensor(
-            self.vocab.encode(text),
+        Процессы-воркеры DataLoader читают данные без копирования.
+        """
+        self.text_ids.share_memory_()
+        self.statuses.share_memory_()
+        if self.soft_targets is not None:
+            self.soft_targets.share_memory_()
+        return self
+    
+    def _encode_texts(self, texts: List[str], cache_dir: Optional[str]) -> torch.Tensor:
+        """Кодирование всех текстов в тензор (num_texts, max_len)"""
+        cache_file = None
+        if cache_dir:
+            cache_file = Path(cache_dir) / f"text_ids_{self._cache_key(texts)}.npy"
+            if cache_file.exists():
+                # copy-on-write: страницы читаются с диска лениво и делятся между процессами
+                return torch.from_numpy(np.load(cache_file, mmap_mode='c'))
+        
+        text_ids = torch.tensor(
+            [self.vocab.encode(text, max_len=self.max_len) for text in texts],
             dtype=torch.long
-        )
+        ).reshape(len(texts), self.max_len)
         
-        # Кодирование статуса
-        status_encoded = self.encoders['status'].encode(label.status)
-        status = torch.tensor(status_encoded, dtype=torch.long)
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+            with open(tmp_file, 'wb') as f:
+                np.save(f, text_ids.numpy())
+            os.replace(tmp_file, cache_file)
         
-        return {
-            'text': encoded_text,
-            'status': status
+        return text_ids
+    
+    def _cache_key(self, texts: List[str]) -> str:
+        """Ключ кеша: словарь + длина последовательности + содержимое текстов"""
+        digest = hashlib.sha1()
+        digest.update(f"{self.vocab.fingerprint()}:{self.max_len}".encode('utf-8'))
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+def collate_batch(batch: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """
+    Collate для батчей, уже собранных датасетом
+    
+    Срезы тензоров не требуют default_convert с рекурсивным обходом.
+    """
+    return batch
+
+def create_batch_loader(
+    dataset: Dataset,
+    batch_size: int,
+    shuffle: bool,
+    num_workers: Optional[int] = None,
+    prefetch_factor: Optional[int] = None,
+    persistent_workers: Optional[bool] = None,
+    pin_memory: bool = False,
+    distributed: bool = False
+) -> DataLoader:
+    """
+    DataLoader, выдающий батчи срезами тензоров датасета
+    
+    Индексы батча передаются в датасет одним списком, поэтому
+    поэлементная сборка и collate не выполняются. При num_workers > 0
+    батчи готовятся в процессах-воркерах параллельно с обучением.
+    
+    Args:
+        dataset: TaskDataset или его Subset
+        batch_size: Размер батча
+        shuffle: Перемешивать ли примеры каждую эпоху
+        num_workers: Процессы подготовки батчей (по умолчанию из настроек)
+        prefetch_factor: Батчей в очереди на каждый воркер
+        persistent_workers: Не перезапускать воркеры между эпохами
+        pin_memory: Page-locked память для быстрого копирования на GPU
+        distributed: Каждый ранг torch.distributed получает свою часть примеров
+            (перед эпохой вызывается set_loader_epoch)
+    """
+    if num_workers is None:
+        num_workers = settings.DATALOADER_NUM_WORKERS
+    
+    worker_options = {}
+    if num_workers > 0:
+        base_dataset = getattr(dataset, 'dataset', dataset)
+        if isinstance(base_dataset, TaskDataset):
+            base_dataset.share_memory()
+        worker_options = {
+            "prefetch_factor": prefetch_factor or settings.DATALOADER_PREFETCH_FACTOR,
+            "persistent_workers": (
+                settings.DATALOADER_PERSISTENT_WORKERS
+                if persistent_workers is None else persistent_workers
+            )
         }
+    
+    if distributed:
+        sampler = DistributedSampler(dataset, shuffle=shuffle)
+    else:
+        sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(
+        dataset,
+        sampler=BatchSampler(sampler, batch_size=batch_size, drop_last=False),
+        batch_size=None,
+        collate_fn=collate_batch,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        **worker_options
+    )
+
+def set_loader_epoch(loader: DataLoader, epoch: int):
+    """Эпоха для перемешивания DistributedSampler (у остальных загрузчиков не требуется)"""
+    sampler = getattr(loader.sampler, 'sampler', None)
+    if isinstance(sampler, DistributedSampler):
+        sampler.set_epoch(epoch)
@@ -1,8 +1,77 @@
+import inspect
+from typing import Any, Dict, Optional, Sequence, Type
+
 import torch
 import torch.nn as nn
 
-class StatusNet(nn.Module):
-    """Нейронная сеть для классификации статуса задач"""
+class TextClassifier(nn.Module):
+    """
+    Базовый класс моделей статуса
+    
+    Модель описывается именем архитектуры и конфигурацией конструктора -
+    по ним ModelManager восстанавливает её при загрузке.
+    """
+    
+    architecture = ""
+    
+    def get_config(self) -> Dict[str, Any]:
+        """Архитектура и гиперпараметры (без vocab_size и num_statuses)"""
+        raise NotImplementedError
+    
+    def grow_embedding(self, vocab_size: int) -> int:
+        """
+        Расширение матрицы эмбеддингов под выросший словарь
+        
+        Существующие строки копируются без изменений, новые инициализируются
+        средним эмбеддингом словаря (без <PAD>) с небольшим шумом - так новое
+        слово стартует как "типичное", а не как случайный выброс.
+        
+        Args:
+            vocab_size: Новый размер словаря
+            
+        Returns:
+            Число добавленных строк
+        """
+        old_weight = self.embedding.weight.data
+        old_size, embedding_dim = old_weight.shape
+        added = vocab_size - old_size
+        if added <= 0:
+            return 0
+        
+        mean = old_weight[1:].mean(dim=0)
+        std = old_weight[1:].std(dim=0).mean() * 0.1
+        new_rows = mean + torch.randn(added, embedding_dim, device=old_weight.device) * std
+        
+        self.embedding = nn.Embedding.from_pretrained(
+            torch.cat([old_weight, new_rows.to(old_weight.dtype)]),
+            freeze=not self.embedding.weight.requires_grad,
+            padding_idx=0
+        )
+        return added
+
+def masked_mean(embedded: torch.Tensor, text_ids: torch.Tensor) -> torch.Tensor:
+    """Среднее по непустым (не <PAD>) позициям последовательности"""
+    mask = (text_ids != 0).unsqueeze(-1).to(embedded.dtype)
+    return (embedded * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+
+def sequence_lengths(text_ids: torch.Tensor) -> torch.Tensor:
+    """Длины текстов до паддинга (не меньше 1 - для пустых текстов)"""
+    return (text_ids != 0).sum(dim=1).clamp(min=1)
+
+class StatusNet(TextClassifier):
+    """
+    Нейронная сеть для классификации статуса задач
+    
+    pooling определяет, как последовательность сводится к вектору:
+    - "last" - выход LSTM на последней позиции дополненной последовательности
+      (исходное поведение, с ним обучены модели без pooling в model_config);
+    - "mean" - packed последовательности и среднее по реальным токенам;
+    - "attention" - то же, но поверх self-attention с маской паддинга.
+    Веса у всех режимов одинаковые, режим можно сменить дообучением.
+    """
+    
+    architecture = "status_net"
+    POOLING_MODES = ("last", "mean", "attention")
     
     def __init__(
         self,
@@ -12,9 +81,11 @@ class StatusNet(nn.Module):
         num_statuses: int = 7,
         num_layers: int = 2,
         num_heads: int = 4,
-        dropout: float = 0.3
+        dropout: float = 0.3,
+        pooling: str = "last"
     ):
         super(StatusNet, self).__init__()
+        self.set_pooling(pooling)
         
         # Embedding layer
         self.embedding = nn.Embedding(
@@ -60,31 +131,255 @@ class StatusNet(nn.Module):
             nn.Linear(64, num_statuses)
         )
     
-    def forward(self, text_ids):
+    def set_pooling(self, pooling: str):
+        """Смена режима pooling (параметры модели не меняются)"""
+        if pooling not in self.POOLING_MODES:
+            raise ValueError(
+                f"Неизвестный pooling: {pooling} (доступны: {', '.join(self.POOLING_MODES)})"
+            )
+        self.pooling = pooling
+    
+    def forward(self, text_ids, lengths: Optional[torch.Tensor] = None):
         """
         Forward pass
         
         Args:
             text_ids: Tensor of shape (batch_size, seq_len)
+            lengths: Длины текстов без паддинга (по умолчанию - по ненулевым индексам)
             
         Returns:
             Logits of shape (batch_size, num_statuses)
         """
-        # Embedding
-        embedded = self.embedding(text_ids)  # (batch, seq_len, emb_dim)
-        embedded = self.layer_norm1(embedded)
-        
-        # LSTM
-        lstm_out, _ = self.lstm(embedded)  # (batch, seq_len, hidden*2)
-        lstm_out = self.layer_norm2(lstm_out)
+        if self.pooling == "last":
+            # Embedding
+            embedded = self.embedding(text_ids)  # (batch, seq_len, emb_dim)
+            embedded = self.layer_norm1(embedded)
+            
+            # LSTM
+            lstm_out, _ = self.lstm(embedded)  # (batch, seq_len, hidden*2)
+            lstm_out = self.layer_norm2(lstm_out)
+            
+            # Use last hidden state (выход attention в этом режиме не использовался)
+            last_hidden = lstm_out[:, -1, :]  # (batch, hidden*2)
+            
+            # Classification
+            return self.status_head(last_hidden)  # (batch, num_statuses)
         
-        # Self-attention
-        attn_out, _ = self.attention(lstm_out, lstm_out, lstm_out)
+        if lengths is None:
+            lengths = sequence_lengths(text_ids)
+        lengths = lengths.cpu()
+        # Паддинг после самого длинного текста батча не обрабатывается вовсе
+        text_ids = text_ids[:, :int(lengths.max())]
         
-        # Use last hidden state
-        last_hidden = lstm_out[:, -1, :]  # (batch, hidden*2)
+        embedded = self.layer_norm1(self.embedding(text_ids))
+        if bool((lengths == lengths[0]).all()):
+            # Одинаковые длины (в том числе один текст) - упаковка не нужна
+            lstm_out, _ = self.lstm(embedded)
+        else:
+            packed = nn.utils.rnn.pack_padded_sequence(
+                embedded, lengths, batch_first=True, enforce_sorted=False
+            )
+            packed_out, _ = self.lstm(packed)
+            lstm_out, _ = nn.utils.rnn.pad_packed_sequence(
+                packed_out, batch_first=True, total_length=text_ids.shape[1]
+            )
+        lstm_out = self.layer_norm2(lstm_out)  # (batch, max_len, hidden*2)
         
-        # Classification
-        logits = self.status_head(last_hidden)  # (batch, num_statuses)
+        mask = torch.arange(text_ids.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)
+        mask = mask.to(lstm_out.device)
+        if self.pooling == "attention":
+            lstm_out, _ = self.attention(
+                lstm_out, lstm_out, lstm_out, key_padding_mask=~mask
+            )
         
-        return logits
+        mask = mask.unsqueeze(-1).to(lstm_out.dtype)
+        pooled = (lstm_out * mask).sum(dim=1) / mask.sum(dim=1)
+        return self.status_head(pooled)
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "architecture": self.architecture,
+            "embedding_dim": self.embedding.embedding_dim,
+            "hidden_dim": self.lstm.hidden_size,
+            "num_layers": self.lstm.num_layers,
+            "num_heads": self.attention.num_heads,
+            "pooling": self.pooling
+        }
+
+class GRUStatusNet(TextClassifier):
+    """Компактная модель: однослойный GRU с усреднением по токенам текста"""
+    
+    architecture = "gru"
+    
+    def __init__(
+        self,
+        vocab_size: int,
+        embedding_dim: int = 64,
+        hidden_dim: int = 64,
+        num_statuses: int = 7,
+        dropout: float = 0.2
+    ):
+        super().__init__()
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
+        self.gru = nn.GRU(embedding_dim, hidden_dim, batch_first=True)
+        self.dropout = nn.Dropout(dropout)
+        self.status_head = nn.Linear(hidden_dim, num_statuses)
+    
+    def forward(self, text_ids):
+        embedded = self.embedding(text_ids)  # (batch, seq_len, emb_dim)
+        gru_out, _ = self.gru(embedded)  # (batch, seq_len, hidden)
+        pooled = masked_mean(gru_out, text_ids)
+        return self.status_head(self.dropout(pooled))
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "architecture": self.architecture,
+            "embedding_dim": self.embedding.embedding_dim,
+            "hidden_dim": self.gru.hidden_size
+        }
+
+class PooledStatusNet(TextClassifier):
+    """Самая лёгкая модель: усреднённые эмбеддинги и MLP"""
+    
+    architecture = "pooled"
+    
+    def __init__(
+        self,
+        vocab_size: int,
+        embedding_dim: int = 64,
+        hidden_dim: int = 64,
+        num_statuses: int = 7,
+        dropout: float = 0.2
+    ):
+        super().__init__()
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
+        self.status_head = nn.Sequential(
+            nn.Linear(embedding_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim, num_statuses)
+        )
+    
+    def forward(self, text_ids):
+        pooled = masked_mean(self.embedding(text_ids), text_ids)  # (batch, emb_dim)
+        return self.status_head(pooled)
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "architecture": self.architecture,
+            "embedding_dim": self.embedding.embedding_dim,
+            "hidden_dim": self.status_head[0].out_features
+        }
+
+class FastTextNet(TextClassifier):
+    """
+    Классификатор в стиле fastText: среднее эмбеддингов и линейный слой
+    
+    Лучше всего работает с tokenizer=hashing, где в последовательность
+    попадают и символьные n-граммы слов.
+    """
+    
+    architecture = "fasttext"
+    
+    def __init__(
+        self,
+        vocab_size: int,
+        embedding_dim: int = 64,
+        num_statuses: int = 7,
+        dropout: float = 0.1
+    ):
+        super().__init__()
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
+        self.dropout = nn.Dropout(dropout)
+        self.status_head = nn.Linear(embedding_dim, num_statuses)
+    
+    def forward(self, text_ids):
+        pooled = masked_mean(self.embedding(text_ids), text_ids)  # (batch, emb_dim)
+        return self.status_head(self.dropout(pooled))
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "architecture": self.architecture,
+            "embedding_dim": self.embedding.embedding_dim
+        }
+
+class TextCNN(TextClassifier):
+    """1D-CNN: свёртки нескольких ширин и max-pooling по времени"""
+    
+    architecture = "textcnn"
+    
+    def __init__(
+        self,
+        vocab_size: int,
+        embedding_dim: int = 64,
+        hidden_dim: int = 64,
+        num_statuses: int = 7,
+        kernel_sizes: Sequence[int] = (2, 3, 4),
+        dropout: float = 0.3
+    ):
+        """hidden_dim - число фильтров на каждую ширину свёртки"""
+        super().__init__()
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=0)
+        self.convs = nn.ModuleList(
+            nn.Conv1d(embedding_dim, hidden_dim, kernel_size, padding=kernel_size // 2)
+            for kernel_size in kernel_sizes
+        )
+        self.dropout = nn.Dropout(dropout)
+        self.status_head = nn.Linear(hidden_dim * len(kernel_sizes), num_statuses)
+    
+    def forward(self, text_ids):
+        embedded = self.embedding(text_ids).transpose(1, 2)  # (batch, emb_dim, seq_len)
+        lengths = (text_ids != 0).sum(dim=1, keepdim=True)  # (batch, 1)
+        pooled = []
+        for conv in self.convs:
+            features = torch.relu(conv(embedded))
+            # Позиции <PAD> в max-pooling не участвуют: остаются окна, которые есть
+            # и у текста без паддинга (как pooling по маске у остальных моделей)
+            kernel_size, padding = conv.kernel_size[0], conv.padding[0]
+            positions = torch.arange(features.size(2), device=text_ids.device)
+            valid = positions < lengths + 2 * padding - kernel_size + 1  # (batch, out_len)
+            pooled.append(
+                features.masked_fill(~valid.unsqueeze(1), float('-inf')).amax(dim=2).clamp(min=0)
+            )
+        return self.status_head(self.dropout(torch.cat(pooled, dim=1)))
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "architecture": self.architecture,
+            "embedding_dim": self.embedding.embedding_dim,
+            "hidden_dim": self.convs[0].out_channels,
+            "kernel_sizes": [conv.kernel_size[0] for conv in self.convs]
+        }
+
+MODEL_ARCHITECTURES: Dict[str, Type[TextClassifier]] = {
+    StatusNet.architecture: StatusNet,
+    GRUStatusNet.architecture: GRUStatusNet,
+    PooledStatusNet.architecture: PooledStatusNet,
+    FastTextNet.architecture: FastTextNet,
+    TextCNN.architecture: TextCNN
+}
+
+def build_model(
+    architecture: str,
+    vocab_size: int,
+    num_statuses: int,
+    **config: Any
+) -> TextClassifier:
+    """
+    Создание модели по имени архитектуры
+    
+    Args:
+        architecture: Ключ MODEL_ARCHITECTURES
+        vocab_size: Размер словаря
+        num_statuses: Число классов статуса
+        **config: Гиперпараметры конструктора (get_config без "architecture")
+    """
+    if architecture not in MODEL_ARCHITECTURES:
+        raise ValueError(
+            f"Неизвестная архитектура: {architecture} (доступны: {', '.join(MODEL_ARCHITECTURES)})"
+        )
+    model_cls = MODEL_ARCHITECTURES[architecture]
+    unknown = set(config) - set(inspect.signature(model_cls.__init__).parameters)
+    if unknown:
+        raise ValueError(f"Параметры {sorted(unknown)} не поддерживаются архитектурой {architecture}")
+    return model_cls(vocab_size=vocab_size, num_statuses=num_statuses, **config)
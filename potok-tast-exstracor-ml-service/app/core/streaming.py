@@ -0,0 +1,235 @@
+import glob
+import json
+import random
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import torch
+import torch.distributed as dist
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+
+from app.core.dataset import collate_batch
+from app.core.vocabulary import HashingVocabulary, LabelEncoder, Vocabulary
+
+def resolve_shards(patterns: List[str]) -> List[str]:
+    """
+    Список JSONL шардов по путям, директориям и glob-шаблонам
+    
+    Директория раскрывается во все *.jsonl внутри неё. Порядок стабилен,
+    чтобы разбиение по воркерам не менялось между эпохами.
+    """
+    shards = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            shards.extend(str(p) for p in sorted(path.glob("*.jsonl")))
+        elif glob.has_magic(pattern):
+            shards.extend(sorted(glob.glob(pattern)))
+        else:
+            shards.append(pattern)
+    
+    missing = [shard for shard in shards if not Path(shard).is_file()]
+    if missing:
+        raise FileNotFoundError(f"Шарды не найдены: {missing}")
+    if not shards:
+        raise FileNotFoundError(f"По шаблонам {patterns} не найдено ни одного шарда")
+    return shards
+
+def iter_jsonl_examples(
+    shards: List[str],
+    worker_id: int = 0,
+    num_workers: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    Построчное чтение примеров из шардов
+    
+    При нескольких воркерах каждый читает свою часть: целые шарды,
+    если их хватает на всех, иначе каждую num_workers-ю строку.
+    """
+    split_files = len(shards) >= num_workers
+    own_shards = shards[worker_id::num_workers] if split_files else shards
+    
+    line_no = 0
+    for shard in own_shards:
+        with open(shard, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                line_no += 1
+                if not split_files and (line_no - 1) % num_workers != worker_id:
+                    continue
+                yield json.loads(line)
+
+def is_validation_example(text: str, val_fraction: float) -> bool:
+    """Детерминированный holdout по хешу текста - без списка индексов в памяти"""
+    return (zlib.crc32(text.encode('utf-8')) % 10_000) < val_fraction * 10_000
+
+@dataclass
+class ShardStats:
+    """Результат первого прохода по шардам"""
+    train_examples: int = 0
+    val_examples: int = 0
+    statuses: set = field(default_factory=set)
+
+def scan_shards(
+    shards: List[str],
+    vocab: Optional[Union[Vocabulary, HashingVocabulary]],
+    val_fraction: float
+) -> ShardStats:
+    """
+    Первый проход: построение словаря, сбор меток и подсчёт примеров
+    
+    В памяти остаются только счётчики слов, сами примеры не хранятся.
+    Если vocab не передан (возобновление из чекпоинта), только подсчёт.
+    """
+    stats = ShardStats()
+    
+    def texts() -> Iterator[str]:
+        for example in iter_jsonl_examples(shards):
+            stats.statuses.add(example['labels']['status'])
+            if is_validation_example(example['text'], val_fraction):
+                stats.val_examples += 1
+            else:
+                stats.train_examples += 1
+            yield example['text']
+    
+    if vocab is not None:
+        vocab.build_from_texts(texts())
+    else:
+        for _ in texts():
+            pass
+    return stats
+
+def encoders_from_stats(stats: ShardStats) -> Dict[str, LabelEncoder]:
+    """Энкодеры меток по результатам первого прохода"""
+    status_encoder = LabelEncoder()
+    status_encoder.fit(list(stats.statuses))
+    return {'status': status_encoder}
+
+class StreamingTaskDataset(IterableDataset):
+    """
+    Поток батчей из JSONL шардов с постоянным потреблением памяти
+    
+    Примеры перемешиваются в буфере фиксированного размера и собираются
+    в батчи уже закодированными тензорами. Seed зависит от номера прохода,
+    поэтому каждая эпоха видит данные в новом порядке. При распределённом
+    обучении шарды делятся между всеми воркерами всех рангов.
+    """
+    
+    def __init__(
+        self,
+        shards: List[str],
+        vocab: Union[Vocabulary, HashingVocabulary],
+        encoders: Dict[str, LabelEncoder],
+        batch_size: int,
+        max_len: int = 200,
+        split: str = "train",
+        val_fraction: float = 0.1,
+        shuffle_buffer: int = 10_000,
+        seed: int = 0
+    ):
+        """
+        Args:
+            shards: JSONL файлы, по примеру {"text", "labels"} в строке
+            vocab: Словарь
+            encoders: Энкодеры меток
+            batch_size: Размер батча
+            max_len: Длина закодированной последовательности
+            split: "train" или "val" (см. is_validation_example)
+            val_fraction: Доля примеров в валидации
+            shuffle_buffer: Размер буфера перемешивания (0 - без перемешивания)
+            seed: Базовый seed перемешивания
+        """
+        self.shards = shards
+        self.vocab = vocab
+        self.encoders = encoders
+        self.batch_size = batch_size
+        self.max_len = max_len
+        self.split = split
+        self.val_fraction = val_fraction
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self._passes = 0
+        # Ранг фиксируется при создании: в воркерах DataLoader группа недоступна
+        distributed = dist.is_available() and dist.is_initialized()
+        self.rank = dist.get_rank() if distributed else 0
+        self.world_size = dist.get_world_size() if distributed else 1
+    
+    def __iter__(self) -> Iterator[Dict[str, torch.Tensor]]:
+        worker = get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker else (0, 1)
+        part = self.rank * num_workers + worker_id
+        parts = self.world_size * num_workers
+        # Счётчик проходов ведёт каждая копия датасета, в том числе в воркере
+        rng = random.Random(hash((self.seed, self._passes, part)))
+        self._passes += 1
+        
+        texts: List[List[int]] = []
+        statuses: List[int] = []
+        for text, status in self._shuffled(self._examples(part, parts), rng):
+            texts.append(text)
+            statuses.append(status)
+            if len(texts) == self.batch_size:
+                yield self._to_batch(texts, statuses)
+                texts, statuses = [], []
+        if texts:
+            yield self._to_batch(texts, statuses)
+    
+    def _examples(self, part: int, parts: int) -> Iterator[tuple]:
+        want_val = self.split == "val"
+        for example in iter_jsonl_examples(self.shards, part, parts):
+            if is_validation_example(example['text'], self.val_fraction) != want_val:
+                continue
+            yield (
+                self.vocab.encode(example['text'], max_len=self.max_len),
+                self.encoders['status'].encode(example['labels']['status'])
+            )
+    
+    def _shuffled(self, items: Iterator[tuple], rng: random.Random) -> Iterator[tuple]:
+        """Перемешивание в буфере: случайный элемент буфера заменяется новым"""
+        if self.shuffle_buffer <= 1:
+            yield from items
+            return
+        
+        buffer = []
+        for item in items:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(item)
+                continue
+            idx = rng.randrange(len(buffer))
+            yield buffer[idx]
+            buffer[idx] = item
+        
+        rng.shuffle(buffer)
+        yield from buffer
+    
+    @staticmethod
+    def _to_batch(texts: List[List[int]], statuses: List[int]) -> Dict[str, torch.Tensor]:
+        return {
+            'text': torch.tensor(texts, dtype=torch.long),
+            'status': torch.tensor(statuses, dtype=torch.long)
+        }
+
+def create_stream_loader(
+    dataset: StreamingTaskDataset,
+    num_workers: int = 0,
+    prefetch_factor: int = 2
+) -> DataLoader:
+    """
+    DataLoader для потокового датасета
+    
+    Воркеры живут между эпохами: повторный fork на каждой эпохе из процесса,
+    где уже работает torch, нестабилен.
+    """
+    worker_options = {}
+    if num_workers > 0:
+        worker_options = {"prefetch_factor": prefetch_factor, "persistent_workers": True}
+    return DataLoader(
+        dataset,
+        batch_size=None,
+        collate_fn=collate_batch,
+        num_workers=num_workers,
+        **worker_options
+    )
@@ -1,14 +1,52 @@
+import hashlib
+import json
+import re
+import zlib
 from collections import Counter
-from typing import List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Токен - последовательность букв/цифр, допускаются внутренние дефисы и апострофы
+_TOKEN_RE = re.compile(r"\w+(?:[-']\w+)*", re.UNICODE)
+
+def normalize_tokens(text: str) -> List[str]:
+    """Нормализация текста: нижний регистр, без пунктуации"""
+    return _TOKEN_RE.findall(text.lower())
 
 class Vocabulary:
     """Словарь для кодирования текста"""
     
-    def __init__(self):
+    # Значения по умолчанию на уровне класса нужны для словарей,
+    # сохранённых (pickle) до появления опций прунинга и нормализации
+    min_freq = 1
+    max_size: Optional[int] = None
+    normalize = False
+    
+    def __init__(
+        self,
+        min_freq: int = 1,
+        max_size: Optional[int] = None,
+        normalize: bool = False
+    ):
+        """
+        Args:
+            min_freq: Минимальная частота слова для попадания в словарь
+            max_size: Максимальное число слов (без служебных токенов)
+            normalize: Удалять пунктуацию при токенизации
+        """
         self.word2idx = {'<PAD>': 0, '<UNK>': 1}
         self.idx2word = {0: '<PAD>', 1: '<UNK>'}
         self.word_count = Counter()
         self.vocab_size = 2
+        self.min_freq = max(1, min_freq)
+        self.max_size = max_size
+        self.normalize = normalize
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Разбиение текста на токены"""
+        if self.normalize:
+            return normalize_tokens(text)
+        return text.lower().split()
     
     def add_word(self, word: str):
         """Добавление слова в словарь"""
@@ -20,7 +58,7 @@ class Vocabulary:
     
     def encode(self, text: str, max_len: int = 200) -> List[int]:
         """Кодирование текста в индексы"""
-        words = text.lower().split()[:max_len]
+        words = self.tokenize(text)[:max_len]
         encoded = [self.word2idx.get(word, self.word2idx['<UNK>']) for word in words]
         
         # Padding
@@ -34,11 +72,146 @@ class Vocabulary:
         words = [self.idx2word.get(idx, '<UNK>') for idx in indices]
         return ' '.join(word for word in words if word not in ['<PAD>', '<UNK>'])
     
+    def fingerprint(self) -> str:
+        """Хеш содержимого словаря (ключ для кеша закодированных данных)"""
+        payload = json.dumps(
+            [sorted(self.word2idx.items()), self.normalize],
+            ensure_ascii=False
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
     def build_from_texts(self, texts: List[str]):
-        """Построение словаря из списка текстов"""
+        """
+        Построение словаря из списка текстов
+        
+        Слова добавляются в порядке убывания частоты; редкие (< min_freq)
+        и не поместившиеся в max_size остаются <UNK>.
+        """
         for text in texts:
-            for word in text.lower().split():
-                self.add_word(word)
+            self.word_count.update(self.tokenize(text))
+        
+        capacity = None
+        if self.max_size is not None:
+            capacity = max(0, self.max_size - (self.vocab_size - 2))
+        
+        for word, count in self.word_count.most_common():
+            if count < self.min_freq or (capacity is not None and capacity <= 0):
+                break
+            if word in self.word2idx:
+                continue
+            self.word2idx[word] = self.vocab_size
+            self.idx2word[self.vocab_size] = word
+            self.vocab_size += 1
+            if capacity is not None:
+                capacity -= 1
+
+@lru_cache(maxsize=100_000)
+def _hash_token_features(
+    token: str,
+    num_buckets: int,
+    ngram_min: int,
+    ngram_max: int
+) -> Tuple[int, ...]:
+    """Индексы корзин для токена и его символьных n-грамм"""
+    def bucket(feature: str) -> int:
+        # crc32 стабилен между процессами (в отличие от hash())
+        return 2 + zlib.crc32(feature.encode('utf-8')) % num_buckets
+    
+    features = [bucket(token)]
+    if ngram_min > 0:
+        wrapped = f"<{token}>"
+        for n in range(ngram_min, ngram_max + 1):
+            for i in range(len(wrapped) - n + 1):
+                ngram = wrapped[i:i + n]
+                if ngram != wrapped:
+                    features.append(bucket('#' + ngram))
+    return tuple(features)
+
+class HashingVocabulary:
+    """
+    Словарь на основе hashing trick
+    
+    Нормализованные токены и их символьные n-граммы хешируются в фиксированное
+    число корзин: размер эмбеддингов известен заранее и не растёт с корпусом,
+    а незнакомые слова всё равно получают признаки через n-граммы.
+    Признаки n-грамм идут в последовательности сразу после своего токена.
+    """
+    
+    def __init__(
+        self,
+        num_buckets: int = 20000,
+        ngram_range: Tuple[int, int] = (3, 3)
+    ):
+        if num_buckets < 1:
+            raise ValueError("num_buckets должно быть положительным")
+        self.num_buckets = num_buckets
+        self.ngram_range = tuple(ngram_range)
+        self.word2idx = {'<PAD>': 0, '<UNK>': 1}
+        self.vocab_size = num_buckets + 2
+    
+    def encode(self, text: str, max_len: int = 200) -> List[int]:
+        """Кодирование текста в индексы корзин"""
+        ngram_min, ngram_max = self.ngram_range
+        encoded: List[int] = []
+        for token in normalize_tokens(text):
+            encoded.extend(
+                _hash_token_features(token, self.num_buckets, ngram_min, ngram_max)
+            )
+            if len(encoded) >= max_len:
+                break
+        encoded = encoded[:max_len]
+        
+        # Padding
+        if len(encoded) < max_len:
+            encoded += [self.word2idx['<PAD>']] * (max_len - len(encoded))
+        
+        return encoded
+    
+    def decode(self, indices: List[int]) -> str:
+        """Хеширование необратимо - исходные слова восстановить нельзя"""
+        return ''
+    
+    def fingerprint(self) -> str:
+        """Хеш конфигурации словаря (ключ для кеша закодированных данных)"""
+        payload = f"hashing:{self.num_buckets}:{self.ngram_range[0]}:{self.ngram_range[1]}"
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def get_config(self) -> Dict[str, Any]:
+        """Параметры для create_vocabulary: по ним словарь восстанавливается без vocab.pkl"""
+        return {
+            "tokenizer": "hashing",
+            "num_buckets": self.num_buckets,
+            "ngram_range": list(self.ngram_range)
+        }
+    
+    def build_from_texts(self, texts: List[str]):
+        """Словарь фиксирован - построение не требуется"""
+        pass
+
+def create_vocabulary(
+    tokenizer: str = "vocab",
+    num_buckets: int = 20000,
+    ngram_range: Tuple[int, int] = (3, 3),
+    min_freq: int = 1,
+    max_size: Optional[int] = None,
+    normalize: bool = False
+) -> Union[Vocabulary, HashingVocabulary]:
+    """
+    Создание словаря выбранного типа
+    
+    Args:
+        tokenizer: "vocab" - словарь слов, "hashing" - hashing trick
+        num_buckets: Число корзин для hashing
+        ngram_range: Диапазон длин символьных n-грамм для hashing
+        min_freq: Минимальная частота слова (vocab)
+        max_size: Максимальный размер словаря (vocab)
+        normalize: Удалять пунктуацию (vocab)
+    """
+    if tokenizer == "vocab":
+        return Vocabulary(min_freq=min_freq, max_size=max_size, normalize=normalize)
+    if tokenizer == "hashing":
+        return HashingVocabulary(num_buckets=num_buckets, ngram_range=ngram_range)
+    raise ValueError(f"Неизвестный токенизатор: {tokenizer}")
 
 class LabelEncoder:
     """Энкодер для меток классов"""
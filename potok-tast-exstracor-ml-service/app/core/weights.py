@@ -0,0 +1,134 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+
+# Формат весов для загрузки через mmap (по мотивам safetensors):
+#   [8 байт: длина заголовка, little-endian u64]
+#   [JSON заголовок: {имя: {dtype, shape, offset, nbytes}, "__metadata__": {...}}]
+#   [буфер тензоров, каждый тензор выровнен по ALIGNMENT от начала буфера]
+# Заголовок дополнен пробелами, чтобы буфер начинался с выровненного смещения.
+WEIGHTS_FILE = "model.weights"
+ALIGNMENT = 64
+
+_DTYPES = {
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "F64": torch.float64,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+_DTYPE_NAMES = {dtype: name for name, dtype in _DTYPES.items()}
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def save_weights(
+    state_dict: Dict[str, torch.Tensor],
+    path: Union[str, Path],
+    fp16: bool = False,
+    metadata: Optional[Dict[str, str]] = None
+):
+    """
+    Сохранение state_dict в формате для mmap
+    
+    Args:
+        state_dict: Веса модели
+        path: Файл весов
+        fp16: Хранить float32 тензоры в float16 (вдвое меньше на диске,
+            при загрузке приводятся обратно к float32 - уже не zero-copy)
+        metadata: Строковые метаданные заголовка
+    """
+    tensors = {}
+    header: Dict[str, Any] = {"__metadata__": dict(metadata or {})}
+    offset = 0
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().cpu().contiguous()
+        if fp16 and tensor.dtype == torch.float32:
+            tensor = tensor.to(torch.float16)
+        
+        offset = _aligned(offset)
+        nbytes = tensor.numel() * tensor.element_size()
+        header[name] = {
+            "dtype": _DTYPE_NAMES[tensor.dtype],
+            "shape": list(tensor.shape),
+            "offset": offset,
+            "nbytes": nbytes
+        }
+        tensors[name] = tensor
+        offset += nbytes
+    
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    # 8 байт длины + заголовок, дополненный до выравнивания
+    padded_len = _aligned(8 + len(header_bytes)) - 8
+    header_bytes += b" " * (padded_len - len(header_bytes))
+    
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        position = 0
+        for name, tensor in tensors.items():
+            meta = header[name]
+            f.write(b"\0" * (meta["offset"] - position))
+            if meta["nbytes"]:
+                f.write(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+            position = meta["offset"] + meta["nbytes"]
+    os.replace(tmp_path, path)
+
+def read_header(path: Union[str, Path]) -> Tuple[Dict[str, Any], int]:
+    """Заголовок файла весов и смещение буфера тензоров"""
+    with open(path, 'rb') as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    return header, 8 + header_len
+
+def load_weights(
+    path: Union[str, Path],
+    device: str = "cpu",
+    dtype: Optional[torch.dtype] = torch.float32
+) -> Dict[str, torch.Tensor]:
+    """
+    Загрузка весов через mmap
+    
+    На CPU тензоры ссылаются прямо на страницы файла (ACCESS_COPY - частное
+    отображение: процессы с одной моделью делят страницы page cache, пока
+    веса не изменяются). Данные читаются с диска по мере обращения.
+    
+    Args:
+        path: Файл весов
+        device: Устройство (не cpu - тензоры копируются на него)
+        dtype: Тип для float16/bfloat16 тензоров (None - оставить как в файле)
+    """
+    header, data_start = read_header(path)
+    header.pop("__metadata__", None)
+    
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    
+    state_dict = {}
+    for name, meta in header.items():
+        tensor_dtype = _DTYPES[meta["dtype"]]
+        count = meta["nbytes"] // torch.empty((), dtype=tensor_dtype).element_size()
+        if count:
+            tensor = torch.frombuffer(
+                buffer, dtype=tensor_dtype, count=count,
+                offset=data_start + meta["offset"]
+            ).view(meta["shape"])
+        else:
+            tensor = torch.empty(meta["shape"], dtype=tensor_dtype)
+        
+        if dtype is not None and tensor.dtype in (torch.float16, torch.bfloat16):
+            tensor = tensor.to(dtype)
+        if device != "cpu":
+            tensor = tensor.to(device)
+        state_dict[name] = tensor
+    return state_dict
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import time
 from pathlib import Path
@@ -9,6 +9,7 @@ from app.config.settings import get_settings
 from app.utils.logger import setup_logger
 from app.api.v1 import prediction, training, management, monitoring
 from app.services.prediction_service import PredictionService
+from app.utils import metrics as prom
 
 settings = get_settings()
 logger = setup_logger("main", settings.LOG_LEVEL, Path(settings.LOG_DIR))
@@ -34,10 +35,19 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ Не удалось загрузить модель по умолчанию: {e}")
         logger.info("💡 Загрузите модель через /api/v1/management/load")
     
+    # Запуск очереди обучений (прерванные задания возвращаются в очередь)
+    try:
+        training.training_jobs.start()
+    except Exception as e:
+        logger.error(f"❌ Не удалось запустить очередь обучений: {e}")
+    
     yield
     
     # Shutdown
     logger.info("🛑 Остановка сервиса...")
+    training.training_jobs.shutdown()
+    prediction_service.stop_shadow()
+    prom.mark_process_dead()
 
 # Создание приложения
 app = FastAPI(
@@ -90,6 +100,16 @@ async def add_process_time_header(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    
+    if settings.ENABLE_METRICS:
+        # Шаблон пути вместо URL: метки не растут от параметров
+        route = request.scope.get("route")
+        prom.REQUEST_LATENCY.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(response.status_code)
+        ).observe(process_time)
+        prom.update_memory()
     return response
 
 # Exception handler
@@ -121,6 +141,15 @@ async def root():
         "api": settings.API_V1_PREFIX
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в формате Prometheus"""
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Метрики отключены"})
+    
+    content, content_type = prom.render_metrics()
+    return Response(content=content, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -10,6 +10,14 @@ class TaskRequest(BaseModel):
         max_length=1000,
         description="Текст задачи для анализа"
     )
+    model_name: Optional[str] = Field(
+        default=None,
+        description="Модель (по умолчанию - основная или вариант A/B)"
+    )
+    version: Optional[str] = Field(
+        default=None,
+        description="Версия модели (по умолчанию latest)"
+    )
     
     @validator('text')
     def validate_text(cls, v):
@@ -36,6 +44,8 @@ class TaskResponse(BaseModel):
     stages: List[str]
     status: str
     confidence: float = Field(..., ge=0.0, le=1.0)
+    model_name: Optional[str] = None
+    model_version: Optional[str] = None
     processed_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Config:
@@ -51,6 +61,8 @@ class TaskResponse(BaseModel):
                 "stages": [],
                 "status": "новая",
                 "confidence": 0.85,
+                "model_name": "task_extraction_model",
+                "model_version": "20251108_162000",
                 "processed_at": "2025-11-08T16:30:00Z"
             }
         }
@@ -63,6 +75,8 @@ class BatchTaskRequest(BaseModel):
         max_items=100,
         description="Список текстов задач"
     )
+    model_name: Optional[str] = None
+    version: Optional[str] = None
     
     @validator('texts')
     def validate_texts(cls, v):
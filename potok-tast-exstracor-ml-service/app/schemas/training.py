@@ -1,14 +1,15 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
 class TrainingStatus(str, Enum):
     """Статусы обучения"""
-    PENDING = "pending"
+    PENDING = "pending"          # в очереди
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class TaskInfoForTraining(BaseModel):
     """Информация о задаче для обучения"""
@@ -45,13 +46,8 @@ class TrainingExample(BaseModel):
             }
         }
 
-class TrainingRequest(BaseModel):
-    """Запрос на обучение модели"""
-    training_examples: List[TrainingExample] = Field(
-        ...,
-        min_items=10,
-        description="Примеры для обучения (минимум 10)"
-    )
+class TrainingOptions(BaseModel):
+    """Параметры обучения новой модели"""
     epochs: int = Field(default=30, ge=1, le=200)
     batch_size: int = Field(default=32, ge=1, le=128)
     learning_rate: float = Field(default=0.001, gt=0.0, le=1.0)
@@ -61,7 +57,76 @@ class TrainingRequest(BaseModel):
     )
     save_checkpoint: bool = Field(
         default=True,
-        description="Сохранять чекпоинты во время обучения"
+        description="Сохранять чекпоинты во время обучения (прерванное обучение возобновляется)"
+    )
+    early_stopping_patience: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Эпох без улучшения val loss до остановки (0 - отключено, по умолчанию из настроек)"
+    )
+    fast_mode: Optional[bool] = Field(
+        default=None,
+        description="bfloat16 autocast и скомпилированный шаг обучения (по умолчанию из настроек)"
+    )
+    world_size: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=64,
+        description="Число локальных процессов DDP (по умолчанию из настроек)"
+    )
+    architecture: Optional[Literal["status_net", "gru", "pooled", "fasttext", "textcnn"]] = Field(
+        default=None,
+        description="Архитектура модели (по умолчанию MODEL_ARCHITECTURE)"
+    )
+    embedding_dim: Optional[int] = Field(
+        default=None,
+        ge=8,
+        le=1024,
+        description="Размерность эмбеддингов (по умолчанию - архитектуры)"
+    )
+    hidden_dim: Optional[int] = Field(
+        default=None,
+        ge=8,
+        le=1024,
+        description="Скрытая размерность / число фильтров (по умолчанию - архитектуры)"
+    )
+    pooling: Optional[Literal["last", "mean", "attention"]] = Field(
+        default=None,
+        description="Pooling StatusNet (по умолчанию STATUSNET_POOLING)"
+    )
+    tokenizer: Optional[Literal["vocab", "hashing"]] = Field(
+        default=None,
+        description="Токенизатор: vocab - словарь слов, hashing - фиксированное число корзин"
+    )
+    vocab_min_freq: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Минимальная частота слова в словаре (по умолчанию из настроек)"
+    )
+    vocab_max_size: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Максимальный размер словаря (по умолчанию из настроек)"
+    )
+    
+    @validator('hidden_dim')
+    def validate_hidden_dim(cls, v, values):
+        if v is not None and values.get('architecture') == "fasttext":
+            raise ValueError('У архитектуры fasttext нет скрытого слоя (hidden_dim)')
+        return v
+    
+    @validator('pooling')
+    def validate_pooling(cls, v, values):
+        if v is not None and values.get('architecture') not in (None, "status_net"):
+            raise ValueError('pooling задаётся только для архитектуры status_net')
+        return v
+    
+class TrainingRequest(TrainingOptions):
+    """Запрос на обучение модели"""
+    training_examples: List[TrainingExample] = Field(
+        ...,
+        min_items=10,
+        description="Примеры для обучения (минимум 10)"
     )
     
     @validator('training_examples')
@@ -95,6 +160,100 @@ class TrainingRequest(BaseModel):
             }
         }
 
+class TrainingFilesRequest(TrainingOptions):
+    """Запрос на обучение по JSONL шардам из TRAINING_DATA_DIR"""
+    files: List[str] = Field(
+        ...,
+        min_items=1,
+        description="Пути к шардам относительно TRAINING_DATA_DIR (файлы, директории или glob)"
+    )
+    shuffle_buffer: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Размер буфера перемешивания (по умолчанию из настроек)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "files": ["history/tasks-*.jsonl"],
+                "epochs": 10,
+                "batch_size": 64
+            }
+        }
+
+class SweepRequest(BaseModel):
+    """Запрос на подбор гиперпараметров"""
+    training_examples: List[TrainingExample] = Field(
+        ...,
+        min_items=10,
+        description="Примеры для обучения (минимум 10)"
+    )
+    learning_rates: List[float] = Field(default_factory=list, description="Значения learning_rate")
+    batch_sizes: List[int] = Field(default_factory=list, description="Значения batch_size")
+    embedding_dims: List[int] = Field(default_factory=list, description="Значения EMBEDDING_DIM")
+    hidden_dims: List[int] = Field(default_factory=list, description="Значения HIDDEN_DIM")
+    max_trials: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Ограничение числа испытаний (случайная выборка из сетки)"
+    )
+    epochs: int = Field(default=10, ge=1, le=200, description="Эпох на испытание")
+    max_parallel: Optional[int] = Field(default=None, ge=1, le=64)
+    cpu_budget: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Потоков torch на весь перебор (по умолчанию - бюджет процесса обучения)"
+    )
+    prune_warmup_epochs: Optional[int] = Field(default=None, ge=1)
+    model_name: Optional[str] = None
+    tokenizer: Optional[Literal["vocab", "hashing"]] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "training_examples": [],
+                "learning_rates": [0.001, 0.003],
+                "batch_sizes": [16, 32],
+                "hidden_dims": [64, 128],
+                "epochs": 10,
+                "max_parallel": 4
+            }
+        }
+
+class DistillRequest(BaseModel):
+    """Запрос на дистилляцию модели в компактного ученика"""
+    training_examples: List[TrainingExample] = Field(
+        ...,
+        min_items=10,
+        description="Примеры для дистилляции (минимум 10)"
+    )
+    teacher_model_name: Optional[str] = Field(
+        default=None,
+        description="Модель-учитель (по умолчанию MODEL_NAME)"
+    )
+    teacher_version: Optional[str] = Field(
+        default=None,
+        description="Версия учителя (по умолчанию latest)"
+    )
+    student_architecture: Literal["gru", "pooled"] = Field(
+        default="gru",
+        description="gru - однослойный GRU, pooled - усреднённые эмбеддинги + MLP"
+    )
+    embedding_dim: int = Field(default=64, ge=8, le=512)
+    hidden_dim: int = Field(default=64, ge=8, le=512)
+    epochs: int = Field(default=20, ge=1, le=200)
+    batch_size: int = Field(default=32, ge=1, le=256)
+    learning_rate: float = Field(default=0.003, gt=0.0, le=1.0)
+    temperature: float = Field(default=2.0, gt=0.0, le=20.0)
+    alpha: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Вес мягких меток учителя в loss"
+    )
+    model_name: Optional[str] = None
+
 class FineTuneRequest(BaseModel):
     """Запрос на дообучение существующей модели"""
     training_examples: List[TrainingExample] = Field(
@@ -109,6 +268,14 @@ class FineTuneRequest(BaseModel):
         default=True,
         description="Заморозить слой эмбеддингов"
     )
+    train_new_embeddings: bool = Field(
+        default=True,
+        description="Обучать эмбеддинги новых слов (при заморозке - только их)"
+    )
+    pooling: Optional[Literal["last", "mean", "attention"]] = Field(
+        default=None,
+        description="Сменить pooling StatusNet при дообучении (миграция старых моделей)"
+    )
     model_version: Optional[str] = Field(
         default=None,
         description="Версия модели для дообучения"
@@ -150,3 +317,17 @@ class TrainingResult(BaseModel):
     started_at: datetime
     completed_at: datetime
     duration_seconds: int
+
+class TrainingJobInfo(BaseModel):
+    """Задание обучения в очереди/истории"""
+    training_id: str
+    kind: str
+    status: TrainingStatus
+    model_name: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_position: Optional[int] = None
+    progress: TrainingProgress
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
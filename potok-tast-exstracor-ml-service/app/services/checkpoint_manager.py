@@ -0,0 +1,89 @@
+import os
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import torch
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger("checkpoint_manager", settings.LOG_LEVEL)
+
+def snapshot_state(state_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Копия state_dict, не меняющаяся при дальнейшем обучении"""
+    def copy(value):
+        if isinstance(value, torch.Tensor):
+            return value.detach().clone()
+        if isinstance(value, dict):
+            return {key: copy(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [copy(item) for item in value]
+        return value
+    
+    return copy(state_dict)
+
+class CheckpointManager:
+    """
+    Чекпоинты обучения для возобновления после прерывания
+    
+    Состояние копируется в памяти в потоке обучения, а запись на диск
+    выполняется в фоновом потоке, чтобы не останавливать цикл обучения.
+    """
+    
+    FILE_NAME = "last.pt"
+    
+    def __init__(self, training_id: str, checkpoint_dir: Optional[str] = None):
+        self.path = Path(checkpoint_dir or settings.CHECKPOINT_DIR) / training_id
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+    
+    def save_async(self, state: Dict[str, Any]):
+        """Асинхронная запись чекпоинта (state должен быть снимком)"""
+        # Предыдущая запись к этому моменту почти всегда завершена
+        self.wait()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = self._executor.submit(self._write, state)
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Загрузка последнего чекпоинта, если он есть"""
+        checkpoint_file = self.path / self.FILE_NAME
+        if not checkpoint_file.exists():
+            return None
+        try:
+            return torch.load(checkpoint_file, map_location="cpu")
+        except Exception as e:
+            logger.warning(f"⚠️ Повреждённый чекпоинт {checkpoint_file}: {e}")
+            return None
+    
+    def wait(self):
+        """Ожидание завершения текущей записи"""
+        if self._pending is not None:
+            try:
+                self._pending.result()
+            except Exception as e:
+                logger.error(f"❌ Ошибка записи чекпоинта: {e}")
+            self._pending = None
+    
+    def close(self):
+        """Завершение фоновой записи"""
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def remove(self):
+        """Удаление чекпоинтов обучения"""
+        self.close()
+        if self.path.exists():
+            shutil.rmtree(self.path, ignore_errors=True)
+    
+    def _write(self, state: Dict[str, Any]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path / f"{self.FILE_NAME}.tmp"
+        torch.save(state, tmp_file)
+        # Атомарная замена: прерывание во время записи не портит прошлый чекпоинт
+        os.replace(tmp_file, self.path / self.FILE_NAME)
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import queue
+import socket
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as torch_mp
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+from app.utils.exceptions import TrainingException
+from app.schemas.training import TrainingProgress
+
+settings = get_settings()
+logger = setup_logger("distributed_training", settings.LOG_LEVEL)
+
+def is_distributed() -> bool:
+    """Выполняется ли код внутри группы процессов torch.distributed"""
+    return dist.is_available() and dist.is_initialized()
+
+def get_rank() -> int:
+    """Номер процесса в группе (0 вне распределённого обучения)"""
+    return dist.get_rank() if is_distributed() else 0
+
+def get_world_size() -> int:
+    """Число процессов в группе (1 вне распределённого обучения)"""
+    return dist.get_world_size() if is_distributed() else 1
+
+def mean_across_ranks(value: float) -> float:
+    """Среднее значение по всем процессам группы"""
+    if not is_distributed():
+        return value
+    tensor = torch.tensor([value], dtype=torch.float64)
+    dist.all_reduce(tensor)
+    return tensor.item() / dist.get_world_size()
+
+def sum_across_ranks(*values: float) -> Tuple[float, ...]:
+    """Суммы значений по всем процессам группы (одним all_reduce)"""
+    if not is_distributed():
+        return values
+    tensor = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(tensor)
+    return tuple(tensor.tolist())
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _distributed_worker(
+    rank: int,
+    world_size: int,
+    port: int,
+    params: Dict[str, Any],
+    events: "torch_mp.Queue",
+    num_threads: int
+):
+    """
+    Процесс одного ранга
+    
+    Выполняет обычный train_new_model внутри группы gloo: модель
+    оборачивается в DDP, данные шардируются по рангам. Прогресс и
+    результат отправляет только ранг 0.
+    """
+    from app.services.training_service import TrainingService
+    
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    torch.set_num_threads(num_threads)
+    dist.init_process_group("gloo", rank=rank, world_size=world_size)
+    
+    try:
+        report = None
+        if rank == 0:
+            async def report(progress: TrainingProgress):
+                events.put(("progress", progress.model_dump(mode="json")))
+        
+        result = asyncio.run(
+            TrainingService().train_new_model(**params, progress_callback=report)
+        )
+        if rank == 0:
+            events.put(("completed", result))
+    finally:
+        dist.destroy_process_group()
+
+async def run_distributed(
+    params: Dict[str, Any],
+    world_size: int,
+    progress_callback: Optional[Callable] = None
+) -> Dict[str, Any]:
+    """
+    Обучение в world_size локальных процессах (DDP, backend gloo)
+    
+    Потоки torch текущего процесса делятся между рангами поровну.
+    
+    Args:
+        params: Аргументы TrainingService.train_new_model
+        world_size: Число процессов
+        progress_callback: Callback прогресса (вызывается в текущем процессе)
+    
+    Returns:
+        Результат обучения от ранга 0
+    """
+    num_threads = max(1, torch.get_num_threads() // world_size)
+    events = torch_mp.get_context("spawn").Queue()
+    logger.info(f"🧩 Распределённое обучение: {world_size} процессов, потоков на процесс: {num_threads}")
+    
+    context = torch_mp.start_processes(
+        _distributed_worker,
+        args=(world_size, _free_port(), params, events, num_threads),
+        nprocs=world_size,
+        join=False,
+        start_method="spawn"
+    )
+    
+    result = None
+    finished = False
+    while result is None:
+        try:
+            kind, payload = await asyncio.to_thread(events.get, True, 0.5)
+        except queue.Empty:
+            if finished:
+                break
+            try:
+                # Исключение в любом ранге останавливает остальные
+                finished = context.join(timeout=0)
+            except Exception as e:
+                raise TrainingException(f"Ошибка распределённого обучения: {e}")
+            continue
+        
+        if kind == "progress" and progress_callback:
+            await progress_callback(TrainingProgress(**payload))
+        elif kind == "completed":
+            result = payload
+    
+    await asyncio.to_thread(context.join)
+    if result is None:
+        raise TrainingException("Распределённое обучение завершилось без результата")
+    return result
@@ -1,34 +1,56 @@
 import torch
 import pickle
 import json
+import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 import shutil
 
 from app.config.settings import get_settings
 from app.utils.logger import setup_logger
 from app.utils.exceptions import ModelNotLoadedException, ModelNotTrainedException
-from app.core.models import StatusNet
-from app.core.vocabulary import Vocabulary
+from app.core.models import TextClassifier, build_model
+from app.core.weights import WEIGHTS_FILE, load_weights, read_header, save_weights
+from app.core.vocabulary import HashingVocabulary, Vocabulary, create_vocabulary
 
 settings = get_settings()
 logger = setup_logger("model_manager", settings.LOG_LEVEL)
 
+# Индекс реестра: сводки версий без истории обучения
+REGISTRY_INDEX = "registry.json"
+HISTORY_FILE = "history.json"
+
+def _version_summary(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Запись индекса о версии (формат ответа /management/models)"""
+    return {
+        "model_name": metadata['model_name'],
+        "version": metadata['version'],
+        "saved_at": metadata['saved_at'],
+        "vocab_size": metadata['vocab_size'],
+        "metadata": {
+            key: value for key, value in metadata.items() if key != "training_history"
+        }
+    }
+
 class ModelManager:
     """Управление моделями - загрузка, сохранение, версионирование"""
     
     def __init__(self):
         self.models_dir = Path(settings.MODEL_DIR)
         self.models_dir.mkdir(parents=True, exist_ok=True)
-        self.current_model: Optional[StatusNet] = None
+        self.current_model: Optional[TextClassifier] = None
         self.current_vocab: Optional[Vocabulary] = None
         self.current_encoders: Optional[Dict] = None
         self.current_version: Optional[str] = None
+        # Индекс реестра в памяти и mtime файла, из которого он прочитан
+        self._index: Dict[str, Any] = {"models": {}}
+        self._index_mtime: Optional[int] = None
+        self._index_read_only = False
     
     def save_model(
         self,
-        model: StatusNet,
+        model: TextClassifier,
         vocab: Vocabulary,
         encoders: Dict,
         model_name: str,
@@ -49,20 +71,38 @@ class ModelManager:
         """
         version = datetime.now().strftime("%Y%m%d_%H%M%S")
         model_path = self.models_dir / model_name / version
+        # Индекс приводится в актуальное состояние до изменения директории модели
+        self._load_index()
         model_path.mkdir(parents=True, exist_ok=True)
         
         try:
             # Сохранение весов модели
-            torch.save(model.state_dict(), model_path / "model.pth")
+            if settings.WEIGHTS_FORMAT == "mmap":
+                save_weights(
+                    model.state_dict(), model_path / WEIGHTS_FILE, fp16=settings.WEIGHTS_FP16
+                )
+            else:
+                torch.save(model.state_dict(), model_path / "model.pth")
             
-            # Сохранение словаря
-            with open(model_path / "vocab.pkl", 'wb') as f:
-                pickle.dump(vocab, f)
+            # Сохранение словаря (hashing не хранится - восстанавливается по параметрам)
+            if isinstance(vocab, HashingVocabulary):
+                tokenizer_config = vocab.get_config()
+            else:
+                tokenizer_config = {"tokenizer": "vocab"}
+                with open(model_path / "vocab.pkl", 'wb') as f:
+                    pickle.dump(vocab, f)
             
             # Сохранение энкодеров
             with open(model_path / "encoders.pkl", 'wb') as f:
                 pickle.dump(encoders, f)
             
+            # История обучения по эпохам - отдельно от метаданных
+            metadata = dict(metadata or {})
+            training_history = metadata.pop("training_history", None)
+            if training_history is not None:
+                with open(model_path / HISTORY_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(training_history, f, ensure_ascii=False)
+            
             # Сохранение метаданных
             metadata_full = {
                 "model_name": model_name,
@@ -70,7 +110,11 @@ class ModelManager:
                 "saved_at": datetime.utcnow().isoformat(),
                 "vocab_size": vocab.vocab_size,
                 "device": settings.DEVICE,
-                **(metadata or {})
+                # Архитектура и размерности - для восстановления модели при загрузке
+                "model_config": model.get_config(),
+                "tokenizer_config": tokenizer_config,
+                "weights_format": settings.WEIGHTS_FORMAT,
+                **metadata
             }
             
             with open(model_path / "metadata.json", 'w', encoding='utf-8') as f:
@@ -82,6 +126,8 @@ class ModelManager:
                 latest_link.unlink()
             latest_link.symlink_to(version)
             
+            self._update_index(model_name, version, _version_summary(metadata_full))
+            
             logger.info(f"✅ Модель сохранена: {model_name}/{version}")
             return version
             
@@ -97,7 +143,7 @@ class ModelManager:
         model_name: str,
         version: Optional[str] = None,
         device: Optional[str] = None
-    ) -> tuple[StatusNet, Vocabulary, Dict]:
+    ) -> tuple[TextClassifier, Vocabulary, Dict]:
         """
         Загрузка модели
         
@@ -127,25 +173,46 @@ class ModelManager:
             with open(model_path / "metadata.json", 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
-            # Загрузка словаря
-            with open(model_path / "vocab.pkl", 'rb') as f:
-                vocab = pickle.load(f)
+            # Загрузка словаря (старые hashing модели - тоже из vocab.pkl)
+            tokenizer_config = metadata.get('tokenizer_config') or {}
+            if tokenizer_config.get('tokenizer') == "hashing":
+                vocab = create_vocabulary(**tokenizer_config)
+            else:
+                with open(model_path / "vocab.pkl", 'rb') as f:
+                    vocab = pickle.load(f)
             
             # Загрузка энкодеров
             with open(model_path / "encoders.pkl", 'rb') as f:
                 encoders = pickle.load(f)
             
-            # Создание и загрузка модели
-            model = StatusNet(
+            # Создание и загрузка модели (старые модели - StatusNet с размерностями из настроек)
+            model_config = metadata.get('model_config', {})
+            if 'architecture' not in model_config:
+                model_config = {
+                    "architecture": "status_net",
+                    "embedding_dim": settings.EMBEDDING_DIM,
+                    "hidden_dim": settings.HIDDEN_DIM,
+                    **model_config
+                }
+            model_kwargs = dict(
                 vocab_size=vocab.vocab_size,
-                embedding_dim=settings.EMBEDDING_DIM,
-                hidden_dim=settings.HIDDEN_DIM,
-                num_statuses=encoders['status'].num_classes
-            ).to(device)
-            
-            model.load_state_dict(
-                torch.load(model_path / "model.pth", map_location=device)
+                num_statuses=encoders['status'].num_classes,
+                **model_config
             )
+            
+            if (model_path / WEIGHTS_FILE).exists():
+                # Веса отображаются в память: модель создаётся без инициализации
+                # параметров и ссылается на страницы файла
+                with torch.device("meta"):
+                    model = build_model(**model_kwargs)
+                model.load_state_dict(
+                    load_weights(model_path / WEIGHTS_FILE, device=device), assign=True
+                )
+            else:
+                model = build_model(**model_kwargs).to(device)
+                model.load_state_dict(
+                    torch.load(model_path / "model.pth", map_location=device)
+                )
             model.eval()
             
             self.current_model = model
@@ -163,31 +230,114 @@ class ModelManager:
             logger.error(f"❌ Ошибка загрузки модели: {e}")
             raise ModelNotLoadedException(f"Не удалось загрузить модель: {e}")
     
-    def list_models(self) -> Dict[str, list]:
-        """Получение списка доступных моделей"""
-        models = {}
-        
-        for model_dir in self.models_dir.iterdir():
-            if not model_dir.is_dir():
-                continue
-            
-            versions = []
-            for version_dir in model_dir.iterdir():
-                if version_dir.is_dir() and version_dir.name != "latest":
-                    metadata_file = version_dir / "metadata.json"
-                    if metadata_file.exists():
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                        versions.append(metadata)
-            
-            if versions:
-                models[model_dir.name] = sorted(
-                    versions,
-                    key=lambda x: x['saved_at'],
-                    reverse=True
-                )
+    def list_models(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Получение списка доступных моделей
+        
+        Читается индекс реестра; metadata.json перечитываются только
+        у моделей, чья директория изменилась с момента индексации.
+        """
+        index = self._load_index()
+        return {
+            model_name: sorted(
+                entry["versions"].values(),
+                key=lambda x: x['saved_at'],
+                reverse=True
+            )
+            for model_name, entry in index["models"].items()
+            if entry["versions"]
+        }
+    
+    def resolve_version(self, model_name: str, version: Optional[str] = None) -> Optional[str]:
+        """Фактическая версия (latest - по симлинку), None - версия не найдена"""
+        model_dir = self.models_dir / model_name
+        if version is not None:
+            return version if (model_dir / version).is_dir() else None
         
-        return models
+        latest_link = model_dir / "latest"
+        if not latest_link.is_symlink():
+            return None
+        return Path(os.readlink(latest_link)).name
+    
+    def get_training_history(
+        self,
+        model_name: str,
+        version: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """История обучения версии по эпохам (None - версия не найдена)"""
+        model_path = self.models_dir / model_name / (version or "latest")
+        history_file = model_path / HISTORY_FILE
+        if history_file.exists():
+            with open(history_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        # Версии, сохранённые до выделения истории в отдельный файл
+        metadata_file = model_path / "metadata.json"
+        if not metadata_file.exists():
+            return None
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('training_history', [])
+    
+    def convert_weights(
+        self,
+        model_name: str,
+        version: Optional[str] = None,
+        fp16: bool = False,
+        keep_pth: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Перевод весов версии из model.pth в формат для mmap
+        
+        Args:
+            model_name: Имя модели
+            version: Версия (если None, latest)
+            fp16: Хранить веса в float16
+            keep_pth: Оставить model.pth (иначе удаляется после проверки)
+            
+        Returns:
+            Размеры файлов до и после
+        """
+        model_path = self.models_dir / model_name / (version or "latest")
+        pth_file = model_path / "model.pth"
+        weights_file = model_path / WEIGHTS_FILE
+        if not pth_file.exists():
+            if weights_file.exists():
+                return {"converted": False, "weights_mb": weights_file.stat().st_size / 1024 ** 2}
+            raise ModelNotLoadedException(f"Веса {model_name}/{version or 'latest'} не найдены")
+        
+        state_dict = torch.load(pth_file, map_location="cpu")
+        save_weights(state_dict, weights_file, fp16=fp16)
+        
+        # Проверка: тензоры читаются обратно без потерь (fp16 - с округлением)
+        restored = load_weights(weights_file)
+        for name, tensor in state_dict.items():
+            expected = tensor.half().float() if fp16 and tensor.dtype == torch.float32 else tensor
+            if not torch.equal(restored[name], expected):
+                weights_file.unlink()
+                raise ValueError(f"Тензор {name} не совпадает после конвертации")
+        
+        self._load_index()
+        metadata_file = model_path / "metadata.json"
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata["weights_format"] = "mmap"
+        metadata["weights_fp16"] = fp16
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        # mtime директории модели не меняется - индекс обновляется явно
+        self._update_index(model_name, metadata['version'], _version_summary(metadata))
+        
+        pth_mb = pth_file.stat().st_size / 1024 ** 2
+        if not keep_pth:
+            pth_file.unlink()
+        
+        logger.info(f"🔁 Веса {model_name}/{metadata['version']} переведены в {WEIGHTS_FILE}")
+        return {
+            "converted": True,
+            "pth_mb": round(pth_mb, 2),
+            "weights_mb": round(weights_file.stat().st_size / 1024 ** 2, 2),
+            "tensors": len(read_header(weights_file)[0]) - 1
+        }
     
     def delete_model(self, model_name: str, version: str) -> bool:
         """Удаление версии модели"""
@@ -198,13 +348,108 @@ class ModelManager:
             return False
         
         try:
+            self._load_index()
             shutil.rmtree(model_path)
+            self._update_index(model_name, version, None)
             logger.info(f"🗑️ Удалена модель: {model_name}/{version}")
             return True
         except Exception as e:
             logger.error(f"❌ Ошибка удаления модели: {e}")
             return False
     
+    def _load_index(self) -> Dict[str, Any]:
+        """
+        Актуальный индекс реестра
+        
+        Файл индекса перечитывается, только если изменился его mtime
+        (например, модель сохранил процесс обучения). Директории моделей
+        сверяются по mtime: добавленная, удалённая или скопированная вручную
+        версия меняет mtime директории, и только такая модель сканируется заново.
+        """
+        index_file = self.models_dir / REGISTRY_INDEX
+        index_mtime = index_file.stat().st_mtime_ns if index_file.exists() else None
+        if index_mtime is None or index_mtime != self._index_mtime:
+            self._index = self._read_index(index_file)
+            self._index_mtime = index_mtime
+        
+        models = self._index["models"]
+        dir_mtimes = {
+            model_dir.name: model_dir.stat().st_mtime_ns
+            for model_dir in self.models_dir.iterdir()
+            if model_dir.is_dir()
+        }
+        changed = False
+        for model_name, mtime in dir_mtimes.items():
+            entry = models.get(model_name)
+            if entry is None or entry["mtime_ns"] != mtime:
+                models[model_name] = {
+                    "mtime_ns": mtime,
+                    "versions": self._scan_versions(self.models_dir / model_name)
+                }
+                changed = True
+        for model_name in set(models) - set(dir_mtimes):
+            del models[model_name]
+            changed = True
+        
+        if changed:
+            self._write_index()
+        return self._index
+    
+    def _update_index(self, model_name: str, version: str, summary: Optional[Dict[str, Any]]):
+        """Добавление (summary) или удаление (None) версии в индексе без пересканирования"""
+        model_dir = self.models_dir / model_name
+        entry = self._index["models"].setdefault(model_name, {"mtime_ns": None, "versions": {}})
+        if summary is None:
+            entry["versions"].pop(version, None)
+        else:
+            entry["versions"][version] = summary
+        entry["mtime_ns"] = model_dir.stat().st_mtime_ns if model_dir.exists() else None
+        self._write_index()
+    
+    def _scan_versions(self, model_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """Сводки всех версий модели по их metadata.json"""
+        versions = {}
+        for version_dir in model_dir.iterdir():
+            if version_dir.is_dir() and version_dir.name != "latest":
+                metadata_file = version_dir / "metadata.json"
+                if metadata_file.exists():
+                    with open(metadata_file, 'r', encoding='utf-8') as f:
+                        versions[version_dir.name] = _version_summary(json.load(f))
+        return versions
+    
+    @staticmethod
+    def _read_index(index_file: Path) -> Dict[str, Any]:
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Нет индекса или он повреждён - будет построен заново
+            return {"models": {}}
+    
+    def _write_index(self):
+        """
+        Атомарная запись индекса (читатели в других процессах не видят половину файла)
+        
+        Реестр может быть смонтирован только для чтения: тогда индекс
+        остаётся в памяти, а список моделей работает как раньше.
+        """
+        index_file = self.models_dir / REGISTRY_INDEX
+        tmp_file = index_file.with_name(f"{REGISTRY_INDEX}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp_file, index_file)
+        except OSError as e:
+            if not self._index_read_only:
+                logger.warning(f"⚠️ Индекс реестра не записан, используется индекс в памяти: {e}")
+                self._index_read_only = True
+            try:
+                tmp_file.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return
+        self._index_mtime = index_file.stat().st_mtime_ns
+    
     def get_current_model_info(self) -> Optional[Dict[str, Any]]:
         """Получение информации о текущей загруженной модели"""
         if self.current_model is None:
@@ -0,0 +1,159 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+
+settings = get_settings()
+logger = setup_logger("model_pool", settings.LOG_LEVEL)
+
+PoolKey = Tuple[str, str]
+
+def bundle_size_bytes(model) -> int:
+    """Объём параметров и буферов модели в байтах"""
+    return sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in (*model.parameters(), *model.buffers())
+    )
+
+class ModelPool:
+    """
+    Пул загруженных версий моделей с вытеснением LRU
+    
+    Держит до max_models версий в пределах memory_budget_mb. Версия
+    загружается при первом обращении, при переполнении вытесняются
+    давно не использованные. Запросы, уже взявшие вытесненный бандл,
+    дорабатывают на нём - память освобождается вместе с последней ссылкой.
+    Закреплённые версии (варианты A/B) не вытесняются.
+    """
+    
+    def __init__(
+        self,
+        loader: Callable[[str, str], Any],
+        max_models: Optional[int] = None,
+        memory_budget_mb: Optional[float] = None,
+        on_evict: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Args:
+            loader: Загрузка бандла по (model_name, version)
+            max_models: Максимум версий в пуле
+            memory_budget_mb: Бюджет памяти на веса (0 - без ограничения)
+            on_evict: Вызывается для вытесненного бандла (очистка кеша)
+        """
+        self.loader = loader
+        self.max_models = max_models if max_models is not None else settings.MODEL_POOL_SIZE
+        self.memory_budget_mb = (
+            memory_budget_mb if memory_budget_mb is not None else settings.MODEL_POOL_MEMORY_MB
+        )
+        self.on_evict = on_evict
+        self._bundles: "OrderedDict[PoolKey, Any]" = OrderedDict()
+        self._loading: Dict[PoolKey, Future] = {}
+        self._pinned: Set[PoolKey] = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+    
+    def get(self, model_name: str, version: str) -> Any:
+        """Бандл версии (загружается при отсутствии в пуле)"""
+        key = (model_name, version)
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is not None:
+                self._bundles.move_to_end(key)
+                self.stats['hits'] += 1
+                return bundle
+            
+            # Параллельные запросы одной версии ждут одну загрузку
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = Future()
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            return loading.result()
+        
+        # Загрузка с диска - без блокировки: попадания в другие версии не ждут
+        try:
+            bundle = self.loader(model_name, version)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        
+        with self._lock:
+            del self._loading[key]
+            self._bundles[key] = bundle
+            self.stats['loads'] += 1
+            logger.info(
+                f"📦 В пул загружена модель {model_name}/{version} "
+                f"({bundle.size_bytes / 1024 ** 2:.1f} МБ)"
+            )
+            evicted = self._evict(keep=key)
+        loading.set_result(bundle)
+        
+        for old in evicted:
+            if self.on_evict is not None:
+                self.on_evict(old)
+        return bundle
+    
+    def peek(self, model_name: str, version: str) -> Optional[Any]:
+        """Бандл, если версия уже в пуле (без загрузки и смены порядка LRU)"""
+        return self._bundles.get((model_name, version))
+    
+    def pin(self, keys: Iterable[PoolKey]):
+        """Закрепление версий (заменяет прежний набор): LRU их не вытесняет"""
+        with self._lock:
+            self._pinned = set(keys)
+    
+    def _evict(self, keep: PoolKey) -> List[Any]:
+        """Вытеснение LRU сверх лимитов (загруженная версия keep и закреплённые остаются)"""
+        evicted = []
+        for key in [key for key in self._bundles if key != keep and key not in self._pinned]:
+            if not (
+                len(self._bundles) > self.max_models
+                or (self.memory_budget_mb and self.memory_mb() > self.memory_budget_mb)
+            ):
+                break
+            model_name, version = key
+            bundle = self._bundles.pop(key)
+            self.stats['evictions'] += 1
+            evicted.append(bundle)
+            logger.info(f"♻️ Модель {model_name}/{version} вытеснена из пула")
+        return evicted
+    
+    def memory_mb(self) -> float:
+        """Объём весов версий в пуле, МБ"""
+        return sum(bundle.size_bytes for bundle in self._bundles.values()) / 1024 ** 2
+    
+    def clear(self):
+        """Выгрузка всех версий"""
+        with self._lock:
+            evicted = list(self._bundles.values())
+            self._bundles.clear()
+        for old in evicted:
+            if self.on_evict is not None:
+                self.on_evict(old)
+    
+    def get_info(self) -> Dict[str, Any]:
+        """Состояние пула (от давно использованных к недавним)"""
+        return {
+            "models": [
+                {
+                    "model_name": bundle.model_name,
+                    "version": bundle.version,
+                    "size_mb": round(bundle.size_bytes / 1024 ** 2, 2),
+                    "in_flight": bundle.in_flight.count,
+                    "pinned": key in self._pinned
+                }
+                for key, bundle in list(self._bundles.items())
+            ],
+            "max_models": self.max_models,
+            "memory_mb": round(self.memory_mb(), 2),
+            "memory_budget_mb": self.memory_budget_mb,
+            **self.stats
+        }
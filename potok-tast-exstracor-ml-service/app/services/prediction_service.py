@@ -1,14 +1,23 @@
+import asyncio
+import itertools
+import threading
+import time
+import zlib
+import orjson
 import torch
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 from app.config.settings import get_settings
 from app.utils.logger import setup_logger
 from app.utils.exceptions import ModelNotLoadedException, PredictionException
 from app.services.model_manager import ModelManager
+from app.services.model_pool import ModelPool, bundle_size_bytes
+from app.services.shadow_service import ShadowEvaluator
+from app.utils import metrics as prom
 from app.core.rules_engine import ParsingRulesEngine
 from app.schemas.task import TaskResponse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 settings = get_settings()
 logger = setup_logger("prediction_service", settings.LOG_LEVEL)
@@ -27,82 +36,518 @@ class TaskInfo:
     status: str
     confidence: float = 0.0
 
+@dataclass(frozen=True)
+class CacheEntry:
+    """
+    Запись кеша: результат и заранее закодированное тело ответа
+    
+    body - JSON TaskResponse, оборванный перед значением processed_at:
+    при попадании в кеш остаётся дописать время и BODY_SUFFIX.
+    """
+    info: TaskInfo
+    body: bytes
+
+BODY_SUFFIX = b'"}'
+
+# Поля TaskInfo в колоночном ответе бинарного протокола
+COLUMNS = (
+    "name", "description", "priority", "deadline", "execution_time",
+    "category", "difficulty", "stages", "status", "confidence"
+)
+
+# Текст для проверочного прогона новой модели перед подменой
+VALIDATION_TEXT = "Проверить загрузку модели до пятницы"
+
+class InFlightCounter:
+    """Счётчик запросов, выполняющихся на версии модели"""
+    
+    def __init__(self):
+        self._count = 0
+        self._idle = threading.Condition()
+    
+    def __enter__(self):
+        with self._idle:
+            self._count += 1
+        return self
+    
+    def __exit__(self, *exc):
+        with self._idle:
+            self._count -= 1
+            if self._count == 0:
+                self._idle.notify_all()
+    
+    @property
+    def count(self) -> int:
+        return self._count
+    
+    def wait_idle(self, timeout: float) -> bool:
+        """Ожидание завершения всех запросов (False - по таймауту)"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._count == 0, timeout)
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Загруженная версия модели
+    
+    Не изменяется после создания: сервис подменяет бандл целиком одним
+    присваиванием, поэтому запрос всегда видит модель, словарь и энкодеры
+    одной версии.
+    """
+    model_name: str
+    version: str
+    model: Any
+    vocab: Any
+    encoders: Dict[str, Any]
+    generation: int
+    size_bytes: int = 0
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    in_flight: InFlightCounter = field(default_factory=InFlightCounter, compare=False, repr=False)
+
 class PredictionService:
     """Сервис предсказаний на основе обученной модели"""
     
     def __init__(self):
         self.model_manager = ModelManager()
-        self.model = None
-        self.vocab = None
-        self.encoders = None
+        self._bundle: Optional[ModelBundle] = None
+        self._generations = itertools.count(1)
+        # Загрузки выполняются по одной, предсказания их не ждут
+        self._load_lock = threading.Lock()
         self.rules_engine = ParsingRulesEngine()
-        self._cache: Dict[int, TaskInfo] = {}
+        # Ключ - (поколение бандла, хеш текста): статус зависит от версии модели
+        self._cache: Dict[Tuple[int, int], CacheEntry] = {}
+        # Проверка версии и запись в кеш - одним шагом с удалением записей версии
+        self._cache_lock = threading.Lock()
+        # Дополнительные версии для запросов с явной моделью и A/B
+        self.pool = ModelPool(loader=self._build_bundle, on_evict=self._purge_cache)
+        # Варианты A/B: (model_name, version, weight), версии зафиксированы
+        self._routing: Tuple[Tuple[str, str, float], ...] = ()
+        # Теневой прогон кандидата на выборке запросов
+        self.shadow: Optional[ShadowEvaluator] = None
         self.metrics = {
             'predictions': 0,
             'cache_hits': 0,
             'errors': 0
         }
+        # Запросы выполняются и в event loop, и в потоках (to_thread, shadow)
+        self._metrics_lock = threading.Lock()
         self.device = settings.DEVICE
     
+    @property
+    def bundle(self) -> Optional[ModelBundle]:
+        """Текущая версия модели"""
+        return self._bundle
+    
+    @property
+    def model(self):
+        return self._bundle.model if self._bundle else None
+    
+    @property
+    def vocab(self):
+        return self._bundle.vocab if self._bundle else None
+    
+    @property
+    def encoders(self):
+        return self._bundle.encoders if self._bundle else None
+    
+    @property
+    def model_name(self) -> Optional[str]:
+        return self._bundle.model_name if self._bundle else None
+    
     def load_model(
         self,
         model_name: Optional[str] = None,
         version: Optional[str] = None
-    ):
-        """Загрузка модели для предсказаний"""
+    ) -> ModelBundle:
+        """
+        Загрузка модели для предсказаний без остановки обслуживания
+        
+        Новая версия загружается и проверяется, пока запросы обслуживает
+        текущая; затем бандл подменяется одним присваиванием. Старая версия
+        освобождается после завершения начатых на ней запросов, её записи
+        кеша удаляются.
+        """
         if model_name is None:
             model_name = settings.MODEL_NAME
         
-        try:
-            self.model, self.vocab, self.encoders = self.model_manager.load_model(
-                model_name=model_name,
-                version=version,
-                device=self.device
+        with self._load_lock:
+            try:
+                bundle = self._build_bundle(model_name, version)
+            except Exception as e:
+                logger.error(f"❌ Ошибка загрузки модели: {e}")
+                raise ModelNotLoadedException(f"Не удалось загрузить модель: {e}")
+            
+            previous, self._bundle = self._bundle, bundle
+            prom.set_served_model(bundle.model_name, bundle.version)
+            self._update_weights_gauge()
+            logger.info(
+                f"✅ Модель загружена для предсказаний: {model_name}/{bundle.version}"
+            )
+            
+            if previous is not None:
+                self._retire(previous)
+        
+        return bundle
+    
+    async def load_model_async(
+        self,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> ModelBundle:
+        """Загрузка модели в потоке, не блокируя event loop"""
+        return await asyncio.to_thread(self.load_model, model_name, version)
+    
+    def _build_bundle(self, model_name: str, version: Optional[str]) -> ModelBundle:
+        """Загрузка версии и проверочный прогон"""
+        resolved = self.model_manager.resolve_version(model_name, version)
+        if resolved is None:
+            raise ModelNotLoadedException(
+                f"Модель {model_name}/{version or 'latest'} не найдена"
             )
-            logger.info(f"✅ Модель загружена для предсказаний: {model_name}")
+        
+        model, vocab, encoders = self.model_manager.load_model(
+            model_name=model_name,
+            version=resolved,
+            device=self.device
+        )
+        
+        model.eval()
+        with torch.no_grad():
+            encoded_text = torch.tensor(
+                vocab.encode(VALIDATION_TEXT), dtype=torch.long
+            ).unsqueeze(0).to(self.device)
+            outputs = model(encoded_text)
+        
+        expected_shape = (1, encoders['status'].num_classes)
+        if tuple(outputs.shape) != expected_shape:
+            raise ValueError(
+                f"выход модели {tuple(outputs.shape)} не совпадает с {expected_shape}"
+            )
+        if not torch.isfinite(outputs).all():
+            raise ValueError("выход модели содержит NaN/inf")
+        
+        return ModelBundle(
+            model_name=model_name,
+            version=resolved,
+            model=model,
+            vocab=vocab,
+            encoders=encoders,
+            generation=next(self._generations),
+            size_bytes=bundle_size_bytes(model)
+        )
+    
+    def _purge_cache(self, bundle: ModelBundle) -> int:
+        """Удаление записей кеша версии"""
+        with self._cache_lock:
+            stale = [key for key in list(self._cache) if key[0] == bundle.generation]
+            for key in stale:
+                self._cache.pop(key, None)
+            prom.CACHE_SIZE.set(len(self._cache))
+        self._update_weights_gauge()
+        return len(stale)
+    
+    def _update_weights_gauge(self):
+        """Объём весов основной модели и пула"""
+        bundle = self._bundle
+        prom.MODEL_WEIGHTS_BYTES.set(
+            (bundle.size_bytes if bundle else 0) + self.pool.memory_mb() * 1024 ** 2
+        )
+    
+    def _count(self, name: str):
+        """Потокобезопасное увеличение счётчика метрик"""
+        with self._metrics_lock:
+            self.metrics[name] += 1
+        prom.PREDICTIONS.labels(name).inc()
+    
+    def _retire(self, bundle: ModelBundle):
+        """Удаление записей кеша старой версии и ожидание её запросов"""
+        stale = self._purge_cache(bundle)
+        
+        start = time.perf_counter()
+        if not bundle.in_flight.wait_idle(settings.MODEL_SWAP_DRAIN_TIMEOUT):
+            logger.warning(
+                f"⚠️ {bundle.in_flight.count} запросов всё ещё выполняются на "
+                f"{bundle.model_name}/{bundle.version}"
+            )
+        logger.info(
+            f"♻️ Версия {bundle.model_name}/{bundle.version} выведена: "
+            f"{stale} записей кеша удалено, ожидание запросов "
+            f"{(time.perf_counter() - start) * 1000:.1f} мс"
+        )
+    
+    def get_model_info(self) -> Optional[Dict[str, Any]]:
+        """Информация о модели, обслуживающей предсказания"""
+        bundle = self._bundle
+        if bundle is None:
+            return None
+        
+        return {
+            "model_name": bundle.model_name,
+            "version": bundle.version,
+            "vocab_size": bundle.vocab.vocab_size,
+            "architecture": getattr(bundle.model, "architecture", None),
+            "device": next(bundle.model.parameters()).device.type,
+            "loaded_at": bundle.loaded_at.isoformat(),
+            "in_flight": bundle.in_flight.count
+        }
+    
+    def set_routing(self, variants: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Взвешенное A/B распределение запросов без явной модели
+        
+        Версии вариантов фиксируются (latest - на момент вызова),
+        загружаются в пул заранее и закрепляются в нём: запрос без явной
+        модели не загружает вариант с диска. Вариант выбирается по хешу текста,
+        поэтому повторный запрос попадает в ту же версию и в её кеш.
+        
+        Args:
+            variants: [{"model_name", "version", "weight"}]
+            
+        Returns:
+            Варианты с фактическими версиями
+        """
+        routing = []
+        for variant in variants:
+            bundle = self._get_bundle(variant['model_name'], variant.get('version'))
+            routing.append((bundle.model_name, bundle.version, float(variant['weight'])))
+        
+        self.pool.pin((name, version) for name, version, _ in routing)
+        self._routing = tuple(routing)
+        logger.info(
+            "🔀 A/B распределение: " + ", ".join(
+                f"{name}/{version}={weight:g}" for name, version, weight in routing
+            )
+        )
+        return self.get_routing()
+    
+    def clear_routing(self):
+        """Отключение A/B распределения"""
+        self._routing = ()
+        self.pool.pin(())
+        logger.info("🔀 A/B распределение отключено")
+    
+    def get_routing(self) -> List[Dict[str, Any]]:
+        """Текущие варианты A/B"""
+        return [
+            {"model_name": name, "version": version, "weight": weight}
+            for name, version, weight in self._routing
+        ]
+    
+    def _route(self, text: str) -> Tuple[str, str]:
+        """Выбор варианта A/B по хешу текста"""
+        routing = self._routing
+        total = sum(weight for _, _, weight in routing)
+        point = zlib.crc32(text.encode('utf-8')) / 2 ** 32 * total
+        for name, version, weight in routing:
+            point -= weight
+            if point < 0:
+                return name, version
+        return routing[-1][0], routing[-1][1]
+    
+    def _get_bundle(self, model_name: str, version: Optional[str]) -> ModelBundle:
+        """Бандл версии: основная модель или версия из пула"""
+        default = self._bundle
+        if version is None:
+            version = self.model_manager.resolve_version(model_name)
+            if version is None:
+                raise ModelNotLoadedException(f"Модель {model_name}/latest не найдена")
+        
+        if default is not None and (default.model_name, default.version) == (model_name, version):
+            return default
+        
+        try:
+            bundle = self.pool.get(model_name, version)
+            self._update_weights_gauge()
+            return bundle
+        except ModelNotLoadedException:
+            raise
         except Exception as e:
-            logger.error(f"❌ Ошибка загрузки модели: {e}")
+            logger.error(f"❌ Ошибка загрузки модели в пул: {e}")
             raise ModelNotLoadedException(f"Не удалось загрузить модель: {e}")
     
-    def predict(self, text: str) -> TaskResponse:
+    def select_bundle(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> ModelBundle:
+        """Версия для запроса: явно указанная, вариант A/B или основная"""
+        if model_name is None and self._routing:
+            model_name, version = self._route(text)
+        
+        if model_name is None:
+            bundle = self._bundle
+            if bundle is None:
+                raise ModelNotLoadedException("Модель не загружена")
+            return bundle
+        
+        return self._get_bundle(model_name, version)
+    
+    async def select_bundle_async(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> ModelBundle:
+        """select_bundle в потоке: версия может загружаться с диска"""
+        return await asyncio.to_thread(self.select_bundle, text, model_name, version)
+    
+    def _is_serving(self, bundle: ModelBundle) -> bool:
+        """Версия ещё обслуживает запросы (не подменена и не вытеснена)"""
+        return (
+            bundle is self._bundle
+            or self.pool.peek(bundle.model_name, bundle.version) is bundle
+        )
+    
+    def predict(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> TaskResponse:
         """
         Предсказание для одной задачи
         
         Args:
             text: Текст задачи
+            model_name: Модель (по умолчанию - основная или вариант A/B)
+            version: Версия (если None, latest)
             
         Returns:
             Структурированная информация о задаче
         """
-        if self.model is None:
-            raise ModelNotLoadedException("Модель не загружена")
+        entry, bundle = self._resolve(text, model_name, version)
+        return self._convert_to_response(entry.info, bundle)
+    
+    def predict_json(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> bytes:
+        """
+        Предсказание в виде готового JSON тела ответа
+        
+        При попадании в кеш объект ответа не строится и не кодируется:
+        к сохранённому телу дописывается только processed_at.
+        bundle - версия, уже выбранная select_bundle_async (вместо model_name/version).
+        """
+        entry, _ = self._resolve(text, model_name, version, bundle)
+        return entry.body + datetime.utcnow().isoformat().encode() + BODY_SUFFIX
+    
+    def predict_batch_json(
+        self,
+        texts: List[str],
+        model_name: Optional[str] = None,
+        version: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> bytes:
+        """Пакетное предсказание в виде готового JSON тела BatchTaskResponse"""
+        prom.BATCH_SIZE.observe(len(texts))
+        processed_at = datetime.utcnow().isoformat().encode()
+        bodies = []
+        for text in texts:
+            try:
+                entry, _ = self._resolve(text, model_name, version, bundle)
+                bodies.append(entry.body + processed_at + BODY_SUFFIX)
+            except Exception as e:
+                logger.error(f"Ошибка в пакетном предсказании: {e}")
+                continue
+        
+        return b"".join((
+            b'{"results":[', b",".join(bodies),
+            b'],"total":%d,"successful":%d,"failed":%d,"processed_at":"' % (
+                len(texts), len(bodies), len(texts) - len(bodies)
+            ),
+            processed_at, BODY_SUFFIX
+        ))
+    
+    def predict_columns(
+        self,
+        texts: List[str],
+        model_name: Optional[str] = None,
+        version: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> Dict[str, Any]:
+        """
+        Пакетное предсказание в колоночном виде (для бинарного протокола)
+        
+        Каждое поле - список значений по успешно обработанным текстам,
+        index - их позиции во входном списке. Имена полей не повторяются
+        для каждой задачи, объекты ответа не строятся.
+        """
+        prom.BATCH_SIZE.observe(len(texts))
+        columns: Dict[str, List[Any]] = {field: [] for field in COLUMNS}
+        index, model_names, model_versions = [], [], []
+        for i, text in enumerate(texts):
+            try:
+                entry, served = self._resolve(text, model_name, version, bundle)
+            except Exception as e:
+                logger.error(f"Ошибка в пакетном предсказании: {e}")
+                continue
+            
+            info = entry.info
+            for field, values in columns.items():
+                values.append(getattr(info, field))
+            index.append(i)
+            model_names.append(served.model_name)
+            model_versions.append(served.version)
+        
+        return {
+            "index": index,
+            **columns,
+            "model_name": model_names,
+            "model_version": model_versions,
+            "total": len(texts),
+            "successful": len(index),
+            "failed": len(texts) - len(index),
+            "processed_at": datetime.utcnow().isoformat()
+        }
+    
+    def _resolve(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        version: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> Tuple[CacheEntry, ModelBundle]:
+        """Запись кеша для текста (при промахе - предсказание)"""
+        # Весь запрос выполняется на одном бандле, даже если модель подменят
+        if bundle is None:
+            bundle = self.select_bundle(text, model_name, version)
         
         # Проверка кеша
-        cache_key = hash(text)
-        if cache_key in self._cache:
-            self.metrics['cache_hits'] += 1
-            cached_result = self._cache[cache_key]
-            return self._convert_to_response(cached_result)
+        cache_key = (bundle.generation, hash(text))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._count('cache_hits')
+            self._mirror(text, cached.info)
+            return cached, bundle
         
-        self.metrics['predictions'] += 1
+        self._count('predictions')
         
+        with bundle.in_flight:
+            return self._predict_with(bundle, text, cache_key), bundle
+    
+    def _predict_with(
+        self,
+        bundle: ModelBundle,
+        text: str,
+        cache_key: Tuple[int, int]
+    ) -> CacheEntry:
+        """Предсказание на конкретной версии модели"""
         try:
             # Извлечение признаков с помощью правил
+            start = time.perf_counter()
             task_features = self._extract_features_from_rules(text)
+            prom.RULES_SECONDS.observe(time.perf_counter() - start)
             
             # Предсказание статуса нейросетью
-            self.model.eval()
-            with torch.no_grad():
-                encoded_text = torch.tensor(
-                    self.vocab.encode(text),
-                    dtype=torch.long
-                ).unsqueeze(0).to(self.device)
-                
-                outputs = self.model(encoded_text)
-                probabilities = torch.softmax(outputs, dim=1)
-                status_idx = outputs.argmax(dim=1).item()
-                confidence = probabilities[0, status_idx].item()
-                status = self.encoders['status'].decode(status_idx)
+            start = time.perf_counter()
+            status, confidence = self._classify(bundle, text)
+            latency_ms = (time.perf_counter() - start) * 1000
+            prom.FORWARD_SECONDS.labels(bundle.model_name).observe(latency_ms / 1000)
             
             # Объединение результатов
             result = TaskInfo(
@@ -118,30 +563,113 @@ class PredictionService:
                 confidence=confidence
             )
             
-            # Сохранение в кеш
-            self._cache[cache_key] = result
+            # Валидация схемы ответа - один раз, при промахе кеша
+            response = self._convert_to_response(result, bundle)
+            entry = CacheEntry(
+                info=result,
+                body=orjson.dumps(
+                    response.model_dump(mode="json", exclude={"processed_at"})
+                )[:-1] + b',"processed_at":"'
+            )
+            
+            # Сохранение в кеш (если версию ещё не подменили и не вытеснили).
+            # Подмена сначала снимает версию, затем чистит кеш под той же
+            # блокировкой - запись не переживёт удаление записей версии
+            with self._cache_lock:
+                if self._is_serving(bundle):
+                    self._cache[cache_key] = entry
+                    prom.CACHE_SIZE.set(len(self._cache))
             
-            return self._convert_to_response(result)
+            self._mirror(text, result, latency_ms)
+            return entry
             
         except Exception as e:
-            self.metrics['errors'] += 1
+            self._count('errors')
             logger.error(f"❌ Ошибка предсказания: {e}")
             raise PredictionException(f"Ошибка при предсказании: {str(e)}")
     
-    def predict_batch(self, texts: List[str]) -> List[TaskResponse]:
+    def _classify(self, bundle: ModelBundle, text: str) -> Tuple[str, float]:
+        """Статус и уверенность модели версии"""
+        with torch.no_grad():
+            encoded_text = torch.tensor(
+                bundle.vocab.encode(text),
+                dtype=torch.long
+            ).unsqueeze(0).to(self.device)
+            
+            outputs = bundle.model(encoded_text)
+            probabilities = torch.softmax(outputs, dim=1)
+            status_idx = outputs.argmax(dim=1).item()
+            confidence = probabilities[0, status_idx].item()
+        return bundle.encoders['status'].decode(status_idx), confidence
+    
+    def _mirror(self, text: str, result: TaskInfo, latency_ms: Optional[float] = None):
+        """Копирование запроса в теневой прогон (не блокирует запрос)"""
+        shadow = self.shadow
+        if shadow is not None:
+            shadow.submit(text, result.status, result.confidence, latency_ms)
+    
+    def start_shadow(
+        self,
+        model_name: str,
+        version: Optional[str] = None,
+        sample_rate: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Запуск теневого прогона кандидата
+        
+        Кандидат загружается отдельно от пула и не обслуживает запросы;
+        предыдущий теневой прогон останавливается.
+        """
+        try:
+            candidate = self._build_bundle(model_name, version)
+        except ModelNotLoadedException:
+            raise
+        except Exception as e:
+            raise ModelNotLoadedException(f"Не удалось загрузить кандидата: {e}")
+        
+        self.stop_shadow()
+        self.shadow = ShadowEvaluator(
+            candidate,
+            classify=self._classify,
+            sample_rate=settings.SHADOW_SAMPLE_RATE if sample_rate is None else sample_rate
+        )
+        logger.info(
+            f"👥 Теневой прогон: {candidate.model_name}/{candidate.version}, "
+            f"выборка {self.shadow.sample_rate:.0%}"
+        )
+        return self.shadow.get_stats()
+    
+    def stop_shadow(self) -> Optional[Dict[str, Any]]:
+        """Остановка теневого прогона (итоговая статистика)"""
+        shadow, self.shadow = self.shadow, None
+        if shadow is None:
+            return None
+        shadow.stop()
+        logger.info(f"👥 Теневой прогон {shadow.candidate.model_name}/{shadow.candidate.version} остановлен")
+        return shadow.get_stats()
+    
+    def predict_batch(
+        self,
+        texts: List[str],
+        model_name: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> List[TaskResponse]:
         """
         Пакетное предсказание
         
         Args:
             texts: Список текстов задач
+            model_name: Модель (по умолчанию - основная или вариант A/B)
+            version: Версия (если None, latest)
             
         Returns:
             Список предсказаний
         """
+        prom.BATCH_SIZE.observe(len(texts))
         results = []
         for text in texts:
             try:
-                result = self.predict(text)
+                result = self.predict(text, model_name, version)
                 results.append(result)
             except Exception as e:
                 logger.error(f"Ошибка в пакетном предсказании: {e}")
@@ -163,7 +691,7 @@ class PredictionService:
             'stages': self.rules_engine.extract_stages(text)
         }
     
-    def _convert_to_response(self, task_info: TaskInfo) -> TaskResponse:
+    def _convert_to_response(self, task_info: TaskInfo, bundle: ModelBundle) -> TaskResponse:
         """Конвертация внутренней структуры в API response"""
         return TaskResponse(
             name=task_info.name,
@@ -176,21 +704,34 @@ class PredictionService:
             stages=task_info.stages,
             status=task_info.status,
             confidence=task_info.confidence,
+            model_name=bundle.model_name,
+            model_version=bundle.version,
             processed_at=datetime.utcnow()
         )
     
     def get_metrics(self) -> Dict[str, Any]:
         """Получение метрик сервиса"""
+        bundle = self._bundle
         return {
-            **self.metrics,
+            **self._metrics_snapshot(),
             'cache_size': len(self._cache),
-            'vocab_size': self.vocab.vocab_size if self.vocab else 0,
-            'model_loaded': self.model is not None
+            'vocab_size': bundle.vocab.vocab_size if bundle else 0,
+            'model_loaded': bundle is not None,
+            'model_name': bundle.model_name if bundle else None,
+            'model_version': bundle.version if bundle else None,
+            'pool': self.pool.get_info(),
+            'routing': self.get_routing()
         }
     
+    def _metrics_snapshot(self) -> Dict[str, int]:
+        with self._metrics_lock:
+            return dict(self.metrics)
+    
     def clear_cache(self) -> int:
         """Очистка кеша"""
-        cache_size = len(self._cache)
-        self._cache.clear()
+        with self._cache_lock:
+            cache_size = len(self._cache)
+            self._cache.clear()
+            prom.CACHE_SIZE.set(0)
         logger.info(f"🧹 Кеш очищен: {cache_size} записей")
         return cache_size
@@ -0,0 +1,188 @@
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+from app.utils.metrics import QUEUE_WAIT_SECONDS
+
+settings = get_settings()
+logger = setup_logger("shadow_service", settings.LOG_LEVEL)
+
+# Последних замеров задержки для перцентилей
+LATENCY_WINDOW = 2000
+CONFIDENCE_BINS = 10
+
+def _percentiles(values) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": None, "p95": None, "p99": None}
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+class _ConfidenceStats:
+    """Распределение уверенности: среднее и гистограмма по десятым"""
+    
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.histogram = [0] * CONFIDENCE_BINS
+    
+    def add(self, confidence: float):
+        self.total += confidence
+        self.count += 1
+        self.histogram[min(CONFIDENCE_BINS - 1, int(confidence * CONFIDENCE_BINS))] += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "histogram": list(self.histogram)
+        }
+
+class ShadowEvaluator:
+    """
+    Теневой прогон модели-кандидата на живом трафике
+    
+    Выборка запросов копируется в ограниченную очередь, фоновый поток
+    прогоняет их через кандидата и сравнивает с ответом основной модели.
+    Запрос не ждёт кандидата: при заполненной очереди работа отбрасывается.
+    """
+    
+    def __init__(
+        self,
+        candidate,
+        classify: Callable[[Any, str], Tuple[str, float]],
+        sample_rate: float = 0.1,
+        queue_size: Optional[int] = None
+    ):
+        """
+        Args:
+            candidate: Бандл модели-кандидата
+            classify: Предсказание статуса (bundle, text) -> (status, confidence)
+            sample_rate: Доля копируемых запросов
+            queue_size: Размер очереди (по умолчанию SHADOW_QUEUE_SIZE)
+        """
+        self.candidate = candidate
+        self.classify = classify
+        self.sample_rate = sample_rate
+        self.started_at = datetime.utcnow()
+        self._queue: "queue.Queue" = queue.Queue(
+            maxsize=queue_size or settings.SHADOW_QUEUE_SIZE
+        )
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._disagreements = Counter()
+        self._confidence = {"primary": _ConfidenceStats(), "candidate": _ConfidenceStats()}
+        self._latency: Dict[str, Deque[float]] = {
+            "primary": deque(maxlen=LATENCY_WINDOW),
+            "candidate": deque(maxlen=LATENCY_WINDOW)
+        }
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="shadow-inference", daemon=True)
+        self._worker.start()
+    
+    def submit(
+        self,
+        text: str,
+        primary_status: str,
+        primary_confidence: float,
+        primary_latency_ms: Optional[float] = None
+    ) -> bool:
+        """Копирование запроса кандидату (False - не попал в выборку или отброшен)"""
+        if self._stopped.is_set() or random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait(
+                (time.perf_counter(), text, primary_status, primary_confidence, primary_latency_ms)
+            )
+        except queue.Full:
+            with self._lock:
+                self._counters['dropped'] += 1
+            return False
+        with self._lock:
+            self._counters['mirrored'] += 1
+        return True
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            enqueued_at, *request = item
+            QUEUE_WAIT_SECONDS.labels("shadow").observe(time.perf_counter() - enqueued_at)
+            self._evaluate(*request)
+    
+    def _evaluate(
+        self,
+        text: str,
+        primary_status: str,
+        primary_confidence: float,
+        primary_latency_ms: Optional[float]
+    ):
+        start = time.perf_counter()
+        try:
+            with self.candidate.in_flight:
+                status, confidence = self.classify(self.candidate, text)
+        except Exception as e:
+            with self._lock:
+                self._counters['errors'] += 1
+            logger.warning(f"⚠️ Ошибка теневого предсказания: {e}")
+            return
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        with self._lock:
+            self._counters['completed'] += 1
+            if status == primary_status:
+                self._counters['agreed'] += 1
+            else:
+                self._disagreements[f"{primary_status} -> {status}"] += 1
+            self._confidence["primary"].add(primary_confidence)
+            self._confidence["candidate"].add(confidence)
+            self._latency["candidate"].append(latency_ms)
+            if primary_latency_ms is not None:
+                self._latency["primary"].append(primary_latency_ms)
+    
+    def stop(self, timeout: float = 5.0):
+        """Остановка фонового потока (необработанные запросы отбрасываются)"""
+        self._stopped.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._worker.join(timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Согласие с основной моделью, уверенность и задержка кандидата"""
+        with self._lock:
+            completed = self._counters['completed']
+            return {
+                "candidate": {
+                    "model_name": self.candidate.model_name,
+                    "version": self.candidate.version
+                },
+                "sample_rate": self.sample_rate,
+                "started_at": self.started_at.isoformat(),
+                "active": not self._stopped.is_set(),
+                "mirrored": self._counters['mirrored'],
+                "completed": completed,
+                "dropped": self._counters['dropped'],
+                "errors": self._counters['errors'],
+                "queue_size": self._queue.qsize(),
+                "agreement_rate": (
+                    round(self._counters['agreed'] / completed, 4) if completed else None
+                ),
+                "disagreements": dict(self._disagreements.most_common(20)),
+                "confidence": {
+                    name: stats.summary() for name, stats in self._confidence.items()
+                },
+                "latency_ms": {
+                    name: _percentiles(values) for name, values in self._latency.items()
+                }
+            }
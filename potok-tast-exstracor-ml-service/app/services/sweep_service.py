@@ -0,0 +1,387 @@
+import asyncio
+import itertools
+import queue
+import random
+import shutil
+import statistics
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+import torch.multiprocessing as torch_mp
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import Subset
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+from app.utils.exceptions import InsufficientDataException, TrainingException
+from app.core.models import StatusNet
+from app.core.dataset import TaskDataset, create_batch_loader
+from app.core.vocabulary import create_vocabulary
+from app.services.model_manager import ModelManager
+from app.services.training_service import TrainingService
+from app.schemas.training import TrainingStatus, TrainingProgress
+
+settings = get_settings()
+logger = setup_logger("sweep_service", settings.LOG_LEVEL)
+
+SEARCH_SPACE_KEYS = ("learning_rate", "batch_size", "embedding_dim", "hidden_dim")
+
+def build_trials(
+    search_space: Dict[str, List[Any]],
+    max_trials: Optional[int] = None,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Конфигурации перебора: полная сетка или случайная выборка из неё
+    
+    Не заданные в search_space параметры берутся из настроек.
+    """
+    defaults = {
+        "learning_rate": [settings.DEFAULT_LEARNING_RATE],
+        "batch_size": [settings.DEFAULT_BATCH_SIZE],
+        "embedding_dim": [settings.EMBEDDING_DIM],
+        "hidden_dim": [settings.HIDDEN_DIM]
+    }
+    values = [search_space.get(key) or defaults[key] for key in SEARCH_SPACE_KEYS]
+    grid = [dict(zip(SEARCH_SPACE_KEYS, combo)) for combo in itertools.product(*values)]
+    
+    if max_trials is not None and max_trials < len(grid):
+        grid = random.Random(seed).sample(grid, max_trials)
+    return grid
+
+def _run_trial(
+    trial_id: int,
+    config: Dict[str, Any],
+    text_ids: torch.Tensor,
+    statuses: torch.Tensor,
+    train_indices: List[int],
+    val_indices: List[int],
+    vocab_size: int,
+    num_classes: int,
+    epochs: int,
+    work_dir: str,
+    events: "torch_mp.Queue",
+    stop: Any,
+    num_threads: int
+):
+    """
+    Процесс одного испытания
+    
+    Тензоры датасета приходят из разделяемой памяти родителя - испытание
+    не токенизирует данные заново. После каждой эпохи val loss отправляется
+    родителю; установленный родителем stop означает, что испытание отсечено.
+    """
+    torch.set_num_threads(num_threads)
+    try:
+        service = TrainingService()
+        dataset = TaskDataset.from_tensors(text_ids, statuses)
+        train_loader = create_batch_loader(
+            Subset(dataset, train_indices), config["batch_size"], shuffle=True, num_workers=0
+        )
+        val_loader = create_batch_loader(
+            Subset(dataset, val_indices), config["batch_size"], shuffle=False, num_workers=0
+        )
+        
+        model = StatusNet(
+            vocab_size=vocab_size,
+            embedding_dim=config["embedding_dim"],
+            hidden_dim=config["hidden_dim"],
+            num_statuses=num_classes,
+            pooling=settings.STATUSNET_POOLING
+        ).to(service.device)
+        optimizer = optim.Adam(model.parameters(), lr=config["learning_rate"])
+        criterion = nn.CrossEntropyLoss()
+        
+        best_loss = float('inf')
+        best_epoch = 0
+        summary = {}
+        for epoch in range(epochs):
+            service._train_epoch(model, train_loader, optimizer, criterion)
+            val_loss = service._evaluate(model, val_loader, criterion)
+            if val_loss < best_loss:
+                best_loss, best_epoch = val_loss, epoch + 1
+                torch.save(model.state_dict(), Path(work_dir) / f"trial_{trial_id}.pth")
+            events.put(("epoch", trial_id, {"epoch": epoch + 1, "val_loss": val_loss}))
+            
+            summary = {"best_loss": best_loss, "best_epoch": best_epoch, "epochs": epoch + 1}
+            if stop.is_set():
+                events.put(("pruned", trial_id, summary))
+                return
+        
+        events.put(("completed", trial_id, summary))
+    except Exception as e:
+        events.put(("failed", trial_id, {"error": str(e)}))
+
+class SweepService:
+    """
+    Параллельный подбор гиперпараметров
+    
+    Словарь и тензоры датасета строятся один раз и разделяются между
+    процессами испытаний. Одновременно выполняется столько испытаний,
+    сколько позволяет бюджет CPU; отстающие испытания отсекаются по
+    медианному правилу, лучшая модель регистрируется через ModelManager.
+    """
+    
+    def __init__(self):
+        self.model_manager = ModelManager()
+        self._ctx = torch_mp.get_context("spawn")
+    
+    async def run_sweep(
+        self,
+        training_examples: List[Dict[str, Any]],
+        trials: Optional[List[Dict[str, Any]]] = None,
+        search_space: Optional[Dict[str, List[Any]]] = None,
+        max_trials: Optional[int] = None,
+        epochs: int = 10,
+        model_name: Optional[str] = None,
+        max_parallel: Optional[int] = None,
+        cpu_budget: Optional[int] = None,
+        prune_warmup_epochs: Optional[int] = None,
+        tokenizer: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        training_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Подбор гиперпараметров
+        
+        Args:
+            training_examples: Примеры для обучения
+            trials: Готовый список конфигураций (иначе строится из search_space)
+            search_space: Значения learning_rate/batch_size/embedding_dim/hidden_dim
+            max_trials: Ограничение числа испытаний (случайная выборка из сетки)
+            epochs: Эпох на испытание
+            model_name: Имя модели для лучшего результата
+            max_parallel: Испытаний одновременно
+            cpu_budget: Потоков torch на весь перебор
+            prune_warmup_epochs: Эпох до начала отсечения
+            tokenizer: Тип токенизатора (vocab/hashing)
+            progress_callback: Callback прогресса (по завершённым испытаниям)
+            training_id: Идентификатор задания
+        
+        Returns:
+            Результат перебора с лучшей конфигурацией и версией модели
+        """
+        training_id = training_id or str(uuid.uuid4())
+        start_time = datetime.utcnow()
+        
+        if len(training_examples) < 10:
+            raise InsufficientDataException(
+                "Недостаточно данных для обучения (минимум 10 примеров)"
+            )
+        
+        trials = trials or build_trials(search_space or {}, max_trials)
+        model_name = model_name or f"{settings.MODEL_NAME}_{start_time.strftime('%Y%m%d')}"
+        cpu_budget = cpu_budget or torch.get_num_threads()
+        parallel = max(1, min(max_parallel or settings.SWEEP_MAX_PARALLEL, len(trials), cpu_budget))
+        num_threads = max(1, cpu_budget // parallel)
+        if prune_warmup_epochs is None:
+            prune_warmup_epochs = settings.SWEEP_PRUNE_WARMUP_EPOCHS
+        
+        logger.info(
+            f"🔬 Подбор гиперпараметров: {len(trials)} испытаний, "
+            f"{parallel} параллельно по {num_threads} потоков"
+        )
+        
+        work_dir = Path(settings.CHECKPOINT_DIR) / f"sweep_{training_id}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        
+        progress = TrainingProgress(
+            training_id=training_id,
+            status=TrainingStatus.IN_PROGRESS,
+            current_epoch=0,
+            total_epochs=len(trials),
+            elapsed_time_seconds=0
+        )
+        
+        try:
+            # Токенизация один раз на весь перебор
+            helper = TrainingService()
+            vocab = create_vocabulary(
+                tokenizer or settings.TOKENIZER,
+                num_buckets=settings.HASH_BUCKETS,
+                ngram_range=(settings.HASH_NGRAM_MIN, settings.HASH_NGRAM_MAX),
+                min_freq=settings.VOCAB_MIN_FREQ,
+                max_size=settings.VOCAB_MAX_SIZE,
+                normalize=settings.VOCAB_NORMALIZE
+            )
+            encoders = helper._prepare_encoders(training_examples)
+            dataset = helper._prepare_dataset(training_examples, vocab, encoders).share_memory()
+            
+            val_size = max(1, int(len(dataset) * 0.1))
+            permutation = torch.randperm(
+                len(dataset), generator=torch.Generator().manual_seed(zlib.crc32(training_id.encode()))
+            ).tolist()
+            val_indices, train_indices = permutation[:val_size], permutation[val_size:]
+            
+            results = await self._schedule(
+                trials,
+                args=(
+                    dataset.text_ids, dataset.statuses, train_indices, val_indices,
+                    vocab.vocab_size, encoders['status'].num_classes, epochs, str(work_dir)
+                ),
+                parallel=parallel,
+                num_threads=num_threads,
+                prune_warmup_epochs=prune_warmup_epochs,
+                progress=progress,
+                progress_callback=progress_callback,
+                start_time=start_time
+            )
+            
+            completed = [r for r in results if r["status"] == "completed"]
+            if not completed:
+                raise TrainingException("Ни одно испытание не завершилось успешно")
+            best = min(completed, key=lambda r: r["best_loss"])
+            
+            # Регистрация лучшей модели
+            model = StatusNet(
+                vocab_size=vocab.vocab_size,
+                embedding_dim=best["config"]["embedding_dim"],
+                hidden_dim=best["config"]["hidden_dim"],
+                num_statuses=encoders['status'].num_classes,
+                pooling=settings.STATUSNET_POOLING
+            )
+            model.load_state_dict(torch.load(work_dir / f"trial_{best['trial_id']}.pth"))
+            version = self.model_manager.save_model(
+                model=model,
+                vocab=vocab,
+                encoders=encoders,
+                model_name=model_name,
+                metadata={
+                    "training_id": training_id,
+                    "epochs": epochs,
+                    "batch_size": best["config"]["batch_size"],
+                    "learning_rate": best["config"]["learning_rate"],
+                    "tokenizer": tokenizer or settings.TOKENIZER,
+                    "total_examples": len(training_examples),
+                    "best_loss": best["best_loss"],
+                    "best_epoch": best["best_epoch"],
+                    "sweep": {
+                        "best_trial": best["trial_id"],
+                        "parallel": parallel,
+                        "threads_per_trial": num_threads,
+                        "trials": results
+                    }
+                }
+            )
+            
+            duration = (datetime.utcnow() - start_time).total_seconds()
+            logger.info(
+                f"✅ Подбор завершён: {model_name}/{version}, "
+                f"лучшая конфигурация {best['config']} (val loss {best['best_loss']:.4f})"
+            )
+            return {
+                "training_id": training_id,
+                "status": "completed",
+                "model_name": model_name,
+                "model_version": version,
+                "total_examples": len(training_examples),
+                "epochs_completed": len(results),
+                "final_loss": best["best_loss"],
+                "duration_seconds": int(duration),
+                "metrics": {
+                    "best_config": best["config"],
+                    "best_epoch": best["best_epoch"],
+                    "trials": len(results),
+                    "pruned": sum(1 for r in results if r["status"] == "pruned"),
+                    "failed": sum(1 for r in results if r["status"] == "failed"),
+                    "vocab_size": vocab.vocab_size
+                },
+                "trials": results
+            }
+        
+        except Exception as e:
+            logger.error(f"❌ Ошибка подбора гиперпараметров: {e}")
+            raise TrainingException(f"Ошибка подбора гиперпараметров: {str(e)}")
+        
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    async def _schedule(
+        self,
+        trials: List[Dict[str, Any]],
+        args: tuple,
+        parallel: int,
+        num_threads: int,
+        prune_warmup_epochs: int,
+        progress: TrainingProgress,
+        progress_callback: Optional[Callable],
+        start_time: datetime
+    ) -> List[Dict[str, Any]]:
+        """Запуск испытаний в пределах parallel и медианное отсечение"""
+        events = self._ctx.Queue()
+        pending = list(enumerate(trials))
+        running: Dict[int, tuple] = {}
+        # val loss лучших эпох испытаний: epoch -> {trial_id: best_so_far}
+        epoch_bests: Dict[int, Dict[int, float]] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+        
+        while pending or running:
+            while pending and len(running) < parallel:
+                trial_id, config = pending.pop(0)
+                stop = self._ctx.Event()
+                process = self._ctx.Process(
+                    target=_run_trial,
+                    args=(trial_id, config, *args, events, stop, num_threads),
+                    name=f"sweep-trial-{trial_id}",
+                    daemon=True
+                )
+                process.start()
+                running[trial_id] = (process, stop)
+            
+            try:
+                event, trial_id, payload = await asyncio.to_thread(events.get, True, 1.0)
+            except queue.Empty:
+                for trial_id, (process, _) in list(running.items()):
+                    if process.exitcode is not None and events.empty():
+                        running.pop(trial_id)
+                        results[trial_id] = {
+                            "trial_id": trial_id,
+                            "config": trials[trial_id],
+                            "status": "failed",
+                            "error": f"Процесс испытания завершился с кодом {process.exitcode}"
+                        }
+                continue
+            
+            if event == "epoch":
+                epoch = payload["epoch"]
+                previous = epoch_bests.get(epoch - 1, {}).get(trial_id, float('inf'))
+                best_so_far = min(previous, payload["val_loss"])
+                epoch_bests.setdefault(epoch, {})[trial_id] = best_so_far
+                
+                others = [loss for other, loss in epoch_bests[epoch].items() if other != trial_id]
+                if (
+                    epoch >= prune_warmup_epochs
+                    and len(others) >= 2
+                    and best_so_far > statistics.median(others)
+                    and trial_id in running
+                ):
+                    logger.info(f"✂️ Испытание {trial_id} отсечено на эпохе {epoch}")
+                    running[trial_id][1].set()
+                continue
+            
+            process, _ = running.pop(trial_id, (None, None))
+            if process is not None:
+                process.join(timeout=5)
+            results[trial_id] = {
+                "trial_id": trial_id,
+                "config": trials[trial_id],
+                "status": event,
+                **payload
+            }
+            
+            finished = [r for r in results.values() if r["status"] == "completed"]
+            progress.current_epoch = len(results)
+            progress.elapsed_time_seconds = int((datetime.utcnow() - start_time).total_seconds())
+            if finished:
+                best = min(finished, key=lambda r: r["best_loss"])
+                progress.best_loss = best["best_loss"]
+                progress.metrics = {"best_config": best["config"]}
+            if progress_callback:
+                await progress_callback(progress)
+        
+        return [results[trial_id] for trial_id in sorted(results)]
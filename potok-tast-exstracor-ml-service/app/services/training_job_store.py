@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+from app.schemas.training import TrainingStatus
+
+settings = get_settings()
+logger = setup_logger("training_job_store", settings.LOG_LEVEL)
+
+FINISHED_STATUSES = (
+    TrainingStatus.COMPLETED.value,
+    TrainingStatus.FAILED.value,
+    TrainingStatus.CANCELLED.value
+)
+
+class TrainingJobStore:
+    """
+    Персистентное хранилище заданий обучения (SQLite)
+    
+    Метаданные и история заданий лежат в jobs.db, примеры для обучения -
+    в отдельных JSON файлах рядом, пока задание не завершено.
+    """
+    
+    def __init__(self, jobs_dir: Optional[str] = None):
+        self.jobs_dir = Path(jobs_dir or settings.TRAINING_JOBS_DIR)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.jobs_dir / "jobs.db",
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                training_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                model_name TEXT,
+                total_epochs INTEGER NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+        )
+    
+    def create(
+        self,
+        training_id: str,
+        kind: str,
+        params: Dict[str, Any],
+        model_name: Optional[str],
+        total_epochs: int
+    ) -> Dict[str, Any]:
+        """Постановка задания в очередь"""
+        with open(self._params_path(training_id), 'w', encoding='utf-8') as f:
+            json.dump(params, f, ensure_ascii=False)
+        
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO jobs (training_id, kind, status, model_name, total_epochs, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    training_id, kind, TrainingStatus.PENDING.value,
+                    model_name, total_epochs, datetime.utcnow().isoformat()
+                )
+            )
+        return self.get(training_id)
+    
+    def get(self, training_id: str) -> Optional[Dict[str, Any]]:
+        """Получение задания по идентификатору"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE training_id = ?", (training_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def list(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """История заданий, новые первыми"""
+        query = "SELECT * FROM jobs"
+        args: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        
+        with self._lock:
+            rows = self._conn.execute(query, args + (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def next_pending(self) -> Optional[Dict[str, Any]]:
+        """Самое старое задание в очереди"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (TrainingStatus.PENDING.value,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def queue_position(self, training_id: str) -> Optional[int]:
+        """Позиция задания в очереди (1 - следующее на запуск)"""
+        job = self.get(training_id)
+        if not job or job['status'] != TrainingStatus.PENDING.value:
+            return None
+        with self._lock:
+            (ahead,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                (TrainingStatus.PENDING.value, job['created_at'])
+            ).fetchone()
+        return ahead + 1
+    
+    def load_params(self, training_id: str) -> Dict[str, Any]:
+        """Параметры и примеры задания"""
+        with open(self._params_path(training_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def mark_running(self, training_id: str):
+        """Задание запущено"""
+        self._update(
+            training_id,
+            status=TrainingStatus.IN_PROGRESS.value,
+            started_at=datetime.utcnow().isoformat()
+        )
+    
+    def update_progress(self, training_id: str, progress: Dict[str, Any]):
+        """Сохранение прогресса"""
+        self._update(training_id, progress=json.dumps(progress, ensure_ascii=False))
+    
+    def finish(
+        self,
+        training_id: str,
+        status: TrainingStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Завершение задания; примеры больше не нужны и удаляются"""
+        self._update(
+            training_id,
+            status=status.value,
+            result=json.dumps(result, ensure_ascii=False, default=str) if result else None,
+            error=error,
+            finished_at=datetime.utcnow().isoformat()
+        )
+        self._params_path(training_id).unlink(missing_ok=True)
+    
+    def requeue_interrupted(self) -> List[str]:
+        """Возврат в очередь заданий, прерванных остановкой сервиса"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT training_id FROM jobs WHERE status = ?",
+                (TrainingStatus.IN_PROGRESS.value,)
+            ).fetchall()
+            interrupted = [row['training_id'] for row in rows]
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (TrainingStatus.PENDING.value, TrainingStatus.IN_PROGRESS.value)
+            )
+        return interrupted
+    
+    def _update(self, training_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE training_id = ?",
+                (*fields.values(), training_id)
+            )
+    
+    def _params_path(self, training_id: str) -> Path:
+        return self.jobs_dir / f"{training_id}.json"
+    
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['progress'] = json.loads(job['progress']) if job['progress'] else None
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
@@ -0,0 +1,412 @@
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.utils.logger import setup_logger
+from app.schemas.training import TrainingStatus, TrainingProgress
+from app.services.training_job_store import FINISHED_STATUSES, TrainingJobStore
+from app.services.checkpoint_manager import CheckpointManager
+
+settings = get_settings()
+logger = setup_logger("training_jobs", settings.LOG_LEVEL)
+
+def _training_num_threads() -> int:
+    """Бюджет потоков torch для процесса обучения"""
+    if settings.TRAINING_NUM_THREADS > 0:
+        return settings.TRAINING_NUM_THREADS
+    return max(1, (os.cpu_count() or 1) // 2)
+
+def _terminate_job_process(process, timeout: float = 5.0):
+    """
+    Остановка процесса обучения вместе с его потомками
+    
+    Процесс обучения - лидер своей группы процессов, поэтому сигнал
+    группе доходит и до рангов DDP, испытаний перебора и воркеров
+    DataLoader. Иначе после terminate() они продолжили бы обучение.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        # Группа ещё не создана (процесс только запускается)
+        process.terminate()
+    process.join(timeout)
+    
+    # Потомки, пережившие SIGTERM
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    if process.is_alive():
+        process.join(timeout)
+
+def _run_training_job(
+    training_id: str,
+    kind: str,
+    params: Dict[str, Any],
+    events: "mp.Queue",
+    num_threads: int
+):
+    """
+    Точка входа процесса обучения
+    
+    Выполняется в отдельном процессе: свой интерпретатор, свой пул потоков
+    torch. Прогресс и результат отправляются в очередь событий родителю.
+    """
+    # Своя группа процессов: отмена останавливает и порождённые процессы
+    os.setpgrp()
+    
+    import torch
+    from app.services.training_service import TrainingService
+    from app.services.sweep_service import SweepService
+    
+    torch.set_num_threads(num_threads)
+    events.put(("started", training_id, {"pid": os.getpid()}))
+    
+    async def report(progress: TrainingProgress):
+        events.put(("progress", training_id, progress.model_dump(mode="json")))
+    
+    try:
+        service = TrainingService()
+        if kind == "train":
+            job = service.train_new_model(
+                **params, training_id=training_id, progress_callback=report
+            )
+        elif kind == "fine_tune":
+            job = service.fine_tune_model(
+                **params, training_id=training_id, progress_callback=report
+            )
+        elif kind == "distill":
+            job = service.distill_model(
+                **params, training_id=training_id, progress_callback=report
+            )
+        elif kind == "sweep":
+            job = SweepService().run_sweep(
+                **params, training_id=training_id, progress_callback=report
+            )
+        else:
+            raise ValueError(f"Неизвестный тип обучения: {kind}")
+        
+        result = asyncio.run(job)
+        events.put(("completed", training_id, result))
+    except Exception as e:
+        events.put(("failed", training_id, {"error": str(e)}))
+
+class TrainingJobManager:
+    """
+    Очередь обучений, выполняемых в отдельных процессах
+    
+    Обучение не занимает event loop и CPU процесса, обслуживающего
+    предсказания. Одновременно выполняется не более max_concurrent заданий,
+    остальные ждут в очереди. Состояние и история хранятся в TrainingJobStore
+    и переживают рестарт сервиса. По завершении вызывается on_completed.
+    """
+    
+    def __init__(
+        self,
+        store: Optional[TrainingJobStore] = None,
+        max_concurrent: Optional[int] = None,
+        on_completed: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self._ctx = mp.get_context("spawn")
+        self._store = store
+        self.max_concurrent = max(1, max_concurrent or settings.MAX_CONCURRENT_TRAININGS)
+        self._events = None
+        self._processes: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.on_completed = on_completed
+    
+    @property
+    def store(self) -> TrainingJobStore:
+        # Хранилище создаётся лениво, чтобы импорт модуля не трогал диск
+        if self._store is None:
+            self._store = TrainingJobStore()
+        return self._store
+    
+    def start(self):
+        """
+        Возврат прерванных заданий в очередь и запуск очереди
+        
+        Прерванные обучения продолжаются с последнего чекпоинта.
+        """
+        interrupted = self.store.requeue_interrupted()
+        if interrupted:
+            logger.warning(f"⚠️ Возвращены в очередь прерванные обучения: {interrupted}")
+        self._ensure_listener()
+        self._dispatch()
+    
+    def submit(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        total_epochs: int,
+        model_name: Optional[str] = None
+    ) -> TrainingProgress:
+        """
+        Постановка обучения в очередь
+        
+        Args:
+            kind: Тип обучения (train/fine_tune/distill/sweep)
+            params: Аргументы метода TrainingService
+            total_epochs: Количество эпох (для отображения прогресса)
+            model_name: Имя обучаемой модели
+            
+        Returns:
+            Начальный прогресс с идентификатором обучения
+        """
+        self._ensure_listener()
+        
+        training_id = str(uuid.uuid4())
+        self.store.create(training_id, kind, params, model_name, total_epochs)
+        self._dispatch()
+        
+        return self.get_progress(training_id)
+    
+    def get_progress(self, training_id: str) -> Optional[TrainingProgress]:
+        """Получение прогресса обучения"""
+        job = self.store.get(training_id)
+        return self._to_progress(job) if job else None
+    
+    def get_job(self, training_id: str) -> Optional[Dict[str, Any]]:
+        """Полная информация о задании"""
+        job = self.store.get(training_id)
+        if job is None:
+            return None
+        return {
+            **job,
+            "progress": self._to_progress(job),
+            "queue_position": self.store.queue_position(training_id)
+        }
+    
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """История заданий"""
+        return [
+            {**job, "progress": self._to_progress(job)}
+            for job in self.store.list(limit=limit, status=status)
+        ]
+    
+    def cancel(self, training_id: str) -> Optional[TrainingStatus]:
+        """
+        Отмена задания
+        
+        Returns:
+            Итоговый статус задания или None, если задание не найдено
+        """
+        with self._lock:
+            job = self.store.get(training_id)
+            if job is None:
+                return None
+            
+            status = TrainingStatus(job['status'])
+            if status.value in FINISHED_STATUSES:
+                return status
+            
+            process = self._processes.pop(training_id, None)
+            self.store.finish(training_id, TrainingStatus.CANCELLED)
+        
+        if process is not None and process.pid is not None:
+            _terminate_job_process(process)
+        CheckpointManager(training_id).remove()
+        
+        logger.info(f"🚫 Обучение {training_id} отменено")
+        self._dispatch()
+        return TrainingStatus.CANCELLED
+    
+    def shutdown(self):
+        """
+        Остановка процессов обучения
+        
+        Прерванные задания остаются в статусе in_progress и при следующем
+        запуске возвращаются в очередь.
+        """
+        self._stopping.set()
+        with self._lock:
+            processes = list(self._processes.items())
+            self._processes.clear()
+        
+        for training_id, process in processes:
+            if process.is_alive():
+                logger.warning(f"⚠️ Прерывание обучения {training_id}")
+            _terminate_job_process(process)
+    
+    def _dispatch(self):
+        """Запуск заданий из очереди в пределах лимита параллельности"""
+        # Не на уровне модуля: процессы обучения импортируют этот модуль
+        from app.utils.metrics import QUEUE_WAIT_SECONDS
+        
+        with self._lock:
+            if self._stopping.is_set() or self._events is None:
+                return
+            
+            while len(self._processes) < self.max_concurrent:
+                job = self.store.next_pending()
+                if job is None:
+                    return
+                
+                training_id = job['training_id']
+                try:
+                    params = self.store.load_params(training_id)
+                except (OSError, ValueError) as e:
+                    self.store.finish(
+                        training_id, TrainingStatus.FAILED,
+                        error=f"Не удалось прочитать параметры обучения: {e}"
+                    )
+                    continue
+                
+                process = self._ctx.Process(
+                    target=_run_training_job,
+                    args=(training_id, job['kind'], params, self._events, _training_num_threads()),
+                    name=f"training-{training_id[:8]}",
+                    # Не daemon: процесс обучения запускает воркеры DataLoader
+                    daemon=False
+                )
+                self.store.mark_running(training_id)
+                QUEUE_WAIT_SECONDS.labels("training").observe(
+                    (datetime.utcnow() - datetime.fromisoformat(job['created_at'])).total_seconds()
+                )
+                self._processes[training_id] = process
+                process.start()
+                logger.info(f"🧵 Обучение {training_id} запущено в процессе {process.pid}")
+    
+    def _ensure_listener(self):
+        """Ленивый запуск потока, читающего события процессов"""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._events = self._ctx.Queue()
+            self._listener = threading.Thread(
+                target=self._listen,
+                name="training-events",
+                daemon=True
+            )
+            self._listener.start()
+    
+    def _listen(self):
+        """Обработка событий от процессов обучения"""
+        while not self._stopping.is_set():
+            try:
+                event, training_id, payload = self._events.get(timeout=1.0)
+            except queue.Empty:
+                self._reap_dead_processes()
+                continue
+            except (EOFError, OSError):
+                break
+            
+            try:
+                self._handle_event(event, training_id, payload)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки события {event} ({training_id}): {e}")
+    
+    def _handle_event(self, event: str, training_id: str, payload: Dict[str, Any]):
+        """Обновление состояния задания по событию процесса"""
+        with self._lock:
+            # События отменённых заданий игнорируются
+            if training_id not in self._processes:
+                return
+            
+            if event == "progress":
+                self.store.update_progress(training_id, payload)
+                return
+            if event not in ("completed", "failed"):
+                return
+            
+            process = self._processes.pop(training_id)
+            if event == "completed":
+                self.store.finish(training_id, TrainingStatus.COMPLETED, result=payload)
+            else:
+                self.store.finish(training_id, TrainingStatus.FAILED, error=payload.get("error"))
+        
+        process.join(timeout=5)
+        
+        if event == "completed":
+            logger.info(
+                f"✅ Обучение {training_id} завершено: "
+                f"{payload.get('model_name')}/{payload.get('model_version')}"
+            )
+            if self.on_completed:
+                self.on_completed(payload)
+        else:
+            CheckpointManager(training_id).remove()
+            logger.error(f"❌ Обучение {training_id} завершилось ошибкой: {payload.get('error')}")
+        
+        self._dispatch()
+    
+    def _reap_dead_processes(self):
+        """Пометка процессов, завершившихся без события (kill, OOM)"""
+        with self._lock:
+            dead = [
+                training_id for training_id, process in self._processes.items()
+                if process.exitcode is not None
+            ]
+        
+        for training_id in dead:
+            # Событие могло прийти позже exitcode - даём очереди шанс
+            try:
+                while True:
+                    event, event_id, payload = self._events.get_nowait()
+                    self._handle_event(event, event_id, payload)
+            except queue.Empty:
+                pass
+            
+            with self._lock:
+                process = self._processes.pop(training_id, None)
+                if process is None:
+                    continue
+                error = f"Процесс обучения завершился с кодом {process.exitcode}"
+                self.store.finish(training_id, TrainingStatus.FAILED, error=error)
+            # Как и при событии failed: упавшее задание не возобновляется
+            CheckpointManager(training_id).remove()
+            logger.error(f"❌ {error} ({training_id})")
+        
+        if dead:
+            self._dispatch()
+    
+    @staticmethod
+    def _to_progress(job: Dict[str, Any]) -> TrainingProgress:
+        """Прогресс задания в формате API"""
+        progress = job.get('progress') or {}
+        status = TrainingStatus(job['status'])
+        
+        elapsed = progress.get('elapsed_time_seconds', 0)
+        if job.get('started_at'):
+            end = job.get('finished_at') or datetime.utcnow().isoformat()
+            elapsed = int((
+                datetime.fromisoformat(end) - datetime.fromisoformat(job['started_at'])
+            ).total_seconds())
+        
+        metrics = dict(progress.get('metrics') or {})
+        result = job.get('result')
+        if result:
+            metrics.update({
+                "model_name": result.get("model_name"),
+                "model_version": result.get("model_version"),
+                **result.get("metrics", {})
+            })
+        if job.get('error'):
+            metrics["error"] = job['error']
+        
+        return TrainingProgress(
+            training_id=job['training_id'],
+            status=status,
+            current_epoch=(
+                result.get("epochs_completed", progress.get('current_epoch', 0))
+                if result else progress.get('current_epoch', 0)
+            ),
+            total_epochs=job['total_epochs'],
+            current_loss=progress.get('current_loss'),
+            best_loss=result.get("final_loss") if result else progress.get('best_loss'),
+            elapsed_time_seconds=elapsed,
+            estimated_remaining_seconds=(
+                0 if status == TrainingStatus.COMPLETED
+                else progress.get('estimated_remaining_seconds')
+            ),
+            metrics=metrics
+        )
@@ -1,25 +1,114 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, random_split
-from typing import List, Dict, Any, Optional, Callable
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import random_split
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 import asyncio
+import time
+from contextlib import nullcontext
 from pathlib import Path
 import uuid
+import zlib
 
 from app.config.settings import get_settings
 from app.utils.logger import setup_logger
 from app.utils.exceptions import TrainingException, InsufficientDataException
-from app.core.models import StatusNet
-from app.core.vocabulary import Vocabulary, LabelEncoder
-from app.core.dataset import TaskDataset
+from app.core.models import StatusNet, build_model
+from app.core.vocabulary import Vocabulary, LabelEncoder, create_vocabulary
+from app.core.dataset import TaskDataset, create_batch_loader, set_loader_epoch
+from app.core.streaming import (
+    StreamingTaskDataset,
+    create_stream_loader,
+    encoders_from_stats,
+    resolve_shards,
+    scan_shards
+)
 from app.services.model_manager import ModelManager
+from app.services.checkpoint_manager import CheckpointManager, snapshot_state
+from app.services.training_telemetry import TrainingTelemetry
+from app.services.distributed_training import (
+    get_rank,
+    get_world_size,
+    is_distributed,
+    mean_across_ranks,
+    run_distributed,
+    sum_across_ranks
+)
 from app.schemas.training import TrainingStatus, TrainingProgress
 
 settings = get_settings()
 logger = setup_logger("training_service", settings.LOG_LEVEL)
 
+def bf16_autocast_supported() -> bool:
+    """Поддерживает ли CPU быстрые bfloat16 вычисления (oneDNN)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+def distillation_loss(
+    student_logits: torch.Tensor,
+    teacher_logits: torch.Tensor,
+    temperature: float
+) -> torch.Tensor:
+    """KL-дивергенция смягчённых распределений (масштаб T^2 - как у градиентов CE)"""
+    return nn.functional.kl_div(
+        nn.functional.log_softmax(student_logits / temperature, dim=-1),
+        nn.functional.softmax(teacher_logits / temperature, dim=-1),
+        reduction="batchmean"
+    ) * temperature ** 2
+
+def model_footprint(model: nn.Module, text_ids: torch.Tensor, runs: int = 50) -> Dict[str, Any]:
+    """
+    Память и латентность модели
+    
+    Латентность - медиана forward для одного текста (как в /predict),
+    память - размер параметров и буферов.
+    """
+    model.eval()
+    device = next(model.parameters()).device
+    params = sum(p.numel() for p in model.parameters())
+    size_bytes = sum(t.numel() * t.element_size() for t in [*model.parameters(), *model.buffers()])
+    
+    timings = []
+    with torch.no_grad():
+        samples = text_ids[:runs].to(device)
+        model(samples[:1])  # прогрев
+        for row in samples:
+            start = time.perf_counter()
+            model(row.unsqueeze(0))
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    
+    return {
+        "parameters": params,
+        "parameters_mb": round(size_bytes / 2**20, 3),
+        "latency_ms_p50": round(timings[len(timings) // 2], 3) if timings else None
+    }
+
+class CompiledForward:
+    """
+    Forward модели через torch.compile с откатом на eager
+    
+    Ошибки компиляции (нет компилятора, неподдерживаемые операции)
+    возникают до выполнения графа, поэтому повтор в eager безопасен.
+    """
+    
+    def __init__(self, model: nn.Module):
+        self.model = model
+        self.compiled = torch.compile(model, dynamic=True)
+    
+    def __call__(self, *args):
+        if self.compiled is not None:
+            try:
+                return self.compiled(*args)
+            except Exception as e:
+                logger.warning(f"⚠️ torch.compile недоступен, используется eager: {e}")
+                self.compiled = None
+        return self.model(*args)
+
 class TrainingService:
     """Сервис для обучения и дообучения моделей"""
     
@@ -30,13 +119,24 @@ class TrainingService:
     
     async def train_new_model(
         self,
-        training_examples: List[Dict[str, Any]],
+        training_examples: Optional[List[Dict[str, Any]]] = None,
         epochs: int = 30,
         batch_size: int = 32,
         learning_rate: float = 0.001,
         model_name: Optional[str] = None,
         save_checkpoint: bool = True,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        tokenizer: Optional[str] = None,
+        vocab_min_freq: Optional[int] = None,
+        vocab_max_size: Optional[int] = None,
+        training_id: Optional[str] = None,
+        early_stopping_patience: Optional[int] = None,
+        fast_mode: Optional[bool] = None,
+        data_files: Optional[List[str]] = None,
+        shuffle_buffer: Optional[int] = None,
+        world_size: Optional[int] = None,
+        architecture: Optional[str] = None,
+        model_config: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Обучение новой модели с нуля
@@ -47,16 +147,31 @@ class TrainingService:
             batch_size: Размер батча
             learning_rate: Learning rate
             model_name: Имя модели
-            save_checkpoint: Сохранять чекпоинты
+            save_checkpoint: Сохранять чекпоинты и возобновляться с последнего
             progress_callback: Callback для отслеживания прогресса
+            tokenizer: Тип токенизатора (vocab/hashing), по умолчанию из настроек
+            vocab_min_freq: Минимальная частота слова в словаре
+            vocab_max_size: Максимальный размер словаря
+            training_id: Идентификатор обучения (генерируется, если не задан)
+            early_stopping_patience: Эпох без улучшения до остановки (0 - отключено)
+            fast_mode: bfloat16 autocast и скомпилированный шаг обучения
+            data_files: JSONL шарды (пути, директории, glob) вместо training_examples -
+                примеры читаются потоком, не загружаясь в память целиком
+            shuffle_buffer: Размер буфера перемешивания для data_files
+            world_size: Число локальных процессов для DDP (1 - без распределения);
+                batch_size задаётся на процесс
+            architecture: Архитектура модели (см. MODEL_ARCHITECTURES),
+                по умолчанию из настроек
+            model_config: Гиперпараметры архитектуры (embedding_dim, hidden_dim, ...)
             
         Returns:
             Результат обучения
         """
-        training_id = str(uuid.uuid4())
+        training_id = training_id or str(uuid.uuid4())
         start_time = datetime.utcnow()
+        training_examples = training_examples or []
         
-        if len(training_examples) < 10:
+        if not data_files and len(training_examples) < 10:
             raise InsufficientDataException(
                 "Недостаточно данных для обучения (минимум 10 примеров)"
             )
@@ -64,104 +179,239 @@ class TrainingService:
         if model_name is None:
             model_name = f"{settings.MODEL_NAME}_{start_time.strftime('%Y%m%d')}"
         
+        if tokenizer is None:
+            tokenizer = settings.TOKENIZER
+        if vocab_min_freq is None:
+            vocab_min_freq = settings.VOCAB_MIN_FREQ
+        if vocab_max_size is None:
+            vocab_max_size = settings.VOCAB_MAX_SIZE
+        if early_stopping_patience is None:
+            early_stopping_patience = settings.EARLY_STOPPING_PATIENCE
+        if fast_mode is None:
+            fast_mode = settings.FAST_TRAINING
+        if world_size is None:
+            world_size = settings.TRAINING_WORLD_SIZE
+        if architecture is None:
+            architecture = settings.MODEL_ARCHITECTURE
+        model_config = dict(model_config or {})
+        if architecture == StatusNet.architecture:
+            # Размерности StatusNet по умолчанию задаются в настройках
+            model_config.setdefault("embedding_dim", settings.EMBEDDING_DIM)
+            model_config.setdefault("hidden_dim", settings.HIDDEN_DIM)
+            model_config.setdefault("pooling", settings.STATUSNET_POOLING)
+        
+        if world_size > 1 and not is_distributed():
+            # Каждый ранг выполнит этот же метод внутри группы процессов
+            return await run_distributed(
+                {
+                    "training_examples": training_examples,
+                    "epochs": epochs,
+                    "batch_size": batch_size,
+                    "learning_rate": learning_rate,
+                    "model_name": model_name,
+                    "save_checkpoint": save_checkpoint,
+                    "tokenizer": tokenizer,
+                    "vocab_min_freq": vocab_min_freq,
+                    "vocab_max_size": vocab_max_size,
+                    "training_id": training_id,
+                    "early_stopping_patience": early_stopping_patience,
+                    "fast_mode": fast_mode,
+                    "data_files": data_files,
+                    "shuffle_buffer": shuffle_buffer,
+                    "architecture": architecture,
+                    "model_config": model_config
+                },
+                world_size=world_size,
+                progress_callback=progress_callback
+            )
+        # Чекпоинты, прогресс и сохранение модели - только на ранге 0
+        is_main = get_rank() == 0
+        
+        source = f"шардов: {len(data_files)}" if data_files else f"примеров: {len(training_examples)}"
         logger.info(
-            f"🚀 Начало обучения модели: {model_name} "
-            f"(примеров: {len(training_examples)}, эпох: {epochs})"
+            f"🚀 Начало обучения модели: {model_name} ({architecture}, {source}, эпох: {epochs})"
         )
         
+        # Инициализация прогресса
+        progress = TrainingProgress(
+            training_id=training_id,
+            status=TrainingStatus.IN_PROGRESS,
+            current_epoch=0,
+            total_epochs=epochs,
+            elapsed_time_seconds=0
+        )
+        self.active_trainings[training_id] = progress
+        
+        checkpoints = CheckpointManager(training_id) if save_checkpoint else None
+        
         try:
+            # Все ранги возобновляются с одного и того же чекпоинта
+            checkpoint = checkpoints.load() if checkpoints else None
+            
             # Подготовка данных
-            vocab = Vocabulary()
-            encoders = self._prepare_encoders(training_examples)
-            dataset = self._prepare_dataset(training_examples, vocab, encoders)
+            if checkpoint:
+                vocab = checkpoint['vocab']
+                encoders = checkpoint['encoders']
+            else:
+                vocab = create_vocabulary(
+                    tokenizer,
+                    num_buckets=settings.HASH_BUCKETS,
+                    ngram_range=(settings.HASH_NGRAM_MIN, settings.HASH_NGRAM_MAX),
+                    min_freq=vocab_min_freq,
+                    max_size=vocab_max_size,
+                    normalize=settings.VOCAB_NORMALIZE
+                )
             
-            # Разделение на train/val
-            val_size = max(1, int(len(dataset) * 0.1))
-            train_size = len(dataset) - val_size
+            if data_files:
+                # Два прохода по шардам: словарь и подсчёт, затем поток батчей
+                shards = resolve_shards(data_files)
+                stats = scan_shards(shards, None if checkpoint else vocab, val_fraction=0.1)
+                if not checkpoint:
+                    encoders = encoders_from_stats(stats)
+                train_size, val_size = stats.train_examples, stats.val_examples
+                if train_size + val_size < 10:
+                    raise InsufficientDataException(
+                        "Недостаточно данных для обучения (минимум 10 примеров)"
+                    )
             
-            train_dataset, val_dataset = random_split(
-                dataset, [train_size, val_size]
-            )
+                stream_options = {
+                    "vocab": vocab,
+                    "encoders": encoders,
+                    "batch_size": batch_size,
+                    "max_len": settings.MAX_TEXT_LEN,
+                    "val_fraction": 0.1,
+                    "shuffle_buffer": shuffle_buffer or settings.STREAM_SHUFFLE_BUFFER,
+                    "seed": zlib.crc32(training_id.encode())
+                }
+                train_loader = create_stream_loader(
+                    StreamingTaskDataset(shards, split="train", **stream_options),
+                    num_workers=settings.DATALOADER_NUM_WORKERS,
+                    prefetch_factor=settings.DATALOADER_PREFETCH_FACTOR
+                )
+                val_loader = create_stream_loader(
+                    StreamingTaskDataset(shards, split="val", **{**stream_options, "shuffle_buffer": 0}),
+                    num_workers=settings.DATALOADER_NUM_WORKERS,
+                    prefetch_factor=settings.DATALOADER_PREFETCH_FACTOR
+                ) if val_size > 0 else None
+            else:
+                if not checkpoint:
+                    encoders = self._prepare_encoders(training_examples)
+                dataset = self._prepare_dataset(
+                    training_examples, vocab, encoders, build_vocab=checkpoint is None
+                )
             
-            train_loader = DataLoader(
-                train_dataset,
-                batch_size=batch_size,
-                shuffle=True
-            )
+                # Разделение на train/val (воспроизводимое - для возобновления)
+                val_size = max(1, int(len(dataset) * 0.1))
+                train_size = len(dataset) - val_size
             
-            val_loader = DataLoader(
-                val_dataset,
-                batch_size=batch_size,
-                shuffle=False
-            ) if val_size > 0 else None
+                train_dataset, val_dataset = random_split(
+                    dataset,
+                    [train_size, val_size],
+                    generator=torch.Generator().manual_seed(zlib.crc32(training_id.encode()))
+                )
+                
+                train_loader = create_batch_loader(
+                    train_dataset,
+                    batch_size=batch_size,
+                    shuffle=True,
+                    pin_memory=self.device.startswith("cuda"),
+                    distributed=is_distributed()
+                )
+                
+                val_loader = create_batch_loader(
+                    val_dataset,
+                    batch_size=batch_size,
+                    shuffle=False,
+                    pin_memory=self.device.startswith("cuda"),
+                    distributed=is_distributed()
+                ) if val_size > 0 else None
+            total_examples = train_size + val_size
             
             # Создание модели
-            model = StatusNet(
+            model = build_model(
+                architecture,
                 vocab_size=vocab.vocab_size,
-                embedding_dim=settings.EMBEDDING_DIM,
-                hidden_dim=settings.HIDDEN_DIM,
-                num_statuses=encoders['status'].num_classes
+                num_statuses=encoders['status'].num_classes,
+                **model_config
             ).to(self.device)
             
             optimizer = optim.Adam(model.parameters(), lr=learning_rate)
             criterion = nn.CrossEntropyLoss()
             
-            # Инициализация прогресса
-            progress = TrainingProgress(
-                training_id=training_id,
-                status=TrainingStatus.IN_PROGRESS,
-                current_epoch=0,
-                total_epochs=epochs,
-                elapsed_time_seconds=0
-            )
-            self.active_trainings[training_id] = progress
+            # Быстрый режим: bfloat16 autocast (если CPU поддерживает) и torch.compile
+            autocast_dtype = torch.bfloat16 if fast_mode and bf16_autocast_supported() else None
+            if fast_mode:
+                logger.info(
+                    f"⚡ Быстрый режим обучения: compile, "
+                    f"autocast={autocast_dtype or 'выключен'}"
+                )
             
             # Обучение
             best_loss = float('inf')
+            best_state = None
+            best_epoch = 0
+            epochs_without_improvement = 0
+            stopped_early = False
             training_history = []
+            start_epoch = 0
             
-            for epoch in range(epochs):
-                epoch_start = datetime.utcnow()
-                
+            if checkpoint:
+                model.load_state_dict(checkpoint['model_state'])
+                optimizer.load_state_dict(checkpoint['optimizer_state'])
+                best_loss = checkpoint['best_loss']
+                best_state = checkpoint['best_state']
+                best_epoch = checkpoint['best_epoch']
+                epochs_without_improvement = checkpoint['epochs_without_improvement']
+                training_history = checkpoint['training_history']
+                start_epoch = checkpoint['epoch']
+                torch.set_rng_state(checkpoint['rng_state'])
+                logger.info(f"♻️ Обучение {training_id} возобновлено с эпохи {start_epoch + 1}")
+            
+            # В распределённом режиме градиенты усредняются между рангами
+            # (attention StatusNet участвует в loss только при pooling="attention")
+            unused_attention = isinstance(model, StatusNet) and model.pooling != "attention"
+            ddp_model = (
+                DistributedDataParallel(model, find_unused_parameters=unused_attention)
+                if is_distributed() else None
+            )
+            train_module = ddp_model if ddp_model is not None else model
+            forward = CompiledForward(train_module) if fast_mode else train_module
+            telemetry = TrainingTelemetry(self.device, world_size=get_world_size())
+            
+            for epoch in range(start_epoch, epochs):
                 # Training loop
-                model.train()
-                train_loss = 0.0
-                
-                for batch in train_loader:
-                    text = batch['text'].to(self.device)
-                    status = batch['status'].to(self.device)
-                    
-                    optimizer.zero_grad()
-                    outputs = model(text)
-                    loss = criterion(outputs, status)
-                    loss.backward()
-                    torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
-                    optimizer.step()
-                    
-                    train_loss += loss.item()
-                
-                avg_train_loss = train_loss / len(train_loader)
+                set_loader_epoch(train_loader, epoch)
+                telemetry.start_epoch()
+                # join: ранги с разным числом батчей (потоковые шарды) не блокируют друг друга
+                with ddp_model.join() if ddp_model is not None else nullcontext():
+                    avg_train_loss = self._train_epoch(
+                        model, train_loader, optimizer, criterion,
+                        forward=forward, autocast_dtype=autocast_dtype, telemetry=telemetry
+                    )
+                avg_train_loss = mean_across_ranks(avg_train_loss)
                 
                 # Validation loop
                 val_loss = None
-                if val_loader:
-                    model.eval()
-                    val_loss_total = 0.0
-                    
-                    with torch.no_grad():
-                        for batch in val_loader:
-                            text = batch['text'].to(self.device)
-                            status = batch['status'].to(self.device)
-                            outputs = model(text)
-                            loss = criterion(outputs, status)
-                            val_loss_total += loss.item()
-                    
-                    val_loss = val_loss_total / len(val_loader)
+                if val_loader is not None:
+                    with telemetry.validation():
+                        # У рангов разное число валидационных примеров (шарды, crc32) -
+                        # среднее по примерам, а не по рангам
+                        val_loss_sum, val_count = sum_across_ranks(
+                            *self._evaluate_totals(model, val_loader, criterion)
+                        )
+                        val_loss = val_loss_sum / max(1, val_count)
+                epoch_stats = telemetry.end_epoch()
                 
                 # Сохранение лучшей модели
-                current_loss = val_loss if val_loss else avg_train_loss
-                if current_loss < best_loss:
+                current_loss = val_loss if val_loss is not None else avg_train_loss
+                if current_loss < best_loss - settings.EARLY_STOPPING_MIN_DELTA:
                     best_loss = current_loss
+                    best_state = snapshot_state(model.state_dict())
+                    best_epoch = epoch + 1
+                    epochs_without_improvement = 0
+                else:
+                    # best_loss остаётся лосом сохранённого снимка best_state
+                    epochs_without_improvement += 1
                 
                 # Обновление прогресса
                 elapsed = (datetime.utcnow() - start_time).total_seconds()
@@ -169,30 +419,68 @@ class TrainingService:
                 progress.current_loss = avg_train_loss
                 progress.best_loss = best_loss
                 progress.elapsed_time_seconds = int(elapsed)
-                
-                if epoch > 0:
-                    avg_epoch_time = elapsed / (epoch + 1)
-                    remaining_epochs = epochs - (epoch + 1)
-                    progress.estimated_remaining_seconds = int(
-                        avg_epoch_time * remaining_epochs
-                    )
+                progress.estimated_remaining_seconds = telemetry.estimate_remaining(
+                    epochs - (epoch + 1)
+                )
+                progress.metrics = telemetry.summary()
                 
                 training_history.append({
                     "epoch": epoch + 1,
                     "train_loss": avg_train_loss,
                     "val_loss": val_loss,
+                    "samples_per_sec": epoch_stats["samples_per_sec"],
+                    "epoch_seconds": epoch_stats["epoch_seconds"],
+                    "val_seconds": epoch_stats["val_seconds"],
                     "timestamp": datetime.utcnow().isoformat()
                 })
                 
-                if progress_callback:
+                val_loss_str = f"{val_loss:.4f}" if val_loss is not None else "N/A"
+                if is_main:
+                    logger.info(
+                        f"Epoch {epoch + 1}/{epochs} | "
+                        f"Train Loss: {avg_train_loss:.4f} | "
+                        f"Val Loss: {val_loss_str}"
+                    )
+                
+                if early_stopping_patience and epochs_without_improvement >= early_stopping_patience:
+                    stopped_early = True
+                    logger.info(
+                        f"⏹️ Ранняя остановка: {epochs_without_improvement} эпох без улучшения "
+                        f"(лучшая эпоха {best_epoch})"
+                    )
+                
+                if checkpoints and is_main and (
+                    (epoch + 1) % settings.CHECKPOINT_EVERY_EPOCHS == 0
+                    and not stopped_early
+                    and epoch + 1 < epochs
+                ):
+                    checkpoints.save_async({
+                        "epoch": epoch + 1,
+                        "model_state": snapshot_state(model.state_dict()),
+                        "optimizer_state": snapshot_state(optimizer.state_dict()),
+                        "best_loss": best_loss,
+                        "best_state": best_state,
+                        "best_epoch": best_epoch,
+                        "epochs_without_improvement": epochs_without_improvement,
+                        "training_history": list(training_history),
+                        "vocab": vocab,
+                        "encoders": encoders,
+                        "rng_state": torch.get_rng_state()
+                    })
+                
+                if progress_callback and is_main:
                     await progress_callback(progress)
                 
-                val_loss_str = f"{val_loss:.4f}" if val_loss is not None else "N/A"
-                logger.info(
-                    f"Epoch {epoch + 1}/{epochs} | "
-                    f"Train Loss: {avg_train_loss:.4f} | "
-                    f"Val Loss: {val_loss_str}"
-                )
+                if stopped_early:
+                    break
+            
+            # В модель возвращаются веса лучшей эпохи
+            if best_state is not None:
+                model.load_state_dict(best_state)
+            epochs_completed = len(training_history)
+            
+            if not is_main:
+                return {"training_id": training_id, "status": "completed", "rank": get_rank()}
             
             # Сохранение модели
             version = self.model_manager.save_model(
@@ -205,12 +493,26 @@ class TrainingService:
                     "epochs": epochs,
                     "batch_size": batch_size,
                     "learning_rate": learning_rate,
-                    "total_examples": len(training_examples),
+                    "tokenizer": tokenizer,
+                    "vocab_min_freq": vocab_min_freq,
+                    "vocab_max_size": vocab_max_size,
+                    "total_examples": total_examples,
+                    "data_files": data_files,
                     "best_loss": best_loss,
+                    "best_epoch": best_epoch,
+                    "epochs_completed": epochs_completed,
+                    "stopped_early": stopped_early,
+                    "fast_mode": fast_mode,
+                    "autocast_dtype": str(autocast_dtype) if autocast_dtype else None,
+                    "world_size": get_world_size(),
+                    "telemetry": telemetry.summary(),
                     "training_history": training_history
                 }
             )
             
+            if checkpoints:
+                checkpoints.remove()
+            
             # Финальный статус
             progress.status = TrainingStatus.COMPLETED
             duration = (datetime.utcnow() - start_time).total_seconds()
@@ -220,15 +522,22 @@ class TrainingService:
                 "status": "completed",
                 "model_name": model_name,
                 "model_version": version,
-                "total_examples": len(training_examples),
-                "epochs_completed": epochs,
+                "total_examples": total_examples,
+                "epochs_completed": epochs_completed,
                 "final_loss": best_loss,
                 "duration_seconds": int(duration),
                 "metrics": {
+                    "best_epoch": best_epoch,
+                    "stopped_early": stopped_early,
+                    "fast_mode": fast_mode,
+                    "world_size": get_world_size(),
+                    "architecture": architecture,
+                    "tokenizer": tokenizer,
                     "vocab_size": vocab.vocab_size,
                     "train_samples": train_size,
                     "val_samples": val_size,
-                    "best_loss": best_loss
+                    "best_loss": best_loss,
+                    "telemetry": telemetry.summary()
                 }
             }
             
@@ -241,6 +550,8 @@ class TrainingService:
             raise TrainingException(f"Ошибка обучения: {str(e)}")
         
         finally:
+            if checkpoints:
+                checkpoints.close()
             if training_id in self.active_trainings:
                 del self.active_trainings[training_id]
     
@@ -252,11 +563,18 @@ class TrainingService:
         epochs: int = 10,
         batch_size: int = 16,
         learning_rate: float = 0.0001,
-        freeze_embedding: bool = True
+        freeze_embedding: bool = True,
+        train_new_embeddings: bool = True,
+        pooling: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        training_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Дообучение существующей модели
         
+        Новые слова из примеров добавляются в словарь, матрица эмбеддингов
+        расширяется на месте - полное переобучение не требуется.
+        
         Args:
             model_name: Имя базовой модели
             model_version: Версия базовой модели
@@ -265,30 +583,68 @@ class TrainingService:
             batch_size: Размер батча
             learning_rate: Learning rate (обычно меньше, чем при обучении с нуля)
             freeze_embedding: Заморозить слой эмбеддингов
+            train_new_embeddings: Обучать эмбеддинги новых слов даже при
+                freeze_embedding (заморожены остаются только прежние строки)
+            pooling: Новый режим pooling StatusNet (миграция с "last" на
+                packed последовательности - веса совместимы)
+            progress_callback: Callback для отслеживания прогресса
+            training_id: Идентификатор обучения (генерируется, если не задан)
             
         Returns:
             Результат дообучения
         """
-        training_id = str(uuid.uuid4())
+        training_id = training_id or str(uuid.uuid4())
         start_time = datetime.utcnow()
         
         logger.info(f"🔄 Начало дообучения модели: {model_name}")
         
+        progress = TrainingProgress(
+            training_id=training_id,
+            status=TrainingStatus.IN_PROGRESS,
+            current_epoch=0,
+            total_epochs=epochs,
+            elapsed_time_seconds=0
+        )
+        self.active_trainings[training_id] = progress
+        
         try:
             # Загрузка базовой модели
             model, vocab, encoders = self.model_manager.load_model(
                 model_name, model_version
             )
             
+            if pooling is not None:
+                if not isinstance(model, StatusNet):
+                    raise ValueError("pooling поддерживается только архитектурой status_net")
+                logger.info(f"🔀 Pooling: {model.pooling} -> {pooling}")
+                model.set_pooling(pooling)
+            
+            # Подготовка новых данных (словарь дополняется новыми словами)
+            base_vocab_size = model.embedding.num_embeddings
+            dataset = self._prepare_dataset(training_examples, vocab, encoders)
+            added_tokens = model.grow_embedding(vocab.vocab_size)
+            if added_tokens:
+                logger.info(
+                    f"📖 Словарь расширен: {base_vocab_size} -> {vocab.vocab_size} (+{added_tokens})"
+                )
+            
             # Заморозка эмбеддингов если требуется
-            if freeze_embedding:
+            if freeze_embedding and added_tokens and train_new_embeddings:
+                # Градиент прежних строк обнуляется: обучаются только новые слова
+                grad_mask = torch.zeros_like(model.embedding.weight[:, :1])
+                grad_mask[base_vocab_size:] = 1.0
+                model.embedding.weight.register_hook(lambda grad: grad * grad_mask)
+                logger.info("🔒 Эмбеддинги словаря заморожены, обучаются только новые слова")
+            elif freeze_embedding:
                 for param in model.embedding.parameters():
                     param.requires_grad = False
                 logger.info("🔒 Слой эмбеддингов заморожен")
-            
-            # Подготовка новых данных
-            dataset = self._prepare_dataset(training_examples, vocab, encoders)
-            train_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+            train_loader = create_batch_loader(
+                dataset,
+                batch_size=batch_size,
+                shuffle=True,
+                pin_memory=self.device.startswith("cuda")
+            )
             
             # Оптимизатор и критерий
             optimizer = optim.Adam(
@@ -300,27 +656,56 @@ class TrainingService:
             # Дообучение
             model.train()
             best_loss = float('inf')
+            best_state = None
+            best_epoch = 0
+            telemetry = TrainingTelemetry(self.device)
             
             for epoch in range(epochs):
                 epoch_loss = 0.0
+                telemetry.start_epoch()
                 
                 for batch in train_loader:
                     text = batch['text'].to(self.device)
                     status = batch['status'].to(self.device)
+                    telemetry.mark("data")
                     
                     optimizer.zero_grad()
                     outputs = model(text)
                     loss = criterion(outputs, status)
+                    telemetry.mark("forward")
                     loss.backward()
+                    telemetry.mark("backward")
                     optimizer.step()
+                    telemetry.mark("optimizer")
+                    telemetry.step(text.size(0))
                     
                     epoch_loss += loss.item()
                 
+                telemetry.end_epoch()
                 avg_loss = epoch_loss / len(train_loader)
-                best_loss = min(best_loss, avg_loss)
+                if avg_loss < best_loss:
+                    best_loss, best_epoch = avg_loss, epoch + 1
+                    best_state = snapshot_state(model.state_dict())
+                
+                elapsed = (datetime.utcnow() - start_time).total_seconds()
+                progress.current_epoch = epoch + 1
+                progress.current_loss = avg_loss
+                progress.best_loss = best_loss
+                progress.elapsed_time_seconds = int(elapsed)
+                progress.estimated_remaining_seconds = telemetry.estimate_remaining(
+                    epochs - epoch - 1
+                )
+                progress.metrics = telemetry.summary()
+                
+                if progress_callback:
+                    await progress_callback(progress)
                 
                 logger.info(f"Epoch {epoch + 1}/{epochs} | Loss: {avg_loss:.4f}")
             
+            # Сохраняются веса эпохи с best_loss
+            if best_state is not None:
+                model.load_state_dict(best_state)
+            
             # Сохранение дообученной модели
             new_model_name = f"{model_name}_finetuned"
             version = self.model_manager.save_model(
@@ -333,12 +718,22 @@ class TrainingService:
                     "base_model": model_name,
                     "base_version": model_version,
                     "fine_tuned": True,
+                    "pooling_migrated": pooling is not None,
                     "epochs": epochs,
                     "new_examples": len(training_examples),
-                    "best_loss": best_loss
+                    "best_loss": best_loss,
+                    "best_epoch": best_epoch,
+                    "telemetry": telemetry.summary(),
+                    "embedding_growth": {
+                        "base_vocab_size": base_vocab_size,
+                        "vocab_size": vocab.vocab_size,
+                        "added_tokens": added_tokens,
+                        "trained_new_only": bool(freeze_embedding and added_tokens and train_new_embeddings)
+                    }
                 }
             )
             
+            progress.status = TrainingStatus.COMPLETED
             duration = (datetime.utcnow() - start_time).total_seconds()
             
             return {
@@ -348,6 +743,7 @@ class TrainingService:
                 "model_version": version,
                 "base_model": model_name,
                 "new_examples": len(training_examples),
+                "added_tokens": added_tokens,
                 "epochs_completed": epochs,
                 "final_loss": best_loss,
                 "duration_seconds": int(duration)
@@ -355,7 +751,326 @@ class TrainingService:
             
         except Exception as e:
             logger.error(f"❌ Ошибка при дообучении: {e}")
+            progress.status = TrainingStatus.FAILED
             raise TrainingException(f"Ошибка дообучения: {str(e)}")
+        
+        finally:
+            if training_id in self.active_trainings:
+                del self.active_trainings[training_id]
+    
+    async def distill_model(
+        self,
+        training_examples: List[Dict[str, Any]],
+        teacher_name: Optional[str] = None,
+        teacher_version: Optional[str] = None,
+        student_architecture: str = "gru",
+        student_config: Optional[Dict[str, Any]] = None,
+        epochs: int = 20,
+        batch_size: int = 32,
+        learning_rate: float = 0.003,
+        temperature: float = 2.0,
+        alpha: float = 0.7,
+        model_name: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        training_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Дистилляция сохранённой модели в компактную модель-ученика
+        
+        Ученик обучается на смеси мягких меток учителя (KL-дивергенция
+        распределений с температурой) и истинных меток, использует словарь
+        и энкодеры учителя. Логиты учителя считаются один раз до обучения.
+        
+        Args:
+            training_examples: Примеры для дистилляции
+            teacher_name: Имя модели-учителя (по умолчанию MODEL_NAME)
+            teacher_version: Версия учителя (latest, если не задана)
+            student_architecture: Архитектура ученика (см. MODEL_ARCHITECTURES)
+            student_config: Гиперпараметры ученика (embedding_dim, hidden_dim, ...)
+            epochs: Количество эпох
+            batch_size: Размер батча
+            learning_rate: Learning rate
+            temperature: Температура смягчения распределений
+            alpha: Вес мягких меток в loss (1 - alpha - вес истинных меток)
+            model_name: Имя модели ученика
+            progress_callback: Callback для отслеживания прогресса
+            training_id: Идентификатор обучения (генерируется, если не задан)
+            
+        Returns:
+            Результат дистилляции с отчётом точность/латентность/память
+        """
+        training_id = training_id or str(uuid.uuid4())
+        start_time = datetime.utcnow()
+        teacher_name = teacher_name or settings.MODEL_NAME
+        model_name = model_name or f"{teacher_name}_{student_architecture}_student"
+        
+        if len(training_examples) < 10:
+            raise InsufficientDataException(
+                "Недостаточно данных для обучения (минимум 10 примеров)"
+            )
+        
+        logger.info(f"🎓 Дистилляция {teacher_name} -> {student_architecture}")
+        
+        progress = TrainingProgress(
+            training_id=training_id,
+            status=TrainingStatus.IN_PROGRESS,
+            current_epoch=0,
+            total_epochs=epochs,
+            elapsed_time_seconds=0
+        )
+        self.active_trainings[training_id] = progress
+        
+        try:
+            teacher, vocab, encoders = self.model_manager.load_model(
+                teacher_name, teacher_version, device=self.device
+            )
+            teacher_version = self.model_manager.current_version
+            
+            # Ученик работает с тем же словарём, что и учитель
+            dataset = self._prepare_dataset(training_examples, vocab, encoders, build_vocab=False)
+            dataset.with_soft_targets(self._predict_logits(teacher, dataset.text_ids, batch_size))
+            
+            val_size = max(1, int(len(dataset) * 0.1))
+            train_dataset, val_dataset = random_split(
+                dataset,
+                [len(dataset) - val_size, val_size],
+                generator=torch.Generator().manual_seed(zlib.crc32(training_id.encode()))
+            )
+            train_loader = create_batch_loader(train_dataset, batch_size=batch_size, shuffle=True)
+            val_loader = create_batch_loader(val_dataset, batch_size=batch_size, shuffle=False)
+            
+            student = build_model(
+                student_architecture,
+                vocab_size=vocab.vocab_size,
+                num_statuses=encoders['status'].num_classes,
+                **(student_config or {})
+            ).to(self.device)
+            optimizer = optim.Adam(student.parameters(), lr=learning_rate)
+            criterion = nn.CrossEntropyLoss()
+            telemetry = TrainingTelemetry(self.device)
+            
+            best_loss = float('inf')
+            best_state = None
+            best_epoch = 0
+            
+            for epoch in range(epochs):
+                telemetry.start_epoch()
+                student.train()
+                epoch_loss = torch.zeros((), device=self.device)
+                num_batches = 0
+                
+                for batch in train_loader:
+                    text = batch['text'].to(self.device)
+                    status = batch['status'].to(self.device)
+                    soft_target = batch['soft_target'].to(self.device)
+                    telemetry.mark("data")
+                    
+                    optimizer.zero_grad()
+                    outputs = student(text)
+                    loss = alpha * distillation_loss(outputs, soft_target, temperature)
+                    loss = loss + (1 - alpha) * criterion(outputs, status)
+                    telemetry.mark("forward")
+                    loss.backward()
+                    telemetry.mark("backward")
+                    optimizer.step()
+                    telemetry.mark("optimizer")
+                    telemetry.step(text.size(0))
+                    
+                    epoch_loss += loss.detach()
+                    num_batches += 1
+                
+                with telemetry.validation():
+                    val_loss = self._evaluate(student, val_loader, criterion)
+                telemetry.end_epoch()
+                avg_loss = epoch_loss.item() / max(1, num_batches)
+                
+                if val_loss < best_loss:
+                    best_loss, best_epoch = val_loss, epoch + 1
+                    best_state = snapshot_state(student.state_dict())
+                
+                elapsed = (datetime.utcnow() - start_time).total_seconds()
+                progress.current_epoch = epoch + 1
+                progress.current_loss = avg_loss
+                progress.best_loss = best_loss
+                progress.elapsed_time_seconds = int(elapsed)
+                progress.estimated_remaining_seconds = telemetry.estimate_remaining(
+                    epochs - epoch - 1
+                )
+                progress.metrics = telemetry.summary()
+                
+                if progress_callback:
+                    await progress_callback(progress)
+                
+                logger.info(
+                    f"Epoch {epoch + 1}/{epochs} | Loss: {avg_loss:.4f} | Val Loss: {val_loss:.4f}"
+                )
+            
+            if best_state is not None:
+                student.load_state_dict(best_state)
+            
+            # Отчёт: точность на валидации, латентность и память учителя и ученика
+            val_indices = torch.as_tensor(val_dataset.indices)
+            val_text = dataset.text_ids[val_indices]
+            val_status = dataset.statuses[val_indices]
+            teacher_pred = dataset.soft_targets[val_indices].argmax(dim=1)
+            student_pred = self._predict_logits(student, val_text, batch_size).argmax(dim=1)
+            report = {
+                "val_examples": len(val_indices),
+                "teacher": {
+                    "accuracy": (teacher_pred == val_status).float().mean().item(),
+                    **model_footprint(teacher, val_text)
+                },
+                "student": {
+                    "accuracy": (student_pred == val_status).float().mean().item(),
+                    "agreement_with_teacher": (student_pred == teacher_pred).float().mean().item(),
+                    **model_footprint(student, val_text)
+                }
+            }
+            report["speedup"] = round(
+                report["teacher"]["latency_ms_p50"] / max(report["student"]["latency_ms_p50"], 1e-6), 2
+            )
+            report["size_ratio"] = round(
+                report["student"]["parameters_mb"] / max(report["teacher"]["parameters_mb"], 1e-9), 4
+            )
+            
+            version = self.model_manager.save_model(
+                model=student,
+                vocab=vocab,
+                encoders=encoders,
+                model_name=model_name,
+                metadata={
+                    "training_id": training_id,
+                    "epochs": epochs,
+                    "batch_size": batch_size,
+                    "learning_rate": learning_rate,
+                    "total_examples": len(training_examples),
+                    "best_loss": best_loss,
+                    "best_epoch": best_epoch,
+                    "telemetry": telemetry.summary(),
+                    "distillation": {
+                        "teacher_name": teacher_name,
+                        "teacher_version": teacher_version,
+                        "temperature": temperature,
+                        "alpha": alpha,
+                        "report": report
+                    }
+                }
+            )
+            
+            progress.status = TrainingStatus.COMPLETED
+            duration = (datetime.utcnow() - start_time).total_seconds()
+            logger.info(
+                f"✅ Ученик сохранён: {model_name}/{version} | "
+                f"accuracy {report['student']['accuracy']:.3f} (учитель {report['teacher']['accuracy']:.3f}), "
+                f"ускорение x{report['speedup']}"
+            )
+            
+            return {
+                "training_id": training_id,
+                "status": "completed",
+                "model_name": model_name,
+                "model_version": version,
+                "total_examples": len(training_examples),
+                "epochs_completed": epochs,
+                "final_loss": best_loss,
+                "duration_seconds": int(duration),
+                "metrics": {
+                    "best_epoch": best_epoch,
+                    "student_architecture": student_architecture,
+                    "teacher_version": teacher_version,
+                    "report": report
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка при дистилляции: {e}")
+            progress.status = TrainingStatus.FAILED
+            raise TrainingException(f"Ошибка дистилляции: {str(e)}")
+        
+        finally:
+            if training_id in self.active_trainings:
+                del self.active_trainings[training_id]
+    
+    def _predict_logits(self, model: nn.Module, text_ids: torch.Tensor, batch_size: int) -> torch.Tensor:
+        """Логиты модели для всех текстов (на CPU)"""
+        model.eval()
+        with torch.no_grad():
+            return torch.cat([
+                model(chunk.to(self.device)).float().cpu()
+                for chunk in text_ids.split(max(1, batch_size))
+            ])
+    
+    def _train_epoch(
+        self,
+        model: nn.Module,
+        loader,
+        optimizer: optim.Optimizer,
+        criterion: nn.Module,
+        forward: Optional[Callable] = None,
+        autocast_dtype: Optional[torch.dtype] = None,
+        telemetry: Optional[TrainingTelemetry] = None
+    ) -> float:
+        """
+        Одна эпоха обучения, возвращает средний loss
+        
+        Loss накапливается на устройстве и синхронизируется один раз за эпоху.
+        Батчи считаются по ходу: у потокового загрузчика нет len().
+        """
+        forward = forward or model
+        mark = telemetry.mark if telemetry is not None else (lambda phase: None)
+        model.train()
+        train_loss = torch.zeros((), device=self.device)
+        num_batches = 0
+        
+        for batch in loader:
+            text = batch['text'].to(self.device)
+            status = batch['status'].to(self.device)
+            mark("data")
+            
+            optimizer.zero_grad()
+            with torch.autocast(
+                device_type=torch.device(self.device).type,
+                dtype=autocast_dtype or torch.bfloat16,
+                enabled=autocast_dtype is not None
+            ):
+                outputs = forward(text)
+                loss = criterion(outputs, status)
+            mark("forward")
+            loss.backward()
+            mark("backward")
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            optimizer.step()
+            mark("optimizer")
+            
+            train_loss += loss.detach().float()
+            num_batches += 1
+            if telemetry is not None:
+                telemetry.step(text.size(0))
+        
+        return train_loss.item() / max(1, num_batches)
+    
+    def _evaluate(self, model: nn.Module, loader, criterion: nn.Module) -> float:
+        """Средний loss на валидации (в fp32, для сравнимости между режимами)"""
+        val_loss_sum, num_examples = self._evaluate_totals(model, loader, criterion)
+        return val_loss_sum / max(1, num_examples)
+    
+    def _evaluate_totals(self, model: nn.Module, loader, criterion: nn.Module) -> Tuple[float, int]:
+        """Сумма loss по примерам валидации и их число"""
+        model.eval()
+        val_loss_total = torch.zeros((), device=self.device)
+        num_examples = 0
+        
+        with torch.no_grad():
+            for batch in loader:
+                text = batch['text'].to(self.device)
+                status = batch['status'].to(self.device)
+                outputs = model(text)
+                # criterion усредняет по батчу: сумма - с весом размера батча
+                loss = criterion(outputs, status)
+                val_loss_total += loss * status.size(0)
+                num_examples += status.size(0)
+        
+        return val_loss_total.item(), num_examples
     
     def get_training_progress(self, training_id: str) -> Optional[TrainingProgress]:
         """Получение прогресса обучения"""
@@ -372,11 +1087,13 @@ class TrainingService:
         self,
         training_examples: List[Dict],
         vocab: Vocabulary,
-        encoders: Dict
+        encoders: Dict,
+        build_vocab: bool = True
     ) -> TaskDataset:
         """Подготовка датасета"""
         texts = [ex['text'] for ex in training_examples]
-        vocab.build_from_texts(texts)
+        if build_vocab:
+            vocab.build_from_texts(texts)
         
         # Конвертация в нужный формат
         from app.core.dataset import TrainingData, TaskInfo
@@ -401,5 +1118,7 @@ class TrainingService:
             texts=[ex.text for ex in formatted_examples],
             labels=[ex.labels for ex in formatted_examples],
             vocab=vocab,
-            encoders=encoders
+            encoders=encoders,
+            max_len=settings.MAX_TEXT_LEN,
+            cache_dir=settings.DATASET_CACHE_DIR
         )
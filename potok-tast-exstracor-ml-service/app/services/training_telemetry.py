@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import torch
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("data", "forward", "backward", "optimizer")
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS текущего процесса в МБ"""
+    if resource is None:
+        return None
+    # ru_maxrss: КБ в Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+class TrainingTelemetry:
+    """
+    Телеметрия производительности обучения
+    
+    Время шага делится на фазы: ожидание данных, forward (с loss),
+    backward и шаг оптимизатора. На CUDA перед каждой отметкой
+    выполняется синхронизация, иначе время ушло бы в следующую фазу.
+    """
+    
+    def __init__(self, device: str = "cpu", world_size: int = 1):
+        """
+        Args:
+            device: Устройство обучения
+            world_size: Число процессов DDP (пропускная способность - на всё обучение)
+        """
+        self.world_size = world_size
+        self._sync = torch.cuda.synchronize if device.startswith("cuda") else None
+        self.epochs: List[Dict[str, Any]] = []
+        self._reset_epoch()
+    
+    def _reset_epoch(self):
+        self._phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self._steps = 0
+        self._samples = 0
+        self._val_seconds = 0.0
+        self._epoch_start = self._mark = time.perf_counter()
+    
+    def start_epoch(self):
+        """Начало эпохи"""
+        self._reset_epoch()
+    
+    def mark(self, phase: str):
+        """Завершение фазы шага: время с предыдущей отметки относится к phase"""
+        if self._sync is not None:
+            self._sync()
+        now = time.perf_counter()
+        self._phase_seconds[phase] += now - self._mark
+        self._mark = now
+    
+    def step(self, samples: int):
+        """Завершение шага обучения"""
+        self._steps += 1
+        self._samples += samples
+    
+    @contextmanager
+    def validation(self):
+        """Замер времени валидации"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._val_seconds += time.perf_counter() - start
+    
+    def end_epoch(self) -> Dict[str, Any]:
+        """Итоги эпохи (пропускная способность, время фаз на шаг, валидация)"""
+        epoch_seconds = time.perf_counter() - self._epoch_start
+        train_seconds = max(epoch_seconds - self._val_seconds, 1e-9)
+        steps = max(1, self._steps)
+        
+        stats = {
+            "samples_per_sec": round(self._samples * self.world_size / train_seconds, 1),
+            "step_time_ms": {
+                phase: round(seconds / steps * 1000, 3)
+                for phase, seconds in self._phase_seconds.items()
+            },
+            "steps": self._steps,
+            "epoch_seconds": round(epoch_seconds, 3),
+            "val_seconds": round(self._val_seconds, 3),
+            "peak_rss_mb": peak_rss_mb()
+        }
+        self.epochs.append(stats)
+        return stats
+    
+    def estimate_remaining(self, remaining_epochs: int) -> Optional[int]:
+        """
+        Оценка оставшегося времени по последним эпохам
+        
+        Первая эпоха (прогрев, компиляция, запуск воркеров) в оценку
+        не входит, если есть более поздние.
+        """
+        if not self.epochs:
+            return None
+        recent = self.epochs[1:] if len(self.epochs) > 1 else self.epochs
+        recent = recent[-3:]
+        avg_epoch = sum(e["epoch_seconds"] for e in recent) / len(recent)
+        return int(avg_epoch * remaining_epochs)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Текущая эпоха и средние по обучению (для progress.metrics и метаданных)"""
+        if not self.epochs:
+            return {}
+        last = self.epochs[-1]
+        steady = self.epochs[1:] or self.epochs
+        total_steps = sum(e["steps"] for e in steady) or 1
+        return {
+            **last,
+            "avg_samples_per_sec": round(
+                sum(e["samples_per_sec"] for e in steady) / len(steady), 1
+            ),
+            "avg_step_time_ms": {
+                phase: round(sum(e["step_time_ms"][phase] * e["steps"] for e in steady) / total_steps, 3)
+                for phase in PHASES
+            },
+            "avg_val_seconds": round(sum(e["val_seconds"] for e in steady) / len(steady), 3),
+            "epochs_measured": len(self.epochs)
+        }
@@ -0,0 +1,134 @@
+"""
+Метрики Prometheus
+
+При PROMETHEUS_MULTIPROC_DIR каждый воркер пишет значения в файлы этой
+директории, а /metrics любого воркера собирает их вместе. Переменная
+окружения должна быть задана до первого импорта prometheus_client.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    Path(os.environ["PROMETHEUS_MULTIPROC_DIR"]).mkdir(parents=True, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess  # noqa: E402
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Короткие интервалы: forward и правила занимают доли миллисекунды
+_FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+REQUEST_LATENCY = Histogram(
+    "task_extraction_request_duration_seconds",
+    "Время обработки HTTP запроса",
+    ["method", "endpoint", "status"]
+)
+BATCH_SIZE = Histogram(
+    "task_extraction_batch_size",
+    "Число текстов в пакетном запросе",
+    buckets=(1, 2, 5, 10, 20, 50, 100)
+)
+FORWARD_SECONDS = Histogram(
+    "task_extraction_forward_seconds",
+    "Время forward pass модели на один текст",
+    ["model_name"],
+    buckets=_FAST_BUCKETS
+)
+RULES_SECONDS = Histogram(
+    "task_extraction_rules_seconds",
+    "Время извлечения признаков правилами",
+    buckets=_FAST_BUCKETS
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "task_extraction_queue_wait_seconds",
+    "Ожидание в очереди (обучения, теневого прогона)",
+    ["queue"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 5, 30, 60, 300, 900, 3600)
+)
+PREDICTIONS = Counter(
+    "task_extraction_predictions",
+    "Предсказания по результату",
+    ["result"]
+)
+CACHE_SIZE = Gauge(
+    "task_extraction_cache_entries",
+    "Записей в кеше предсказаний",
+    multiprocess_mode="livesum"
+)
+MODEL_LOADED = Gauge(
+    "task_extraction_model_loaded",
+    "Версия основной модели (1 - обслуживает запросы)",
+    ["model_name", "version"],
+    multiprocess_mode="liveall"
+)
+MODEL_WEIGHTS_BYTES = Gauge(
+    "task_extraction_model_weights_bytes",
+    "Объём весов загруженных моделей (основная и пул)",
+    multiprocess_mode="livesum"
+)
+PROCESS_RSS_BYTES = Gauge(
+    "task_extraction_process_resident_memory_bytes",
+    "Резидентная память процесса",
+    multiprocess_mode="liveall"
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_rss_updated = 0.0
+_served_model: Optional[Tuple[str, str]] = None
+
+def update_memory(min_interval: float = 5.0):
+    """Обновление RSS процесса (не чаще min_interval секунд)"""
+    global _rss_updated
+    now = time.monotonic()
+    if now - _rss_updated < min_interval:
+        return
+    _rss_updated = now
+    try:
+        with open("/proc/self/statm") as f:
+            PROCESS_RSS_BYTES.set(int(f.read().split()[1]) * _PAGE_SIZE)
+    except OSError:
+        pass
+
+def set_served_model(model_name: str, version: str):
+    """Отметка версии, обслуживающей запросы (предыдущая сбрасывается в 0)"""
+    global _served_model
+    if _served_model is not None:
+        MODEL_LOADED.labels(*_served_model).set(0)
+    _served_model = (model_name, version)
+    MODEL_LOADED.labels(model_name, version).set(1)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Текст экспозиции (при нескольких процессах - суммарно по воркерам)"""
+    update_memory(min_interval=0)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid: Optional[int] = None):
+    """
+    Удаление live-метрик воркера (по умолчанию - текущего процесса)
+    
+    Вызывается при остановке приложения: иначе значения RSS, кеша и
+    загруженных моделей завершившегося воркера остаются в сумме /metrics.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
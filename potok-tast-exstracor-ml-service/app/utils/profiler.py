@@ -0,0 +1,122 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Кадры, в которых поток ждёт (событий, блокировки, задач), а не работает
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),  # concurrent.futures: ожидание задачи
+}
+
+@functools.lru_cache(maxsize=4096)
+def _frame_label(code) -> str:
+    """Функция и модуль кадра (путь относительно sys.path)"""
+    filename = code.co_filename
+    for root in sorted(filter(None, sys.path), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик CPU
+    
+    Фоновый поток с заданным интервалом снимает стеки всех потоков
+    процесса (sys._current_frames): event loop, потоки executor'а,
+    теневой прогон. Код не инструментируется, накладные расходы - один
+    обход стеков за сэмпл. Нативные кадры torch не видны: время
+    относится к вызывающей Python функции (forward слоя и т.п.).
+    """
+    
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        """
+        Args:
+            interval: Интервал сэмплирования в секундах
+            include_idle: Учитывать потоки, ожидающие событий или блокировок
+        """
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+    
+    def _run(self):
+        own_ident = threading.get_ident()
+        start = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                leaf = frame.f_code
+                if not self.include_idle and (
+                    os.path.basename(leaf.co_filename), leaf.co_name
+                ) in IDLE_FRAMES:
+                    continue
+                
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.duration = time.perf_counter() - start
+    
+    def collapsed(self) -> str:
+        """Стеки в формате collapsed (flamegraph.pl, speedscope, inferno)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+    
+    def top(self, limit: int = 30) -> List[Dict[str, Any]]:
+        """Функции по собственному (self) и общему (total) числу сэмплов"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        
+        return [
+            {"function": label, "self": count, "total": total[label]}
+            for label, count in own.most_common(limit)
+        ]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "stacks": len(self.stacks)
+        }
+
+_active_lock = threading.Lock()
+
+def acquire_profiler() -> bool:
+    """Профилирование - по одному за раз (False - уже идёт)"""
+    return _active_lock.acquire(blocking=False)
+
+def release_profiler():
+    _active_lock.release()
@@ -0,0 +1,116 @@
+"""
+Сравнение архитектур модели: точность, латентность и размер
+
+Каждая архитектура обучается на одних и тех же данных, точность считается
+на отложенной части примеров, латентность - медиана forward одного текста.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Модели бенчмарка не должны попадать в реестр сервиса
+os.environ.setdefault("MODEL_DIR", tempfile.mkdtemp(prefix="benchmark_models_"))
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+
+from app.core.models import MODEL_ARCHITECTURES
+from app.services.model_manager import ModelManager
+from app.services.training_service import TrainingService, model_footprint
+from benchmark_training import _load_examples
+
+def _evaluate(model_name: str, holdout: List[Dict[str, Any]]) -> Dict[str, Any]:
+    model, vocab, encoders = ModelManager().load_model(model_name, device="cpu")
+    text_ids = torch.tensor([vocab.encode(ex['text']) for ex in holdout], dtype=torch.long)
+    statuses = torch.tensor([encoders['status'].encode(ex['labels']['status']) for ex in holdout])
+    
+    model.eval()
+    with torch.no_grad():
+        predictions = model(text_ids).argmax(dim=1)
+    return {
+        "accuracy": round((predictions == statuses).float().mean().item(), 4),
+        **model_footprint(model, text_ids)
+    }
+
+def run_benchmark(
+    examples: List[Dict[str, Any]],
+    architectures: Optional[List[str]] = None,
+    epochs: int = 10,
+    batch_size: int = 32,
+    tokenizer: Optional[str] = None
+) -> Dict[str, Any]:
+    """Обучение каждой архитектуры и сравнение с StatusNet"""
+    examples = list(examples)
+    random.Random(0).shuffle(examples)
+    holdout_size = max(1, len(examples) // 5)
+    holdout, train = examples[:holdout_size], examples[holdout_size:]
+    
+    results = {}
+    for architecture in architectures or list(MODEL_ARCHITECTURES):
+        model_name = f"benchmark_{architecture}"
+        # duration_seconds обучения округлён до секунд - для коротких прогонов 0
+        start = time.perf_counter()
+        result = asyncio.run(TrainingService().train_new_model(
+            train,
+            epochs=epochs,
+            batch_size=batch_size,
+            model_name=model_name,
+            save_checkpoint=False,
+            training_id="benchmark",
+            early_stopping_patience=0,
+            tokenizer=tokenizer,
+            architecture=architecture
+        ))
+        train_seconds = time.perf_counter() - start
+        results[architecture] = {
+            "best_val_loss": round(result['final_loss'], 4),
+            "train_seconds": round(train_seconds, 3),
+            **_evaluate(model_name, holdout)
+        }
+    
+    baseline = results.get("status_net")
+    if baseline:
+        for stats in results.values():
+            stats["speedup_vs_status_net"] = round(
+                baseline["latency_ms_p50"] / max(stats["latency_ms_p50"], 1e-6), 1
+            )
+    return {
+        "train_examples": len(train),
+        "holdout_examples": len(holdout),
+        "epochs": epochs,
+        "threads": torch.get_num_threads(),
+        "architectures": results
+    }
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Сравнение архитектур модели')
+    parser.add_argument('--data', type=str, default=None, help='JSON файл с training_examples')
+    parser.add_argument('--synthetic', type=int, default=2000, help='Число синтетических примеров без --data')
+    parser.add_argument(
+        '--architectures', type=str, nargs='+', default=None,
+        choices=list(MODEL_ARCHITECTURES), help='Архитектуры (по умолчанию все)'
+    )
+    parser.add_argument('--epochs', type=int, default=10, help='Количество эпох')
+    parser.add_argument('--batch-size', type=int, default=32, help='Размер батча')
+    parser.add_argument('--tokenizer', type=str, default=None, choices=['vocab', 'hashing'])
+    
+    args = parser.parse_args()
+    
+    report = run_benchmark(
+        _load_examples(args.data, args.synthetic),
+        architectures=args.architectures,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        tokenizer=args.tokenizer
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
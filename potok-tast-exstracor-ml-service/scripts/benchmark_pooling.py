@@ -0,0 +1,106 @@
+"""
+Время forward StatusNet: исходный режим ("last", вся дополненная
+последовательность) против packed последовательностей с pooling по маске
+
+Длины текстов берутся из датасета (или синтетические), последовательности
+дополняются до MAX_TEXT_LEN - как в обучении и предсказаниях.
+"""
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+
+from app.config.settings import get_settings
+from app.core.models import StatusNet
+
+settings = get_settings()
+
+def _text_lengths(data_file: Optional[str], count: int) -> List[int]:
+    if not data_file:
+        rng = random.Random(0)
+        return [rng.randint(3, 40) for _ in range(count)]
+    with open(data_file, 'r', encoding='utf-8') as f:
+        examples = json.load(f).get('training_examples', [])
+    return [max(1, len(ex['text'].split())) for ex in examples]
+
+def _batches(lengths: List[int], batch_size: int, vocab_size: int) -> List[torch.Tensor]:
+    batches = []
+    for start in range(0, len(lengths), batch_size):
+        chunk = lengths[start:start + batch_size]
+        text_ids = torch.zeros(len(chunk), settings.MAX_TEXT_LEN, dtype=torch.long)
+        for row, length in enumerate(chunk):
+            length = min(length, settings.MAX_TEXT_LEN)
+            text_ids[row, :length] = torch.randint(2, vocab_size, (length,))
+        batches.append(text_ids)
+    return batches
+
+def _time_forward(model: StatusNet, batches: List[torch.Tensor], repeats: int) -> float:
+    """Медиана времени прохода по всем батчам, мс"""
+    timings = []
+    with torch.no_grad():
+        for batch in batches[:2]:
+            model(batch)  # прогрев
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for batch in batches:
+                model(batch)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def run_benchmark(
+    lengths: List[int],
+    batch_sizes: List[int],
+    repeats: int = 3,
+    vocab_size: int = 5000
+) -> Dict:
+    model = StatusNet(
+        vocab_size=vocab_size,
+        embedding_dim=settings.EMBEDDING_DIM,
+        hidden_dim=settings.HIDDEN_DIM,
+        num_statuses=7
+    ).eval()
+    
+    report = {
+        "texts": len(lengths),
+        "mean_length": round(statistics.mean(lengths), 1),
+        "max_len": settings.MAX_TEXT_LEN,
+        "threads": torch.get_num_threads(),
+        "results": []
+    }
+    for batch_size in batch_sizes:
+        batches = _batches(lengths, batch_size, vocab_size)
+        timings = {}
+        for pooling in StatusNet.POOLING_MODES:
+            model.set_pooling(pooling)
+            timings[pooling] = round(_time_forward(model, batches, repeats), 1)
+        report["results"].append({
+            "batch_size": batch_size,
+            "forward_ms": timings,
+            "reduction_mean_vs_last": round(1 - timings["mean"] / timings["last"], 3)
+        })
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Бенчмарк packed последовательностей StatusNet')
+    parser.add_argument('--data', type=str, default=None, help='JSON файл с training_examples (длины текстов)')
+    parser.add_argument('--synthetic', type=int, default=256, help='Число синтетических текстов без --data')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32], help='Размеры батча')
+    parser.add_argument('--repeats', type=int, default=3, help='Повторов замера')
+    
+    args = parser.parse_args()
+    
+    print(json.dumps(
+        run_benchmark(_text_lengths(args.data, args.synthetic), args.batch_sizes, args.repeats),
+        indent=2,
+        ensure_ascii=False
+    ))
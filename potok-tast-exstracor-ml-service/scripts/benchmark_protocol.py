@@ -0,0 +1,206 @@
+"""
+Сравнение JSON API и бинарного протокола (MessagePack): размер и CPU сервера
+
+Сервис запускается отдельным процессом uvicorn, CPU считается по
+/proc/<pid>/stat (utime + stime) за серию запросов - без учёта затрат
+клиента. По умолчанию тексты повторяются (ответы из кеша), --cold -
+каждый запрос с новыми текстами (с forward модели).
+"""
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("MODEL_DIR", tempfile.mkdtemp(prefix="benchmark_models_"))
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import msgpack
+
+from benchmark_training import STATUSES, WORDS
+
+ROOT = Path(__file__).parent.parent
+API = "/api/v1/predict"
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime и stime - 14 и 15 поля (после имени процесса - с 3-го)
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _synthetic_texts(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(5, 40)) + [rng.choice(STATUSES).split()[-1]])
+        for _ in range(count)
+    ]
+
+def _prepare_model(texts: List[str]) -> str:
+    """Необученная StatusNet со словарём по текстам: для протокола точность не важна"""
+    from app.core.models import build_model
+    from app.core.vocabulary import LabelEncoder, Vocabulary
+    from app.services.model_manager import ModelManager
+    
+    vocab = Vocabulary()
+    vocab.build_from_texts(texts)
+    encoder = LabelEncoder()
+    encoder.fit(STATUSES)
+    model = build_model("status_net", vocab.vocab_size, encoder.num_classes, embedding_dim=100, hidden_dim=128)
+    ModelManager().save_model(model, vocab, {'status': encoder}, "benchmark_protocol")
+    return "benchmark_protocol"
+
+def _start_server(model_name: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MODEL_NAME": model_name,
+        # Логи каждого запроса заняли бы заметную часть CPU
+        "LOG_LEVEL": "WARNING"
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/monitoring/ping").status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Сервис не запустился")
+
+def _measure(
+    client: httpx.Client,
+    pid: int,
+    requests: int,
+    make_request: Callable[[int], httpx.Request]
+) -> Dict[str, Any]:
+    request_bytes = response_bytes = 0
+    latencies = []
+    cpu_start = _cpu_seconds(pid)
+    for i in range(requests):
+        request = make_request(i)
+        start = time.perf_counter()
+        response = client.send(request)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        request_bytes += len(request.content)
+        response_bytes += len(response.content)
+    cpu = _cpu_seconds(pid) - cpu_start
+    
+    latencies.sort()
+    return {
+        "request_bytes": round(request_bytes / requests),
+        "response_bytes": round(response_bytes / requests),
+        "server_cpu_ms": round(cpu / requests * 1000, 3),
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 3)
+    }
+
+def run_benchmark(
+    requests: int = 1000,
+    batch_size: int = 50,
+    cold: bool = False,
+    model_name: Optional[str] = None
+) -> Dict[str, Any]:
+    texts = _synthetic_texts(500)
+    if model_name is None:
+        model_name = _prepare_model(texts)
+    
+    port = _free_port()
+    server = _start_server(model_name, port)
+    try:
+        client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30)
+        
+        run = itertools.count()
+        
+        def batch_texts(i: int, size: int) -> List[str]:
+            chosen = [texts[(i * size + j) % len(texts)] for j in range(size)]
+            if not cold:
+                return chosen
+            # Уникальный суффикс - промах кеша (в том числе после другого протокола)
+            suffix = next(run)
+            return [f"{text} {suffix}-{j}" for j, text in enumerate(chosen)]
+        
+        scenarios = {
+            "single": 1,
+            f"batch_{batch_size}": batch_size
+        }
+        report: Dict[str, Any] = {}
+        for scenario, size in scenarios.items():
+            json_path = f"{API}/" if size == 1 else f"{API}/batch"
+            
+            def json_request(i: int) -> httpx.Request:
+                batch = batch_texts(i, size)
+                body = {"text": batch[0]} if size == 1 else {"texts": batch}
+                return client.build_request("POST", json_path, json=body)
+            
+            def msgpack_request(i: int) -> httpx.Request:
+                return client.build_request(
+                    "POST", f"{API}/msgpack",
+                    content=msgpack.packb({"texts": batch_texts(i, size)}),
+                    headers={"Content-Type": "application/msgpack"}
+                )
+            
+            # Прогрев: кеш и ленивые инициализации в обоих путях
+            warmup = min(requests, len(texts))
+            _measure(client, server.pid, warmup, json_request)
+            _measure(client, server.pid, warmup, msgpack_request)
+            
+            json_stats = _measure(client, server.pid, requests, json_request)
+            msgpack_stats = _measure(client, server.pid, requests, msgpack_request)
+            report[scenario] = {
+                "json": json_stats,
+                "msgpack": msgpack_stats,
+                "response_size_ratio": round(
+                    msgpack_stats["response_bytes"] / max(json_stats["response_bytes"], 1), 3
+                ),
+                "server_cpu_ratio": round(
+                    msgpack_stats["server_cpu_ms"] / max(json_stats["server_cpu_ms"], 1e-6), 3
+                )
+            }
+        client.close()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    
+    return {
+        "requests": requests,
+        "cache": "miss" if cold else "hit",
+        "cpu_tick_ms": 1000 / _CLOCK_TICKS,
+        "scenarios": report
+    }
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Сравнение JSON и MessagePack протоколов предсказания')
+    parser.add_argument('--requests', type=int, default=1000, help='Запросов на сценарий')
+    parser.add_argument('--batch-size', type=int, default=50, help='Текстов в пакетном сценарии')
+    parser.add_argument('--cold', action='store_true', help='Новые тексты в каждом запросе (без кеша)')
+    parser.add_argument('--model', type=str, default=None, help='Модель из MODEL_DIR (по умолчанию - временная необученная)')
+    
+    args = parser.parse_args()
+    
+    report = run_benchmark(
+        requests=args.requests,
+        batch_size=args.batch_size,
+        cold=args.cold,
+        model_name=args.model
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,131 @@
+"""
+Сравнение скорости обучения: обычный режим и быстрый (bfloat16 + torch.compile)
+
+Обе конфигурации обучаются на одних и тех же данных с одинаковым
+разбиением train/val, в отчёт попадают samples/sec и лучший val loss.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Модели бенчмарка не должны попадать в реестр сервиса
+os.environ.setdefault("MODEL_DIR", tempfile.mkdtemp(prefix="benchmark_models_"))
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+
+from app.services.training_service import TrainingService, bf16_autocast_supported
+
+STATUSES = ["новая", "в работе", "на проверке", "завершена", "отложена"]
+WORDS = [
+    "сделать", "проверить", "отчёт", "срочно", "сайт", "пятницы", "встреча",
+    "клиент", "исправить", "баг", "написать", "документацию", "позвонить",
+    "купить", "задача", "важно", "часов", "до", "завтра", "релиз"
+]
+
+def _synthetic_examples(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Синтетические примеры, если датасет не передан"""
+    rng = random.Random(seed)
+    examples = []
+    for _ in range(count):
+        status = rng.choice(STATUSES)
+        words = rng.choices(WORDS, k=rng.randint(5, 40)) + [status.split()[-1]]
+        examples.append({
+            "text": " ".join(words),
+            "labels": {
+                "name": "-", "description": "-", "priority": 3, "deadline": None,
+                "execution_time": "-", "category": [], "difficulty": 5,
+                "stages": [], "status": status
+            }
+        })
+    return examples
+
+def _load_examples(data_file: Optional[str], synthetic: int) -> List[Dict[str, Any]]:
+    if not data_file:
+        return _synthetic_examples(synthetic)
+    with open(data_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('training_examples', [])
+
+def _run(examples: List[Dict[str, Any]], fast_mode: bool, epochs: int, batch_size: int) -> dict:
+    service = TrainingService()
+    epoch_marks: List[float] = []
+    train_losses: List[float] = []
+    
+    async def on_progress(progress):
+        epoch_marks.append(time.perf_counter())
+        train_losses.append(progress.current_loss)
+    
+    start = time.perf_counter()
+    result = asyncio.run(service.train_new_model(
+        examples,
+        epochs=epochs,
+        batch_size=batch_size,
+        model_name=f"benchmark_{'fast' if fast_mode else 'baseline'}",
+        save_checkpoint=False,
+        progress_callback=on_progress,
+        # Одинаковое разбиение для обоих режимов
+        training_id="benchmark",
+        early_stopping_patience=0,
+        fast_mode=fast_mode
+    ))
+    duration = time.perf_counter() - start
+    
+    train_samples = result['metrics']['train_samples']
+    # Первая эпоха в быстром режиме включает компиляцию
+    steady_seconds = epoch_marks[-1] - epoch_marks[0] if len(epoch_marks) > 1 else None
+    return {
+        "fast_mode": fast_mode,
+        "duration_seconds": round(duration, 2),
+        "samples_per_sec": round(train_samples * epochs / duration, 1),
+        "steady_samples_per_sec": (
+            round(train_samples * (len(epoch_marks) - 1) / steady_seconds, 1)
+            if steady_seconds else None
+        ),
+        "final_train_loss": round(train_losses[-1], 4),
+        "best_val_loss": round(result['final_loss'], 4)
+    }
+
+def run_benchmark(
+    examples: List[Dict[str, Any]],
+    epochs: int = 5,
+    batch_size: int = 32
+) -> dict:
+    """Обучение в обоих режимах и сравнение"""
+    baseline = _run(examples, False, epochs, batch_size)
+    fast = _run(examples, True, epochs, batch_size)
+    return {
+        "examples": len(examples),
+        "epochs": epochs,
+        "torch": torch.__version__,
+        "bf16_supported": bf16_autocast_supported(),
+        "baseline": baseline,
+        "fast": fast,
+        "speedup": round(fast['samples_per_sec'] / baseline['samples_per_sec'], 2),
+        "val_loss_delta": round(fast['best_val_loss'] - baseline['best_val_loss'], 4)
+    }
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Бенчмарк быстрого режима обучения')
+    parser.add_argument('--data', type=str, default=None, help='JSON файл с training_examples')
+    parser.add_argument('--synthetic', type=int, default=2000, help='Число синтетических примеров без --data')
+    parser.add_argument('--epochs', type=int, default=5, help='Количество эпох')
+    parser.add_argument('--batch-size', type=int, default=32, help='Размер батча')
+    
+    args = parser.parse_args()
+    
+    report = run_benchmark(
+        _load_examples(args.data, args.synthetic),
+        epochs=args.epochs,
+        batch_size=args.batch_size
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,90 @@
+"""
+Перевод весов сохранённых версий из model.pth в формат для mmap
+
+Новые версии сохраняются в нём при WEIGHTS_FORMAT=mmap; скрипт переводит
+уже существующие. ModelManager загружает model.weights, если он есть,
+иначе model.pth - поэтому версии можно переводить по одной.
+"""
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.model_manager import ModelManager
+from app.utils.logger import setup_logger
+
+logger = setup_logger("convert_weights", "INFO")
+
+def _load_ms(manager: ModelManager, model_name: str, version: str, runs: int = 5) -> float:
+    """Медианное время загрузки версии, мс"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        manager.load_model(model_name, version, device="cpu")
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+def convert(
+    model_names: List[str],
+    version: Optional[str] = None,
+    all_versions: bool = False,
+    fp16: bool = False,
+    keep_pth: bool = False
+):
+    manager = ModelManager()
+    models = manager.list_models()
+    
+    for model_name in model_names:
+        if model_name not in models:
+            logger.error(f"❌ Модель {model_name} не найдена")
+            continue
+        
+        if all_versions:
+            versions = [v["version"] for v in models[model_name]]
+        else:
+            versions = [manager.resolve_version(model_name, version)]
+        
+        for model_version in versions:
+            if model_version is None:
+                logger.error(f"❌ Версия {model_name}/{version or 'latest'} не найдена")
+                continue
+            
+            # До конвертации версия грузится через torch.load
+            pth_ms = _load_ms(manager, model_name, model_version)
+            result = manager.convert_weights(
+                model_name, model_version, fp16=fp16, keep_pth=True
+            )
+            if not result["converted"]:
+                logger.info(f"⏭️ {model_name}/{model_version}: уже в формате mmap")
+                continue
+            
+            mmap_ms = _load_ms(manager, model_name, model_version)
+            if not keep_pth:
+                (manager.models_dir / model_name / model_version / "model.pth").unlink()
+            logger.info(
+                f"✅ {model_name}/{model_version}: {result['pth_mb']} МБ -> "
+                f"{result['weights_mb']} МБ, загрузка {pth_ms:.1f} -> {mmap_ms:.1f} мс"
+            )
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Перевод весов моделей в формат для mmap')
+    parser.add_argument('models', nargs='+', help='Имена моделей')
+    parser.add_argument('--version', type=str, default=None, help='Версия (по умолчанию latest)')
+    parser.add_argument('--all-versions', action='store_true', help='Все версии модели')
+    parser.add_argument('--fp16', action='store_true', help='Хранить веса в float16')
+    parser.add_argument('--keep-pth', action='store_true', help='Не удалять model.pth')
+    
+    args = parser.parse_args()
+    
+    convert(
+        args.models,
+        version=args.version,
+        all_versions=args.all_versions,
+        fp16=args.fp16,
+        keep_pth=args.keep_pth
+    )
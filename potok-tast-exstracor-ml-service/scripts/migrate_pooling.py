@@ -0,0 +1,69 @@
+"""
+Миграция модели StatusNet на packed последовательности с pooling по маске
+
+Веса моделей, обученных в режиме "last", подходят для новых режимов без
+изменений (набор параметров тот же), но классификатор обучен на другом
+представлении текста - поэтому модель коротко дообучается на данных.
+Результат сохраняется новой версией <модель>_finetuned, исходная не меняется.
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.training_service import TrainingService
+from app.utils.logger import setup_logger
+
+logger = setup_logger("migrate_pooling", "INFO")
+
+async def migrate(
+    model_name: str,
+    data_file: str,
+    version: Optional[str] = None,
+    pooling: str = "mean",
+    epochs: int = 3,
+    learning_rate: float = 0.0005
+) -> dict:
+    with open(data_file, 'r', encoding='utf-8') as f:
+        training_examples = json.load(f).get('training_examples', [])
+    
+    result = await TrainingService().fine_tune_model(
+        model_name=model_name,
+        model_version=version,
+        training_examples=training_examples,
+        epochs=epochs,
+        learning_rate=learning_rate,
+        freeze_embedding=False,
+        pooling=pooling
+    )
+    logger.info(
+        f"✅ {model_name}/{version or 'latest'} -> {result['model_name']}/{result['model_version']} "
+        f"(pooling={pooling}, loss {result['final_loss']:.4f})"
+    )
+    return result
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Миграция StatusNet на pooling по маске')
+    parser.add_argument('model', type=str, help='Имя модели')
+    parser.add_argument('--data', type=str, required=True, help='JSON файл с training_examples')
+    parser.add_argument('--version', type=str, default=None, help='Версия (по умолчанию latest)')
+    parser.add_argument('--pooling', type=str, default='mean', choices=['mean', 'attention'])
+    parser.add_argument('--epochs', type=int, default=3, help='Эпох дообучения')
+    parser.add_argument('--lr', type=float, default=0.0005, help='Learning rate')
+    
+    args = parser.parse_args()
+    
+    asyncio.run(migrate(
+        args.model,
+        args.data,
+        version=args.version,
+        pooling=args.pooling,
+        epochs=args.epochs,
+        learning_rate=args.lr
+    ))
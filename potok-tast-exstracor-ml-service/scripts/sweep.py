@@ -0,0 +1,75 @@
+"""
+Подбор гиперпараметров из командной строки
+
+Все конфигурации обучаются на одном заранее токенизированном датасете,
+лучшая регистрируется как новая версия модели.
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.sweep_service import SweepService, build_trials
+from app.utils.logger import setup_logger
+
+logger = setup_logger("sweep_script", "INFO")
+
+async def run_sweep(args) -> dict:
+    with open(args.data, 'r', encoding='utf-8') as f:
+        training_examples = json.load(f).get('training_examples', [])
+    
+    trials = build_trials(
+        {
+            "learning_rate": args.lr,
+            "batch_size": args.batch_size,
+            "embedding_dim": args.embedding_dim,
+            "hidden_dim": args.hidden_dim
+        },
+        max_trials=args.max_trials
+    )
+    logger.info(f"🔬 {len(trials)} испытаний на {len(training_examples)} примерах")
+    
+    async def on_progress(progress):
+        logger.info(
+            f"Испытаний завершено: {progress.current_epoch}/{progress.total_epochs}, "
+            f"лучший val loss: {progress.best_loss}"
+        )
+    
+    return await SweepService().run_sweep(
+        training_examples,
+        trials=trials,
+        epochs=args.epochs,
+        model_name=args.name,
+        max_parallel=args.parallel,
+        cpu_budget=args.cpu_budget,
+        prune_warmup_epochs=args.prune_warmup,
+        progress_callback=on_progress
+    )
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Подбор гиперпараметров модели')
+    parser.add_argument('data', type=str, help='JSON файл с training_examples')
+    parser.add_argument('--lr', type=float, nargs='+', default=[], help='Значения learning rate')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[], help='Значения размера батча')
+    parser.add_argument('--embedding-dim', type=int, nargs='+', default=[], help='Значения EMBEDDING_DIM')
+    parser.add_argument('--hidden-dim', type=int, nargs='+', default=[], help='Значения HIDDEN_DIM')
+    parser.add_argument('--max-trials', type=int, default=None, help='Случайная выборка из сетки')
+    parser.add_argument('--epochs', type=int, default=10, help='Эпох на испытание')
+    parser.add_argument('--parallel', type=int, default=None, help='Испытаний одновременно')
+    parser.add_argument('--cpu-budget', type=int, default=None, help='Потоков torch на весь перебор')
+    parser.add_argument('--prune-warmup', type=int, default=None, help='Эпох до медианного отсечения')
+    parser.add_argument('--name', type=str, default=None, help='Имя модели')
+    
+    args = parser.parse_args()
+    
+    result = asyncio.run(run_sweep(args))
+    print(json.dumps(
+        {key: result[key] for key in ("model_name", "model_version", "final_loss", "metrics", "trials")},
+        indent=2,
+        ensure_ascii=False
+    ))
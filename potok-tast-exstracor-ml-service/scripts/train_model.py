@@ -2,48 +2,71 @@
 Скрипт для обучения модели из командной строки
 """
 import asyncio
+import glob
 import json
 import sys
 from pathlib import Path
+from typing import List, Optional, Union
 
 # Добавление корневой директории в path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.core.models import MODEL_ARCHITECTURES
 from app.services.training_service import TrainingService
 from app.utils.logger import setup_logger
 
 logger = setup_logger("train_script", "INFO")
 
+def is_streaming_source(data_files: List[str]) -> bool:
+    """JSONL шарды (или директории с ними) читаются потоком"""
+    return all(
+        Path(path).is_dir() or path.endswith('.jsonl') or glob.has_magic(path)
+        for path in data_files
+    )
+
 async def train_from_file(
-    data_file: str,
+    data_file: Union[str, List[str]],
     epochs: int = 30,
     batch_size: int = 32,
     learning_rate: float = 0.001,
-    model_name: str = "task_extraction_model"
+    model_name: str = "task_extraction_model",
+    shuffle_buffer: Optional[int] = None,
+    architecture: Optional[str] = None
 ):
     """
-    Обучение модели из JSON файла
+    Обучение модели из JSON файла или JSONL шардов
     
     Args:
-        data_file: Путь к файлу с тренировочными данными
+        data_file: JSON файл с training_examples или JSONL шарды
+            (файлы, директории, glob) - они читаются потоком
         epochs: Количество эпох
         batch_size: Размер батча
         learning_rate: Learning rate
         model_name: Имя модели
+        shuffle_buffer: Размер буфера перемешивания для JSONL
+        architecture: Архитектура модели (по умолчанию из настроек)
     """
-    logger.info(f"📚 Загрузка данных из {data_file}")
+    data_files = [data_file] if isinstance(data_file, str) else list(data_file)
+    streaming = is_streaming_source(data_files)
     
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        training_options = {}
+        if streaming:
+            logger.info(f"📚 Потоковое обучение по шардам: {data_files}")
+            training_options = {"data_files": data_files, "shuffle_buffer": shuffle_buffer}
+        else:
+            logger.info(f"📚 Загрузка данных из {data_files[0]}")
+            with open(data_files[0], 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
-        training_examples = data.get('training_examples', [])
+            training_examples = data.get('training_examples', [])
         
-        if len(training_examples) < 10:
-            logger.error("❌ Недостаточно данных (минимум 10 примеров)")
-            return
+            if len(training_examples) < 10:
+                logger.error("❌ Недостаточно данных (минимум 10 примеров)")
+                return
         
-        logger.info(f"✅ Загружено {len(training_examples)} примеров")
+            logger.info(f"✅ Загружено {len(training_examples)} примеров")
+            training_options = {"training_examples": training_examples}
         
         # Создание сервиса обучения
         training_service = TrainingService()
@@ -51,12 +74,13 @@ async def train_from_file(
         # Запуск обучения
         logger.info("🚀 Начало обучения...")
         result = await training_service.train_new_model(
-            training_examples=training_examples,
             epochs=epochs,
             batch_size=batch_size,
             learning_rate=learning_rate,
             model_name=model_name,
-            save_checkpoint=True
+            save_checkpoint=True,
+            architecture=architecture,
+            **training_options
         )
         
         logger.info("=" * 70)
@@ -71,9 +95,9 @@ async def train_from_file(
         logger.info("=" * 70)
         
     except FileNotFoundError:
-        logger.error(f"❌ Файл {data_file} не найден")
+        logger.error(f"❌ Файл {data_files[0]} не найден")
     except json.JSONDecodeError:
-        logger.error(f"❌ Ошибка парсинга JSON в {data_file}")
+        logger.error(f"❌ Ошибка парсинга JSON в {data_files[0]}")
     except Exception as e:
         logger.error(f"❌ Ошибка: {e}", exc_info=True)
 
@@ -81,11 +105,19 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Обучение модели извлечения задач')
-    parser.add_argument('data_file', type=str, help='Путь к JSON файлу с данными')
+    parser.add_argument(
+        'data_file', type=str, nargs='+',
+        help='JSON файл с данными или JSONL шарды (файлы, директории, glob)'
+    )
     parser.add_argument('--epochs', type=int, default=30, help='Количество эпох')
     parser.add_argument('--batch-size', type=int, default=32, help='Размер батча')
     parser.add_argument('--lr', type=float, default=0.001, help='Learning rate')
     parser.add_argument('--name', type=str, default='task_extraction_model', help='Имя модели')
+    parser.add_argument('--shuffle-buffer', type=int, default=None, help='Буфер перемешивания для JSONL')
+    parser.add_argument(
+        '--architecture', type=str, default=None,
+        choices=list(MODEL_ARCHITECTURES), help='Архитектура модели'
+    )
     
     args = parser.parse_args()
     
@@ -94,5 +126,7 @@ if __name__ == "__main__":
         epochs=args.epochs,
         batch_size=args.batch_size,
         learning_rate=args.lr,
-        model_name=args.name
+        model_name=args.name,
+        shuffle_buffer=args.shuffle_buffer,
+        architecture=args.architecture
     ))
@@ -0,0 +1,146 @@
+"""
+Отчёт о влиянии прунинга словаря на размер модели и скорость инференса
+
+Сравнивает полный словарь с вариантами min_freq/max_size/normalize:
+размер таблицы эмбеддингов, размер чекпоинта и латентность forward.
+Доля OOV и латентность считаются только по реальным текстам (--data):
+тексты, восстановленные из частот vocab.pkl, дают лишь размеры.
+"""
+import io
+import json
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import torch
+
+# Добавление корневой директории в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.core.models import StatusNet
+from app.core.vocabulary import Vocabulary
+
+settings = get_settings()
+
+def _load_texts(data_file: Optional[str], vocab_file: Optional[str]) -> List[str]:
+    """Тексты из датасета или, если его нет, из частот сохранённого словаря"""
+    if data_file:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [ex['text'] for ex in data.get('training_examples', [])]
+    
+    with open(vocab_file, 'rb') as f:
+        saved_vocab = pickle.load(f)
+    # Каждое слово повторяется столько раз, сколько встречалось при обучении
+    return [' '.join([word] * count) for word, count in saved_vocab.word_count.items()]
+
+def _measure(
+    vocab: Vocabulary,
+    texts: List[str],
+    num_classes: int,
+    runs: int,
+    text_metrics: bool = True
+) -> dict:
+    """Размер эмбеддингов, чекпоинта и латентность forward для словаря"""
+    model = StatusNet(
+        vocab_size=vocab.vocab_size,
+        embedding_dim=settings.EMBEDDING_DIM,
+        hidden_dim=settings.HIDDEN_DIM,
+        num_statuses=num_classes
+    )
+    model.eval()
+    
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    
+    embedding_params = vocab.vocab_size * settings.EMBEDDING_DIM
+    total_params = sum(p.numel() for p in model.parameters())
+    
+    report = {
+        "vocab_size": vocab.vocab_size,
+        "embedding_params": embedding_params,
+        "embedding_share": round(embedding_params / total_params, 3),
+        "checkpoint_mb": round(buffer.tell() / 1024 / 1024, 2),
+        # Adam хранит два момента на каждый параметр
+        "optimizer_state_mb": round(total_params * 2 * 4 / 1024 / 1024, 2)
+    }
+    if not text_metrics:
+        return report
+    
+    sample = texts[:runs] if len(texts) >= runs else (texts * runs)[:runs]
+    encoded = [torch.tensor([vocab.encode(text)], dtype=torch.long) for text in sample]
+    tokens = sum(len(vocab.tokenize(text)) for text in texts)
+    unknown = sum(
+        1 for text in texts for word in vocab.tokenize(text)
+        if word not in vocab.word2idx
+    )
+    
+    with torch.no_grad():
+        model(encoded[0])  # прогрев
+        start = time.perf_counter()
+        for text_ids in encoded:
+            model(text_ids)
+        latency_ms = (time.perf_counter() - start) / len(encoded) * 1000
+    
+    report["latency_ms"] = round(latency_ms, 3)
+    report["oov_rate"] = round(unknown / tokens, 4) if tokens else 0.0
+    return report
+
+def build_report(
+    texts: List[str],
+    min_freq: int,
+    max_size: Optional[int],
+    normalize: bool,
+    num_classes: int = 7,
+    runs: int = 200,
+    synthetic: bool = False
+) -> dict:
+    """
+    Сравнение полного и урезанного словарей
+    
+    synthetic - тексты восстановлены из частот словаря: OOV и латентность
+    по ним не отражают реальные данные и в отчёт не попадают.
+    """
+    full_vocab = Vocabulary()
+    full_vocab.build_from_texts(texts)
+    
+    pruned_vocab = Vocabulary(min_freq=min_freq, max_size=max_size, normalize=normalize)
+    pruned_vocab.build_from_texts(texts)
+    
+    text_metrics = not synthetic
+    return {
+        "options": {"min_freq": min_freq, "max_size": max_size, "normalize": normalize},
+        "texts": "synthetic (vocab.pkl word counts)" if synthetic else "data",
+        "unpruned": _measure(full_vocab, texts, num_classes, runs, text_metrics),
+        "pruned": _measure(pruned_vocab, texts, num_classes, runs, text_metrics)
+    }
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Отчёт о прунинге словаря')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data', type=str, help='JSON файл с training_examples')
+    source.add_argument(
+        '--vocab', type=str,
+        help='vocab.pkl обученной модели (частоты слов): только размеры, без OOV и латентности'
+    )
+    parser.add_argument('--min-freq', type=int, default=2, help='Минимальная частота слова')
+    parser.add_argument('--max-size', type=int, default=None, help='Максимальный размер словаря')
+    parser.add_argument('--normalize', action='store_true', help='Удалять пунктуацию')
+    parser.add_argument('--runs', type=int, default=200, help='Число прогонов для латентности')
+    
+    args = parser.parse_args()
+    
+    report = build_report(
+        _load_texts(args.data, args.vocab),
+        min_freq=args.min_freq,
+        max_size=args.max_size,
+        normalize=args.normalize,
+        runs=args.runs,
+        synthetic=args.data is None
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.models import build_model
+from app.core.vocabulary import LabelEncoder, Vocabulary
+from app.services.prediction_service import PredictionService
+
+def _save_test_model(manager, model_name: str = "model", metadata=None) -> str:
+    """Маленькая fasttext модель в реестре manager (возвращает версию)"""
+    vocab = Vocabulary()
+    vocab.build_from_texts(["пожарить пельмени до пятницы"])
+    encoder = LabelEncoder()
+    encoder.fit(["новая", "завершена"])
+    return manager.save_model(
+        build_model("fasttext", vocab.vocab_size, 2, embedding_dim=8),
+        vocab, {'status': encoder}, model_name, metadata=metadata
+    )
+
+@pytest.fixture
+def save_test_model():
+    """Сохранение тестовой модели: save_test_model(manager, model_name, metadata)"""
+    return _save_test_model
+
+@pytest.fixture
+def prediction_service(tmp_path):
+    """PredictionService с реестром моделей во временной директории"""
+    service = PredictionService()
+    service.model_manager.models_dir = tmp_path
+    return service
@@ -0,0 +1,64 @@
+from app.core.dataset import TaskDataset, TaskInfo, create_batch_loader
+from app.core.vocabulary import LabelEncoder, Vocabulary
+
+def _make_dataset(cache_dir=None):
+    texts = ["пожарить пельмени", "переделать сайт срочно", "позвонить клиенту"]
+    statuses = ["новая", "в работе", "новая"]
+    labels = [
+        TaskInfo(
+            name=text,
+            description="-",
+            priority=3,
+            deadline=None,
+            execution_time="-",
+            category=[],
+            difficulty=3,
+            stages=[],
+            status=status
+        )
+        for text, status in zip(texts, statuses)
+    ]
+    vocab = Vocabulary()
+    vocab.build_from_texts(texts)
+    encoder = LabelEncoder()
+    encoder.fit(statuses)
+    return TaskDataset(texts, labels, vocab, {'status': encoder}, max_len=8, cache_dir=cache_dir)
+
+def test_dataset_is_pre_encoded():
+    """Тест: тексты закодированы заранее и отдаются срезами"""
+    dataset = _make_dataset()
+    assert dataset.text_ids.shape == (3, 8)
+    
+    item = dataset[1]
+    assert item['text'].tolist() == dataset.vocab.encode("переделать сайт срочно", max_len=8)
+    
+    batch = dataset[[0, 2]]
+    assert batch['text'].shape == (2, 8)
+    assert batch['status'].tolist() == [dataset.statuses[0].item(), dataset.statuses[2].item()]
+
+def test_batch_loader_serves_whole_batches():
+    """Тест загрузчика батчей"""
+    loader = create_batch_loader(_make_dataset(), batch_size=2, shuffle=False)
+    batches = list(loader)
+    assert len(loader) == 2
+    assert [batch['text'].shape[0] for batch in batches] == [2, 1]
+
+def test_dataset_npy_cache(tmp_path):
+    """Тест .npy кеша закодированных текстов"""
+    first = _make_dataset(cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("text_ids_*.npy"))) == 1
+    
+    second = _make_dataset(cache_dir=str(tmp_path))
+    assert second.text_ids.tolist() == first.text_ids.tolist()
+
+def test_batch_loader_with_workers():
+    """Тест: воркеры отдают те же батчи, что и загрузка в основном процессе"""
+    dataset = _make_dataset()
+    expected = [batch['text'].tolist() for batch in create_batch_loader(dataset, 2, shuffle=False)]
+    
+    loader = create_batch_loader(
+        dataset, 2, shuffle=False, num_workers=2, prefetch_factor=2, persistent_workers=True
+    )
+    assert dataset.text_ids.is_shared()
+    for _ in range(2):
+        assert [batch['text'].tolist() for batch in loader] == expected
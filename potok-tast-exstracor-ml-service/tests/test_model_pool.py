@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.services.model_pool import ModelPool
+from app.services.prediction_service import InFlightCounter
+
+def _fake_bundle(model_name, version, size_mb=1):
+    return SimpleNamespace(
+        model_name=model_name, version=version,
+        size_bytes=size_mb * 1024 ** 2, in_flight=InFlightCounter()
+    )
+
+def test_pool_evicts_least_recently_used():
+    """Тест пула: LRU вытеснение по числу версий и бюджету памяти"""
+    evicted = []
+    pool = ModelPool(
+        loader=_fake_bundle, max_models=2, memory_budget_mb=10,
+        on_evict=lambda bundle: evicted.append(bundle.version)
+    )
+    
+    a = pool.get("model", "a")
+    pool.get("model", "b")
+    assert pool.get("model", "a") is a  # попадание, "a" становится недавней
+    pool.get("model", "c")
+    assert evicted == ["b"]
+    assert [m["version"] for m in pool.get_info()["models"]] == ["a", "c"]
+    
+    # Версия больше бюджета вытесняет остальные, но сама остаётся
+    pool.loader = lambda name, version: _fake_bundle(name, version, size_mb=12)
+    pool.get("model", "big")
+    assert evicted == ["b", "a", "c"]
+    assert pool.get_info()["loads"] == 4 and pool.get_info()["hits"] == 1
+    
+    # Закреплённая версия (вариант A/B) не вытесняется
+    pool.loader = _fake_bundle
+    pool.pin([("model", "a")])
+    pinned = pool.get("model", "a")
+    pool.get("model", "d")
+    pool.get("model", "e")
+    assert pool.peek("model", "a") is pinned
+    assert [(m["version"], m["pinned"]) for m in pool.get_info()["models"]] == [
+        ("a", True), ("e", False)
+    ]
+
+def test_pool_loads_outside_lock():
+    """Тест: загрузка версии не блокирует попадания в другие, одна версия грузится один раз"""
+    release = threading.Event()
+    calls = []
+    
+    def loader(model_name, version):
+        calls.append(version)
+        if version == "slow":
+            release.wait(5)
+        return _fake_bundle(model_name, version)
+    
+    pool = ModelPool(loader=loader, max_models=5, memory_budget_mb=0)
+    fast = pool.get("model", "fast")
+    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        slow = [executor.submit(pool.get, "model", "slow") for _ in range(2)]
+        while "slow" not in calls:
+            time.sleep(0.01)
+        start = time.perf_counter()
+        assert pool.get("model", "fast") is fast
+        assert time.perf_counter() - start < 1
+        release.set()
+        assert slow[0].result() is slow[1].result()
+    
+    assert calls == ["fast", "slow"]
+
+def test_request_routing_between_versions(prediction_service, save_test_model):
+    """Тест выбора версии в запросе и A/B распределения без перезагрузок"""
+    service = prediction_service
+    for model_name in ("base", "base_finetuned"):
+        save_test_model(service.model_manager, model_name)
+    service.load_model("base")
+    
+    assert service.predict("Пожарить пельмени").model_name == "base"
+    result = service.predict("Пожарить пельмени", model_name="base_finetuned")
+    assert result.model_name == "base_finetuned"
+    assert service.pool.get_info()["loads"] == 1
+    
+    service.set_routing([
+        {"model_name": "base", "weight": 1},
+        {"model_name": "base_finetuned", "weight": 1}
+    ])
+    texts = [f"Задача номер {i}" for i in range(40)]
+    served = [service.predict(text).model_name for text in texts]
+    assert set(served) == {"base", "base_finetuned"}
+    # Один текст - всегда один вариант
+    assert [service.predict(text).model_name for text in texts] == served
+    # Основная модель в пул не загружается
+    assert service.pool.get_info()["loads"] == 1
+    assert [m["pinned"] for m in service.pool.get_info()["models"]] == [True]
+    
+    service.clear_routing()
+    assert {service.predict(text).model_name for text in texts} == {"base"}
+    assert [m["pinned"] for m in service.pool.get_info()["models"]] == [False]
@@ -0,0 +1,128 @@
+import errno
+import json
+import shutil
+
+from app.core.models import build_model
+from app.core.vocabulary import LabelEncoder
+from app.services.model_manager import REGISTRY_INDEX, ModelManager
+
+def _manager(tmp_path) -> ModelManager:
+    manager = ModelManager()
+    manager.models_dir = tmp_path
+    return manager
+
+def test_registry_index_maintained_on_save_and_delete(tmp_path, save_test_model):
+    """Тест индекса: сохранение и удаление обновляют его, история - в отдельном файле"""
+    manager = _manager(tmp_path)
+    version = save_test_model(manager, "model", {"training_history": [{"epoch": 1, "train_loss": 0.5}]})
+    
+    models = manager.list_models()
+    assert [v["version"] for v in models["model"]] == [version]
+    assert "training_history" not in models["model"][0]["metadata"]
+    assert manager.get_training_history("model", version) == [{"epoch": 1, "train_loss": 0.5}]
+    
+    # Другой процесс видит индекс без сканирования версий
+    index = json.loads((tmp_path / REGISTRY_INDEX).read_text(encoding='utf-8'))
+    assert version in index["models"]["model"]["versions"]
+    
+    assert manager.delete_model("model", version)
+    assert _manager(tmp_path).list_models() == {}
+
+def test_registry_index_picks_up_external_changes(tmp_path, save_test_model):
+    """Тест: версия, скопированная в реестр вручную, обнаруживается по mtime"""
+    manager = _manager(tmp_path)
+    version = save_test_model(manager, "model", {"training_history": []})
+    assert len(manager.list_models()["model"]) == 1
+    
+    shutil.copytree(tmp_path / "model" / version, tmp_path / "copy" / version)
+    models = manager.list_models()
+    assert set(models) == {"model", "copy"}
+    
+    # Версии без history.json (сохранённые до его появления)
+    metadata_file = tmp_path / "copy" / version / "metadata.json"
+    metadata = json.loads(metadata_file.read_text(encoding='utf-8'))
+    metadata["training_history"] = [{"epoch": 1}]
+    metadata_file.write_text(json.dumps(metadata), encoding='utf-8')
+    (tmp_path / "copy" / version / "history.json").unlink()
+    assert manager.get_training_history("copy", version) == [{"epoch": 1}]
+    assert manager.get_training_history("missing") is None
+
+def test_registry_listing_on_read_only_dir(tmp_path, save_test_model, monkeypatch):
+    """Тест: реестр, смонтированный только для чтения, отдаёт список из индекса в памяти"""
+    from app.services import model_manager as model_manager_module
+    
+    manager = _manager(tmp_path)
+    version = save_test_model(manager, "model")
+    (tmp_path / REGISTRY_INDEX).unlink()
+    
+    def read_only_open(file, mode='r', *args, **kwargs):
+        if 'w' in mode:
+            raise OSError(errno.EROFS, "Read-only file system", str(file))
+        return open(file, mode, *args, **kwargs)
+    
+    monkeypatch.setattr(model_manager_module, "open", read_only_open, raising=False)
+    reader = _manager(tmp_path)
+    assert [v["version"] for v in reader.list_models()["model"]] == [version]
+    assert [v["version"] for v in reader.list_models()["model"]] == [version]
+    assert not (tmp_path / REGISTRY_INDEX).exists()
+    assert not list(tmp_path.glob(f"{REGISTRY_INDEX}.*.tmp"))
+
+def test_mmap_weights_roundtrip_and_conversion(tmp_path, save_test_model):
+    """Тест формата весов для mmap: загрузка без копирования и перевод из model.pth"""
+    import torch
+    from app.core.weights import WEIGHTS_FILE, load_weights, save_weights
+    
+    manager = _manager(tmp_path)
+    version = save_test_model(manager, "model")
+    model_path = tmp_path / "model" / version
+    original, _, _ = manager.load_model("model", version)
+    
+    result = manager.convert_weights("model", version)
+    assert result["converted"] and not (model_path / "model.pth").exists()
+    model, _, _ = manager.load_model("model", version)
+    for name, tensor in original.state_dict().items():
+        assert torch.equal(model.state_dict()[name], tensor)
+    assert not manager.convert_weights("model", version)["converted"]
+    
+    # Тензоры ссылаются на отображённый файл, выравнивание сохраняется и в fp16
+    weights = load_weights(model_path / WEIGHTS_FILE)
+    assert all(t.data_ptr() % 64 == 0 for t in weights.values())
+    save_weights(original.state_dict(), tmp_path / "half.weights", fp16=True)
+    half = load_weights(tmp_path / "half.weights", dtype=None)
+    assert half["embedding.weight"].dtype == torch.float16
+    assert (tmp_path / "half.weights").stat().st_size < (model_path / WEIGHTS_FILE).stat().st_size
+
+def test_registry_index_reflects_weights_conversion(tmp_path, save_test_model):
+    """Тест: после перевода весов список моделей показывает новый формат"""
+    manager = _manager(tmp_path)
+    version = save_test_model(manager, "model")
+    assert manager.list_models()["model"][0]["metadata"]["weights_format"] == "pth"
+    
+    manager.convert_weights("model", fp16=True)
+    for reader in (manager, _manager(tmp_path)):
+        metadata = reader.list_models()["model"][0]["metadata"]
+        assert metadata["version"] == version
+        assert metadata["weights_format"] == "mmap" and metadata["weights_fp16"] is True
+
+def test_hashing_model_saved_without_vocab_file(tmp_path):
+    """Тест: hashing словарь не сохраняется, а восстанавливается по параметрам"""
+    from app.core.vocabulary import HashingVocabulary, create_vocabulary
+    
+    manager = _manager(tmp_path)
+    vocab = create_vocabulary("hashing", num_buckets=500, ngram_range=(2, 4))
+    encoder = LabelEncoder()
+    encoder.fit(["новая", "завершена"])
+    model = build_model("fasttext", vocab.vocab_size, 2, embedding_dim=8)
+    version = manager.save_model(model, vocab, {'status': encoder}, "hashed")
+    
+    model_path = tmp_path / "hashed" / version
+    assert not (model_path / "vocab.pkl").exists()
+    metadata = json.loads((model_path / "metadata.json").read_text(encoding='utf-8'))
+    assert metadata["tokenizer_config"] == {
+        "tokenizer": "hashing", "num_buckets": 500, "ngram_range": [2, 4]
+    }
+    
+    _, restored, _ = manager.load_model("hashed", version)
+    assert isinstance(restored, HashingVocabulary)
+    text = "Переделать весь сайт срочно"
+    assert restored.encode(text) == vocab.encode(text)
@@ -0,0 +1,98 @@
+import pytest
+import torch
+
+from app.core.models import MODEL_ARCHITECTURES, GRUStatusNet, StatusNet, TextCNN, build_model
+from app.core.vocabulary import LabelEncoder, Vocabulary
+from app.services.model_manager import ModelManager
+from app.services.training_service import distillation_loss
+
+def test_grow_embedding_keeps_old_rows():
+    """Тест расширения эмбеддингов: прежние строки без изменений, новые - около среднего"""
+    model = StatusNet(vocab_size=10, embedding_dim=8, hidden_dim=8, num_statuses=3)
+    old_weight = model.embedding.weight.detach().clone()
+    
+    assert model.grow_embedding(14) == 4
+    assert model.grow_embedding(14) == 0
+    
+    weight = model.embedding.weight.detach()
+    assert weight.shape == (14, 8)
+    assert torch.equal(weight[:10], old_weight)
+    assert torch.allclose(weight[10:].mean(dim=0), old_weight[1:].mean(dim=0), atol=0.5)
+    
+    model.eval()
+    assert model(torch.tensor([[12, 13, 0, 0]])).shape == (1, 3)
+
+def test_student_roundtrip_through_model_manager(tmp_path):
+    """Тест: архитектура и гиперпараметры ученика восстанавливаются при загрузке"""
+    vocab = Vocabulary()
+    vocab.build_from_texts(["сделать отчёт", "исправить баг"])
+    encoder = LabelEncoder()
+    encoder.fit(["новая", "завершена"])
+    student = build_model("gru", vocab.vocab_size, 2, embedding_dim=16, hidden_dim=8)
+    
+    manager = ModelManager()
+    manager.models_dir = tmp_path
+    version = manager.save_model(student, vocab, {'status': encoder}, "student")
+    model, _, _ = manager.load_model("student", version, device="cpu")
+    
+    assert isinstance(model, GRUStatusNet)
+    assert model.get_config() == student.get_config()
+    assert torch.equal(model.embedding.weight, student.embedding.weight)
+
+def test_distillation_loss_matches_teacher():
+    """Тест: loss дистилляции минимален при совпадении с учителем"""
+    teacher = torch.tensor([[2.0, 0.5, -1.0]])
+    
+    assert distillation_loss(teacher, teacher, temperature=2.0).item() < 1e-6
+    assert distillation_loss(-teacher, teacher, temperature=2.0).item() > 0.1
+
+def test_architectures_rebuild_from_config():
+    """Тест реестра архитектур: модель пересоздаётся по get_config"""
+    text_ids = torch.tensor([[3, 4, 5, 0, 0], [6, 0, 0, 0, 0]])
+    for architecture in MODEL_ARCHITECTURES:
+        model = build_model(architecture, vocab_size=10, num_statuses=3).eval()
+        config = model.get_config()
+        rebuilt = build_model(config.pop("architecture"), vocab_size=10, num_statuses=3, **config)
+        
+        assert rebuilt.get_config() == model.get_config()
+        assert model(text_ids).shape == (2, 3)
+
+def test_build_model_rejects_unknown_params():
+    """Тест: неподдерживаемые архитектурой параметры - ошибка, а не молчаливый пропуск"""
+    with pytest.raises(ValueError):
+        build_model("fasttext", vocab_size=10, num_statuses=3, hidden_dim=32)
+    with pytest.raises(ValueError):
+        build_model("transformer", vocab_size=10, num_statuses=3)
+
+def test_masked_pooling_ignores_padding():
+    """Тест: при pooling по маске результат не зависит от паддинга и соседей по батчу"""
+    torch.manual_seed(0)
+    model = StatusNet(vocab_size=20, embedding_dim=8, hidden_dim=8, num_statuses=3).eval()
+    text_ids = torch.randint(1, 20, (3, 12))
+    text_ids[0, 4:] = 0
+    text_ids[1, 9:] = 0
+    
+    for pooling in ("mean", "attention"):
+        model.set_pooling(pooling)
+        batch = model(text_ids)
+        assert torch.allclose(model(text_ids[:1, :4]), batch[:1], atol=1e-5)
+        assert torch.allclose(model(text_ids[:, :10])[:2], batch[:2], atol=1e-5)
+    
+    with pytest.raises(ValueError):
+        model.set_pooling("max")
+
+def test_textcnn_max_pooling_ignores_padding():
+    """Тест: max-pooling TextCNN не выбирает окна из одних <PAD>"""
+    torch.manual_seed(0)
+    model = TextCNN(vocab_size=20, embedding_dim=8, hidden_dim=16, num_statuses=3).eval()
+    for conv in model.convs:
+        # Окно из нулевых эмбеддингов <PAD> даёт relu(bias) - больше признаков текста
+        conv.bias.data.fill_(1.0)
+    text_ids = torch.randint(1, 20, (2, 12))
+    text_ids[0, 4:] = 0
+    
+    batch = model(text_ids)
+    assert torch.allclose(model(text_ids[:1, :4]), batch[:1], atol=1e-5)
+    longer = torch.cat([text_ids, torch.zeros(2, 8, dtype=torch.long)], dim=1)
+    assert torch.allclose(model(longer), batch, atol=1e-5)
+    assert torch.isfinite(model(torch.zeros(1, 6, dtype=torch.long))).all()
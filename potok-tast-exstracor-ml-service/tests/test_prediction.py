@@ -53,6 +53,15 @@ def test_metrics():
     data = response.json()
     assert "predictions" in data
 
+def test_prometheus_metrics():
+    """Тест экспозиции метрик Prometheus"""
+    client.get("/api/v1/monitoring/ping")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'endpoint="/api/v1/monitoring/ping"' in response.text
+    assert "task_extraction_cache_entries" in response.text
+
 def test_invalid_input():
     """Тест с невалидным входом"""
     response = client.post(
@@ -60,3 +69,113 @@ def test_invalid_input():
         json={"text": ""}
     )
     assert response.status_code == 422  # Validation error
+
+def test_hot_swap_keeps_requests_consistent(prediction_service, save_test_model, monkeypatch):
+    """Тест подмены модели: запрос дорабатывает на старой версии, кеш версии сбрасывается"""
+    from app.utils.exceptions import ModelNotLoadedException
+    from app.services import prediction_service as prediction_module
+    
+    monkeypatch.setattr(prediction_module.settings, "MODEL_SWAP_DRAIN_TIMEOUT", 0.05)
+    service = prediction_service
+    version = save_test_model(service.model_manager)
+    
+    first = service.load_model("model", version)
+    service.predict("Пожарить пельмени")
+    assert len(service._cache) == 1
+    
+    with first.in_flight:
+        second = service.load_model("model")
+        # Старая версия ещё обслуживает запрос - подмена дождалась таймаута
+        assert first.in_flight.count == 1
+    
+    assert service.bundle is second and second.model is not first.model
+    assert service.get_model_info()["version"] == version
+    assert service._cache == {}
+    
+    # Неудачная загрузка не трогает текущую модель
+    with pytest.raises(ModelNotLoadedException):
+        service.load_model("missing")
+    assert service.bundle is second
+
+def test_swap_during_cache_write_leaves_no_stale_entry(prediction_service, save_test_model, monkeypatch):
+    """Тест: подмена между проверкой версии и записью в кеш не оставляет запись старой версии"""
+    import threading
+    from app.services import prediction_service as prediction_module
+    
+    monkeypatch.setattr(prediction_module.settings, "MODEL_SWAP_DRAIN_TIMEOUT", 0.05)
+    service = prediction_service
+    save_test_model(service.model_manager)
+    first = service.load_model("model")
+    
+    swap = threading.Thread(target=service.load_model, args=("model",))
+    is_serving = service._is_serving
+    
+    def is_serving_then_swap(bundle):
+        serving = is_serving(bundle)
+        # Подмена успевает стартовать сразу после проверки версии
+        swap.start()
+        swap.join(timeout=1)
+        return serving
+    
+    monkeypatch.setattr(service, "_is_serving", is_serving_then_swap)
+    service.predict("Пожарить пельмени")
+    swap.join()
+    
+    assert service.bundle is not first
+    assert all(key[0] != first.generation for key in service._cache)
+
+def test_cached_response_body_matches_schema(prediction_service, save_test_model):
+    """Тест: заранее закодированное тело совпадает с TaskResponse, меняется только processed_at"""
+    import json
+    from app.schemas.task import BatchTaskResponse, TaskResponse
+    
+    service = prediction_service
+    save_test_model(service.model_manager)
+    service.load_model("model")
+    
+    text = "Пожарить пельмени до пятницы, очень важно"
+    expected = service.predict(text).model_dump(mode="json")
+    first = json.loads(service.predict_json(text))
+    second = json.loads(service.predict_json(text))
+    assert service.metrics['cache_hits'] == 2
+    TaskResponse.model_validate(first)
+    for body in (first, second):
+        assert {k: v for k, v in body.items() if k != "processed_at"} == \
+            {k: v for k, v in expected.items() if k != "processed_at"}
+    
+    batch = BatchTaskResponse.model_validate_json(service.predict_batch_json([text, "Купить хлеб"]))
+    assert batch.total == batch.successful == 2 and batch.results[0].name == expected["name"]
+
+def test_msgpack_endpoint(prediction_service, save_test_model, monkeypatch):
+    """Тест: бинарный протокол возвращает те же предсказания в колоночном виде"""
+    import msgpack
+    from app.api.v1 import prediction
+    
+    def post(payload):
+        return client.post(
+            "/api/v1/predict/msgpack",
+            content=msgpack.packb(payload),
+            headers={"Content-Type": "application/msgpack"}
+        )
+    
+    service = prediction_service
+    monkeypatch.setattr(prediction, "prediction_service", service)
+    assert post({"texts": ["Купить хлеб"]}).status_code == 503
+    
+    save_test_model(service.model_manager)
+    service.load_model("model")
+    
+    texts = ["Пожарить пельмени до пятницы, очень важно", "Купить хлеб"]
+    response = post({"texts": texts})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    columns = msgpack.unpackb(response.content)
+    assert columns["index"] == [0, 1] and columns["successful"] == 2
+    expected = service.predict(texts[0]).model_dump(mode="json")
+    for field in ("name", "priority", "deadline", "category", "status", "confidence"):
+        assert columns[field][0] == expected[field]
+    assert columns["model_version"][0] == expected["model_version"]
+    
+    for payload in ([1, 2], {"texts": []}, {"texts": ["ok", 5]}, {"texts": ["ab"]}):
+        assert post(payload).status_code == 400
+    assert client.post("/api/v1/predict/msgpack", content=b"\xc1").status_code == 400
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import monitoring
+from app.main import app
+from app.utils.profiler import SamplingProfiler
+
+client = TestClient(app)
+
+def _busy_loop(stop: threading.Event):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+
+def test_profiler_samples_busy_thread():
+    """Тест: стеки занятого потока попадают в collapsed вывод, ожидающие - нет"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    waiter = threading.Thread(target=stop.wait, name="idle-waiter")
+    worker.start()
+    waiter.start()
+    
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start()
+    stop.wait(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+    waiter.join()
+    
+    lines = profiler.collapsed().splitlines()
+    assert profiler.samples > 0
+    assert any(line.startswith("busy-worker;") and "_busy_loop" in line for line in lines)
+    assert not any(line.startswith("idle-waiter;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy_loop" in entry["function"] for entry in profiler.top())
+
+def test_profile_endpoint_requires_api_key(monkeypatch):
+    """Тест: без API_KEY эндпоинт отключён, с неверным ключом - 401"""
+    monkeypatch.setattr(monitoring.settings, "API_KEY", None)
+    assert client.get("/api/v1/monitoring/profile?seconds=0.1").status_code == 403
+    
+    monkeypatch.setattr(monitoring.settings, "API_KEY", "secret")
+    response = client.get("/api/v1/monitoring/profile?seconds=0.1", headers={"X-API-Key": "wrong"})
+    assert response.status_code == 401
+    
+    response = client.get(
+        "/api/v1/monitoring/profile?seconds=0.1&format=top", headers={"X-API-Key": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.json()["samples"] > 0
+
+def test_cancelled_profile_request_stops_sampler():
+    """Тест: отключение клиента (отмена запроса) останавливает поток сэмплирования"""
+    async def cancel_profile():
+        task = asyncio.create_task(monitoring.profile(
+            seconds=60, interval_ms=5, format="collapsed", include_idle=False
+        ))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    asyncio.run(cancel_profile())
+    
+    assert not any(thread.name == "sampling-profiler" for thread in threading.enumerate())
+    assert monitoring.acquire_profiler()
+    monitoring.release_profiler()
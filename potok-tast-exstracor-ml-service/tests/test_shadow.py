@@ -0,0 +1,54 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.prediction_service import InFlightCounter
+from app.services.shadow_service import ShadowEvaluator
+
+def _wait_completed(shadow: ShadowEvaluator, count: int, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while shadow.get_stats()["completed"] + shadow.get_stats()["errors"] < count:
+        assert time.time() < deadline, shadow.get_stats()
+        time.sleep(0.01)
+
+def test_shadow_compares_candidate_with_primary(prediction_service, save_test_model):
+    """Тест теневого прогона: кандидат - та же версия, полное согласие"""
+    service = prediction_service
+    save_test_model(service.model_manager)
+    service.load_model("model")
+    
+    service.start_shadow("model", sample_rate=1.0)
+    texts = [f"Задача номер {i}" for i in range(10)]
+    for text in texts:
+        service.predict(text)
+    service.predict(texts[0])  # попадание в кеш тоже копируется
+    _wait_completed(service.shadow, 11)
+    
+    stats = service.stop_shadow()
+    assert service.shadow is None
+    assert stats["completed"] == 11 and stats["agreement_rate"] == 1.0
+    assert sum(stats["confidence"]["candidate"]["histogram"]) == 11
+    assert stats["latency_ms"]["candidate"]["p50"] is not None
+
+def test_shadow_drops_work_when_queue_is_full():
+    """Тест: при заполненной очереди копии отбрасываются, запрос не ждёт"""
+    release = threading.Event()
+    
+    def slow_classify(bundle, text):
+        release.wait(5)
+        return "новая", 0.5
+    
+    candidate = SimpleNamespace(model_name="candidate", version="v1", in_flight=InFlightCounter())
+    shadow = ShadowEvaluator(candidate, slow_classify, sample_rate=1.0, queue_size=1)
+    
+    start = time.perf_counter()
+    accepted = [shadow.submit(f"текст {i}", "новая", 0.9) for i in range(10)]
+    assert time.perf_counter() - start < 0.5
+    # Один запрос в обработке, один в очереди, остальные отброшены
+    assert 1 <= sum(accepted) <= 2
+    assert shadow.get_stats()["dropped"] == 10 - sum(accepted)
+    
+    release.set()
+    _wait_completed(shadow, sum(accepted))
+    shadow.stop()
+    assert shadow.get_stats()["agreement_rate"] == 1.0
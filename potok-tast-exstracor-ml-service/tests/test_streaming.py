@@ -0,0 +1,105 @@
+import json
+
+from app.core.streaming import (
+    StreamingTaskDataset,
+    create_stream_loader,
+    encoders_from_stats,
+    resolve_shards,
+    scan_shards
+)
+from app.core.vocabulary import Vocabulary
+
+def _write_shards(tmp_path, num_shards=2, per_shard=25):
+    for shard in range(num_shards):
+        with open(tmp_path / f"tasks-{shard}.jsonl", 'w', encoding='utf-8') as f:
+            for i in range(per_shard):
+                example = {
+                    "text": f"задача {shard} номер {i}",
+                    "labels": {"status": "новая" if i % 2 else "в работе"}
+                }
+                f.write(json.dumps(example, ensure_ascii=False) + "\n")
+            f.write("\n")
+    return resolve_shards([str(tmp_path)])
+
+def _dataset(shards, split, **options):
+    vocab = Vocabulary()
+    stats = scan_shards(shards, vocab, val_fraction=0.2)
+    dataset = StreamingTaskDataset(
+        shards, vocab, encoders_from_stats(stats),
+        batch_size=8, max_len=6, split=split, val_fraction=0.2, **options
+    )
+    return dataset, stats
+
+def test_scan_shards_builds_vocab_and_counts(tmp_path):
+    """Тест первого прохода: словарь, метки и размеры train/val"""
+    shards = _write_shards(tmp_path)
+    assert len(shards) == 2
+    
+    vocab = Vocabulary()
+    stats = scan_shards(shards, vocab, val_fraction=0.2)
+    assert stats.train_examples + stats.val_examples == 50
+    assert stats.statuses == {"новая", "в работе"}
+    assert "задача" in vocab.word2idx
+
+def test_stream_covers_split_once(tmp_path):
+    """Тест: каждая эпоха отдаёт все примеры своей части ровно один раз"""
+    shards = _write_shards(tmp_path)
+    train, stats = _dataset(shards, "train", shuffle_buffer=10)
+    val, _ = _dataset(shards, "val", shuffle_buffer=0)
+    
+    train_rows = [row for batch in train for row in batch['text'].tolist()]
+    val_rows = [row for batch in val for row in batch['text'].tolist()]
+    assert len(train_rows) == stats.train_examples
+    assert len(val_rows) == stats.val_examples
+    
+    next_epoch = [row for batch in train for row in batch['text'].tolist()]
+    assert sorted(next_epoch) == sorted(train_rows)
+    assert next_epoch != train_rows
+
+def test_stream_loader_splits_work_between_workers(tmp_path):
+    """Тест: воркеры делят шарды без повторов"""
+    shards = _write_shards(tmp_path, num_shards=1)
+    dataset, stats = _dataset(shards, "train", shuffle_buffer=0)
+    
+    loader = create_stream_loader(dataset, num_workers=2)
+    rows = [row for batch in loader for row in batch['text'].tolist()]
+    assert len(rows) == stats.train_examples
+    assert sorted(rows) == sorted(row for batch in dataset for row in batch['text'].tolist())
+
+def test_stream_shards_between_ranks(tmp_path):
+    """Тест: ранги распределённого обучения читают непересекающиеся части"""
+    shards = _write_shards(tmp_path, num_shards=3)
+    full, stats = _dataset(shards, "train", shuffle_buffer=0)
+    
+    rows = []
+    for rank in range(2):
+        part, _ = _dataset(shards, "train", shuffle_buffer=0)
+        part.rank, part.world_size = rank, 2
+        rows.append([row for batch in part for row in batch['text'].tolist()])
+    
+    assert rows[0] and rows[1]
+    assert sorted(rows[0] + rows[1]) == sorted(row for batch in full for row in batch['text'].tolist())
+
+def test_val_loss_weighted_by_examples_across_ranks(tmp_path):
+    """Тест: val loss по частям рангов - среднее по примерам, как на всей выборке"""
+    import torch
+    from app.core.models import build_model
+    from app.services.training_service import TrainingService
+    
+    shards = _write_shards(tmp_path, num_shards=3)
+    full, stats = _dataset(shards, "val", shuffle_buffer=0)
+    torch.manual_seed(0)
+    model = build_model("fasttext", full.vocab.vocab_size, 2, embedding_dim=8)
+    criterion = torch.nn.CrossEntropyLoss()
+    service = TrainingService()
+    
+    totals = []
+    for rank in range(2):
+        part, _ = _dataset(shards, "val", shuffle_buffer=0)
+        part.rank, part.world_size = rank, 2
+        totals.append(service._evaluate_totals(model, part, criterion))
+    
+    loss_sum = sum(total for total, _ in totals)
+    count = sum(examples for _, examples in totals)
+    assert count == stats.val_examples
+    assert abs(loss_sum / count - service._evaluate(model, full, criterion)) < 1e-5
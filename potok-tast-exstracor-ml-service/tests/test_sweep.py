@@ -0,0 +1,37 @@
+import torch
+
+from app.config.settings import get_settings
+from app.core.dataset import TaskDataset
+from app.services.sweep_service import build_trials
+
+settings = get_settings()
+
+def test_build_trials_grid_and_defaults():
+    """Тест сетки перебора: незаданные параметры берутся из настроек"""
+    trials = build_trials({"learning_rate": [0.001, 0.01], "hidden_dim": [32, 64]})
+    
+    assert len(trials) == 4
+    assert {(t["learning_rate"], t["hidden_dim"]) for t in trials} == {
+        (0.001, 32), (0.001, 64), (0.01, 32), (0.01, 64)
+    }
+    assert all(t["batch_size"] == settings.DEFAULT_BATCH_SIZE for t in trials)
+    assert all(t["embedding_dim"] == settings.EMBEDDING_DIM for t in trials)
+
+def test_build_trials_random_subset_is_reproducible():
+    """Тест случайной выборки из сетки"""
+    space = {"learning_rate": [0.001, 0.003, 0.01], "batch_size": [16, 32, 64]}
+    
+    trials = build_trials(space, max_trials=4, seed=7)
+    assert len(trials) == 4
+    assert len({tuple(t.values()) for t in trials}) == 4
+    assert trials == build_trials(space, max_trials=4, seed=7)
+
+def test_dataset_from_shared_tensors():
+    """Тест: датасет испытания поверх тензоров из разделяемой памяти"""
+    dataset = TaskDataset.from_tensors(
+        torch.zeros(5, 8, dtype=torch.long), torch.arange(5)
+    ).share_memory()
+    
+    assert len(dataset) == 5
+    assert dataset.text_ids.is_shared()
+    assert dataset[3]['status'].item() == 3
@@ -0,0 +1,193 @@
+import os
+import signal
+import time
+
+import pytest
+import torch
+
+from app.schemas.training import TrainingStatus
+from app.services.checkpoint_manager import CheckpointManager, snapshot_state
+from app.services.training_job_store import TrainingJobStore
+from app.services.training_jobs import TrainingJobManager
+from app.services.training_telemetry import PHASES, TrainingTelemetry
+
+def test_job_store_queue_and_history(tmp_path):
+    """Тест очереди: порядок, позиция, завершение и история"""
+    store = TrainingJobStore(str(tmp_path))
+    store.create("first", "train", {"epochs": 1}, "model", 1)
+    store.create("second", "train", {"epochs": 2}, "model", 2)
+    
+    assert store.next_pending()['training_id'] == "first"
+    assert store.queue_position("second") == 2
+    assert store.load_params("second") == {"epochs": 2}
+    
+    store.mark_running("first")
+    store.finish("first", TrainingStatus.COMPLETED, result={"model_version": "v1"})
+    
+    reopened = TrainingJobStore(str(tmp_path))
+    job = reopened.get("first")
+    assert job['status'] == TrainingStatus.COMPLETED.value
+    assert job['result'] == {"model_version": "v1"}
+    assert not (tmp_path / "first.json").exists()
+    assert [job['training_id'] for job in reopened.list()] == ["second", "first"]
+
+def test_job_store_requeues_interrupted(tmp_path):
+    """Тест: задания, прерванные рестартом, возвращаются в очередь"""
+    store = TrainingJobStore(str(tmp_path))
+    store.create("job", "train", {}, None, 1)
+    store.mark_running("job")
+    
+    assert TrainingJobStore(str(tmp_path)).requeue_interrupted() == ["job"]
+    assert store.get("job")['status'] == TrainingStatus.PENDING.value
+
+def test_cancel_queued_job(tmp_path):
+    """Тест отмены задания, ожидающего в очереди"""
+    manager = TrainingJobManager(store=TrainingJobStore(str(tmp_path)))
+    manager.store.create("queued", "train", {}, None, 3)
+    
+    assert manager.cancel("queued") == TrainingStatus.CANCELLED
+    assert manager.get_progress("queued").status == TrainingStatus.CANCELLED
+    assert manager.cancel("missing") is None
+
+def test_checkpoint_async_roundtrip(tmp_path):
+    """Тест асинхронной записи чекпоинта и его снимка состояния"""
+    weights = {"weight": torch.zeros(3)}
+    checkpoints = CheckpointManager("job", checkpoint_dir=str(tmp_path))
+    checkpoints.save_async({"epoch": 2, "model_state": snapshot_state(weights)})
+    weights["weight"].add_(1.0)
+    checkpoints.close()
+    
+    restored = CheckpointManager("job", checkpoint_dir=str(tmp_path)).load()
+    assert restored["epoch"] == 2
+    assert restored["model_state"]["weight"].tolist() == [0.0, 0.0, 0.0]
+    
+    checkpoints.remove()
+    assert checkpoints.load() is None
+
+def test_training_telemetry_phases_and_eta():
+    """Тест телеметрии: фазы шага, пропускная способность и оценка времени"""
+    telemetry = TrainingTelemetry(world_size=2)
+    for _ in range(3):
+        telemetry.start_epoch()
+        for phase in PHASES:
+            telemetry.mark(phase)
+        telemetry.step(16)
+        with telemetry.validation():
+            pass
+        stats = telemetry.end_epoch()
+    
+    assert stats["steps"] == 1
+    assert set(stats["step_time_ms"]) == set(PHASES)
+    assert stats["samples_per_sec"] > 0
+    
+    summary = telemetry.summary()
+    assert summary["epochs_measured"] == 3
+    assert "avg_samples_per_sec" in summary
+    assert telemetry.estimate_remaining(0) == 0
+    assert TrainingTelemetry().estimate_remaining(5) is None
+
+def _process_states():
+    """pid -> (состояние, ppid) по /proc"""
+    states = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        states[int(entry)] = (fields[0], int(fields[1]))
+    return states
+
+def _descendants(pid: int):
+    """Живые (не zombie) потомки процесса"""
+    parents = {p: ppid for p, (state, ppid) in _process_states().items() if state != "Z"}
+    found, frontier = set(), {pid}
+    while frontier:
+        frontier = {child for child, parent in parents.items() if parent in frontier} - found
+        found |= frontier
+    return found
+
+def _alive(pids):
+    states = _process_states()
+    return {pid for pid in pids if pid in states and states[pid][0] != "Z"}
+
+def _training_examples(count: int = 20):
+    return [
+        {"text": f"задача номер {i} срочно", "labels": {
+            "name": "-", "description": "-", "priority": 3, "deadline": None,
+            "execution_time": "-", "category": [], "difficulty": 5,
+            "stages": [], "status": "новая" if i % 2 else "завершена"
+        }}
+        for i in range(count)
+    ]
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="нужен /proc")
+def test_cancel_running_job_stops_descendants(tmp_path, monkeypatch):
+    """Тест: отмена обучения завершает и процессы испытаний перебора"""
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path / "models"))
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    examples = _training_examples()
+    manager = TrainingJobManager(store=TrainingJobStore(str(tmp_path / "jobs")))
+    progress = manager.submit("sweep", {
+        "training_examples": examples,
+        "search_space": {"learning_rate": [0.001, 0.01]},
+        "epochs": 100000,
+        "max_parallel": 2,
+        "cpu_budget": 2
+    }, total_epochs=2)
+    training_id = progress.training_id
+    
+    try:
+        process = manager._processes[training_id]
+        deadline = time.time() + 120
+        # Трекер ресурсов multiprocessing и хотя бы один процесс испытания
+        while len(_descendants(process.pid)) < 2 and time.time() < deadline:
+            assert process.is_alive()
+            time.sleep(0.2)
+        descendants = _descendants(process.pid)
+        assert len(descendants) >= 2
+        
+        assert manager.cancel(training_id) == TrainingStatus.CANCELLED
+        deadline = time.time() + 10
+        while _alive(descendants) and time.time() < deadline:
+            time.sleep(0.1)
+        assert _alive(descendants) == set()
+    finally:
+        manager.shutdown()
+
+def test_killed_worker_removes_checkpoint(tmp_path, monkeypatch):
+    """Тест: задание, процесс которого убит (OOM, SIGKILL), не оставляет чекпоинт"""
+    from app.services import checkpoint_manager
+    
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path / "models"))
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(checkpoint_manager.settings, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    manager = TrainingJobManager(store=TrainingJobStore(str(tmp_path / "jobs")))
+    progress = manager.submit("train", {
+        "training_examples": _training_examples(),
+        "epochs": 100000,
+        "early_stopping_patience": 100000
+    }, total_epochs=100000)
+    training_id = progress.training_id
+    checkpoint_path = CheckpointManager(training_id).path
+    
+    try:
+        process = manager._processes[training_id]
+        deadline = time.time() + 120
+        while not (checkpoint_path / CheckpointManager.FILE_NAME).exists() and time.time() < deadline:
+            assert process.is_alive()
+            time.sleep(0.2)
+        assert checkpoint_path.exists()
+        
+        os.kill(process.pid, signal.SIGKILL)
+        deadline = time.time() + 30
+        # Статус записывается раньше, чем удаляется чекпоинт
+        while checkpoint_path.exists() and time.time() < deadline:
+            time.sleep(0.2)
+        
+        assert manager.get_progress(training_id).status == TrainingStatus.FAILED
+        assert not checkpoint_path.exists()
+    finally:
+        manager.shutdown()
@@ -0,0 +1,74 @@
+import pickle
+
+from app.core.vocabulary import (
+    HashingVocabulary,
+    Vocabulary,
+    create_vocabulary,
+    normalize_tokens
+)
+
+def test_normalize_tokens():
+    """Тест нормализации: регистр и пунктуация не создают новых токенов"""
+    assert normalize_tokens("До ПЯТНИЦЫ, очень важно!") == ["до", "пятницы", "очень", "важно"]
+    assert normalize_tokens("пятницы,") == normalize_tokens("пятницы")
+
+def test_hashing_vocabulary_fixed_size():
+    """Тест hashing словаря: размер фиксирован и не зависит от корпуса"""
+    vocab = HashingVocabulary(num_buckets=1000)
+    vocab.build_from_texts(["Пожарить пельмени до пятницы"] * 10)
+    assert vocab.vocab_size == 1002
+    
+    encoded = vocab.encode("Пожарить пельмени до пятницы, очень важно", max_len=50)
+    assert len(encoded) == 50
+    assert all(0 <= idx < vocab.vocab_size for idx in encoded)
+    assert encoded[-1] == 0
+
+def test_hashing_vocabulary_oov_shares_ngrams():
+    """Тест OOV: похожие слова делят признаки символьных n-грамм"""
+    vocab = HashingVocabulary(num_buckets=100000, ngram_range=(3, 3))
+    first = set(vocab.encode("пятницы", max_len=20)) - {0}
+    second = set(vocab.encode("пятница", max_len=20)) - {0}
+    assert first & second
+    assert vocab.encode("Пятницы,", max_len=20) == vocab.encode("пятницы", max_len=20)
+
+def test_hashing_vocabulary_is_stable_after_pickle():
+    """Тест стабильности индексов после сериализации"""
+    vocab = create_vocabulary("hashing", num_buckets=500)
+    restored = pickle.loads(pickle.dumps(vocab))
+    text = "Переделать весь сайт срочно"
+    assert restored.encode(text) == vocab.encode(text)
+
+def test_vocabulary_min_freq_and_max_size():
+    """Тест прунинга словаря по частоте и размеру"""
+    texts = ["задача задача задача срочно срочно редкое"]
+    
+    vocab = Vocabulary(min_freq=2)
+    vocab.build_from_texts(texts)
+    assert "задача" in vocab.word2idx
+    assert "срочно" in vocab.word2idx
+    assert "редкое" not in vocab.word2idx
+    assert vocab.encode("редкое", max_len=1) == [vocab.word2idx['<UNK>']]
+    
+    capped = Vocabulary(max_size=1)
+    capped.build_from_texts(texts)
+    assert capped.vocab_size == 3
+    assert capped.word2idx["задача"] == 2
+
+def test_vocabulary_normalize():
+    """Тест нормализации: пунктуация не порождает отдельных слов"""
+    vocab = Vocabulary(normalize=True)
+    vocab.build_from_texts(["до пятницы, важно", "до пятницы"])
+    assert "пятницы," not in vocab.word2idx
+    assert vocab.encode("Пятницы!", max_len=1) == [vocab.word2idx["пятницы"]]
+
+def test_legacy_pickled_vocabulary():
+    """Тест совместимости со словарями, сохранёнными до появления опций"""
+    legacy = Vocabulary.__new__(Vocabulary)
+    legacy.__dict__.update({
+        'word2idx': {'<PAD>': 0, '<UNK>': 1, 'пятницы,': 2},
+        'idx2word': {0: '<PAD>', 1: '<UNK>', 2: 'пятницы,'},
+        'word_count': {},
+        'vocab_size': 3
+    })
+    restored = pickle.loads(pickle.dumps(legacy))
+    assert restored.encode("Пятницы,", max_len=2) == [2, 0]
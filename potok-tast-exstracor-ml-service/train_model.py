@@ -2,6 +2,7 @@ import asyncio
 import json
 import sys
 from pathlib import Path
+from typing import List, Optional
 
 # Добавление корневой директории в path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -11,24 +12,34 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger("train_script", "INFO")
 
-async def train():
-    """Обучение модели"""
+async def train(data_files: Optional[List[str]] = None):
+    """
+    Обучение модели
     
-    # Загрузка данных
-    data_file = "app/data/training/training_data_20251110.json"
+    Без аргументов - на JSON датасете по умолчанию, с путями к JSONL шардам -
+    потоком, без загрузки всех примеров в память.
+    """
     
-    logger.info(f"📚 Загрузка данных из {data_file}")
+    if data_files:
+        logger.info(f"📚 Потоковое обучение по шардам: {data_files}")
+        training_options = {"data_files": data_files}
+    else:
+        # Загрузка данных
+        data_file = "app/data/training/training_data_20251110.json"
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        logger.info(f"📚 Загрузка данных из {data_file}")
     
-    training_examples = data.get('training_examples', [])
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
-    if len(training_examples) < 10:
-        logger.error("❌ Недостаточно данных (минимум 10 примеров)")
-        return
+        training_examples = data.get('training_examples', [])
     
-    logger.info(f"✅ Загружено {len(training_examples)} примеров")
+        if len(training_examples) < 10:
+            logger.error("❌ Недостаточно данных (минимум 10 примеров)")
+            return
+        
+        logger.info(f"✅ Загружено {len(training_examples)} примеров")
+        training_options = {"training_examples": training_examples}
     
     # Создание сервиса обучения
     training_service = TrainingService()
@@ -37,12 +48,12 @@ async def train():
     logger.info("🚀 Начало обучения...")
     
     result = await training_service.train_new_model(
-        training_examples=training_examples,
         epochs=30,
         batch_size=5,  # Маленький batch для небольшого датасета
         learning_rate=0.001,
         model_name="task_extraction_model",
-        save_checkpoint=True
+        save_checkpoint=True,
+        **training_options
     )
     
     logger.info("=" * 70)
@@ -57,4 +68,4 @@ async def train():
     logger.info("=" * 70)
 
 if __name__ == "__main__":
-    asyncio.run(train())
+    asyncio.run(train(sys.argv[1:] or None))